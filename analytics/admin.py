@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from analytics.models import CreatorEngagement, PostEngagement
+
+
+@admin.register(PostEngagement)
+class PostEngagementAdmin(admin.ModelAdmin):
+    list_display = ("post_id", "period", "bucket", "views", "likes", "comments")
+    list_filter = ("period",)
+    raw_id_fields = ("post",)
+    show_full_result_count = False
+
+
+@admin.register(CreatorEngagement)
+class CreatorEngagementAdmin(admin.ModelAdmin):
+    list_display = ("creator", "period", "bucket", "views", "likes", "comments")
+    list_filter = ("period",)
+    list_select_related = ("creator",)
+    raw_id_fields = ("creator",)
+    show_full_result_count = False
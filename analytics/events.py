@@ -0,0 +1,54 @@
+"""
+Recording of engagement events.
+
+Views only push small events to a Redis list once their transaction
+commits, a view of a post costs no query. The flush_engagement_events beat
+task appends them to the EngagementEvent log in batches, rollup_engagement
+then folds the log into the hourly and daily counts served to creators.
+"""
+
+import json
+import logging
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+EVENT_QUEUE = "analytics:events"
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def _client():
+    return redis.Redis.from_url(settings.ANALYTICS_REDIS_URL)
+
+
+def track(kind: int, post) -> None:
+    """Queues an engagement event of the post after the current commit"""
+    event = {
+        "kind": int(kind),
+        "post": post.id,
+        "creator": post.creator_id,
+        "at": timezone.now().isoformat(),
+    }
+    transaction.on_commit(lambda: push_event(event))
+
+
+def push_event(event: dict) -> None:
+    if settings.ANALYTICS_REDIS_URL:
+        try:
+            _client().rpush(EVENT_QUEUE, json.dumps(event))
+        except redis.RedisError:
+            logger.exception("Could not queue event of post %s", event["post"])
+    else:
+        from analytics.tasks import record_events
+
+        record_events.delay([event])
+
+
+def pop_events(count: int) -> list:
+    events = _client().lpop(EVENT_QUEUE, count) or []
+    return [json.loads(event) for event in events]
@@ -0,0 +1,131 @@
+# Generated by Django 5.0.3 on 2026-10-19 18:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("post", "0008_scheduledpost"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EngagementEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "view"),
+                            (2, "like"),
+                            (3, "unlike"),
+                            (4, "comment"),
+                        ]
+                    ),
+                ),
+                ("post_id", models.BigIntegerField()),
+                ("creator_id", models.BigIntegerField()),
+                ("occurred_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CreatorEngagement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "hour"), ("day", "day")], max_length=4
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                ("likes", models.IntegerField(default=0)),
+                ("comments", models.PositiveIntegerField(default=0)),
+                (
+                    "creator",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("creator", "period", "bucket"),
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("creator", "period", "bucket"),
+                        name="creator_engagement_bucket_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="PostEngagement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "hour"), ("day", "day")], max_length=4
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                ("likes", models.IntegerField(default=0)),
+                ("comments", models.PositiveIntegerField(default=0)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="post.post",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("post", "period", "bucket"),
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "period", "bucket"),
+                        name="post_engagement_bucket_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
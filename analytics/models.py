@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.db import models
+
+
+class EngagementEvent(models.Model):
+    """
+    Append-only log of engagement, drained by rollup_engagement. Kept
+    narrow and without foreign keys or secondary indexes, so appending
+    costs one small heap row.
+    """
+
+    class Kind(models.IntegerChoices):
+        VIEW = 1, "view"
+        LIKE = 2, "like"
+        UNLIKE = 3, "unlike"
+        COMMENT = 4, "comment"
+
+    kind = models.PositiveSmallIntegerField(choices=Kind.choices)
+    post_id = models.BigIntegerField()
+    creator_id = models.BigIntegerField()
+    occurred_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} of post {self.post_id}"
+
+
+class Period(models.TextChoices):
+    HOUR = "hour", "hour"
+    DAY = "day", "day"
+
+
+class EngagementRollup(models.Model):
+    """Counts of one hour or day, likes are net of unlikes"""
+
+    period = models.CharField(max_length=4, choices=Period.choices)
+    bucket = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class PostEngagement(EngagementRollup):
+    # posts may be partitioned on (id, created_at), so the id alone can't
+    # back a database constraint; the unique constraint indexes post first
+    post = models.ForeignKey(
+        "post.Post",
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_constraint=False,
+        db_index=False,
+    )
+
+    class Meta:
+        ordering = ("post", "period", "bucket")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("post", "period", "bucket"),
+                name="post_engagement_bucket_uniq",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"post {self.post_id} {self.period} {self.bucket}"
+
+
+class CreatorEngagement(EngagementRollup):
+    creator = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+
+    class Meta:
+        ordering = ("creator", "period", "bucket")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("creator", "period", "bucket"),
+                name="creator_engagement_bucket_uniq",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"creator {self.creator_id} {self.period} {self.bucket}"
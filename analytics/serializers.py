@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+
+class EngagementSerializer(serializers.Serializer):
+    bucket = serializers.DateTimeField()
+    views = serializers.IntegerField()
+    likes = serializers.IntegerField()
+    comments = serializers.IntegerField()
+
+
+class EngagementSeriesSerializer(serializers.Serializer):
+    period = serializers.CharField()
+    since = serializers.DateTimeField()
+    until = serializers.DateTimeField()
+    results = EngagementSerializer(many=True)
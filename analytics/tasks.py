@@ -0,0 +1,162 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from analytics import events as event_queue
+from analytics.models import (
+    CreatorEngagement,
+    EngagementEvent,
+    Period,
+    PostEngagement,
+)
+from post.models import Post
+
+# rollup column each kind of event counts in, and by how much
+COUNTERS = {
+    EngagementEvent.Kind.VIEW: ("views", 1),
+    EngagementEvent.Kind.LIKE: ("likes", 1),
+    EngagementEvent.Kind.UNLIKE: ("likes", -1),
+    EngagementEvent.Kind.COMMENT: ("comments", 1),
+}
+ROLLUP_COUNTS = ("views", "likes", "comments")
+
+
+def bucket_start(moment, period: str):
+    """Start of the hour or day the moment falls into"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if period == Period.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+@shared_task
+def record_events(events: list) -> None:
+    """Appends a batch of queued events to the log"""
+    EngagementEvent.objects.bulk_create(
+        [
+            EngagementEvent(
+                kind=event["kind"],
+                post_id=event["post"],
+                creator_id=event["creator"],
+                occurred_at=parse_datetime(event["at"]),
+            )
+            for event in events
+        ],
+        batch_size=settings.ANALYTICS_BATCH_SIZE,
+    )
+
+
+@shared_task
+def flush_engagement_events() -> None:
+    """Drains the event queue filled by the views in batches"""
+    if not settings.ANALYTICS_REDIS_URL:
+        return
+    for _ in range(settings.ANALYTICS_MAX_BATCHES):
+        events = event_queue.pop_events(settings.ANALYTICS_BATCH_SIZE)
+        if not events:
+            break
+        record_events(events)
+
+
+def add_counts(model, owner_column: str, counts: dict) -> None:
+    """
+    Adds counts keyed by (owner id, period, bucket) to the rollup rows,
+    creating missing ones. A single upsert per row, so concurrent rollups
+    can't lose increments.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = (owner_column, "period", "bucket") + ROLLUP_COUNTS
+    updates = ", ".join(
+        f"{quote(column)} = {table}.{quote(column)} + EXCLUDED.{quote(column)}"
+        for column in ROLLUP_COUNTS
+    )
+    column_list = ", ".join(quote(column) for column in columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+    unique_columns = ", ".join(quote(column) for column in columns[:3])
+    sql = (
+        f"INSERT INTO {table} ({column_list}) VALUES ({placeholders}) "
+        f"ON CONFLICT ({unique_columns}) DO UPDATE SET {updates}"
+    )
+    rows = [
+        (
+            owner_id,
+            period,
+            connection.ops.adapt_datetimefield_value(bucket),
+            *(values[column] for column in ROLLUP_COUNTS),
+        )
+        for (owner_id, period, bucket), values in counts.items()
+    ]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def fold_events(events: list) -> tuple:
+    """Per post and per creator counts of the events, by period and bucket"""
+    post_ids = set(
+        Post.objects.filter(id__in={event.post_id for event in events})
+        .order_by()
+        .values_list("id", flat=True)
+    )
+    creator_ids = set(
+        get_user_model()
+        .objects.filter(id__in={event.creator_id for event in events})
+        .order_by()
+        .values_list("id", flat=True)
+    )
+
+    post_counts = defaultdict(Counter)
+    creator_counts = defaultdict(Counter)
+    for event in events:
+        column, delta = COUNTERS[event.kind]
+        for period in Period.values:
+            bucket = bucket_start(event.occurred_at, period)
+            # engagement of deleted posts and creators is dropped
+            if event.post_id in post_ids:
+                post_counts[event.post_id, period, bucket][column] += delta
+            if event.creator_id in creator_ids:
+                creator_counts[event.creator_id, period, bucket][column] += delta
+    return post_counts, creator_counts
+
+
+@shared_task
+def rollup_engagement() -> int:
+    """
+    Folds the event log into the hourly and daily rollups, batch by batch,
+    deleting the events in the transaction that counts them. Returns the
+    number of events processed.
+    """
+    processed = 0
+    for _ in range(settings.ANALYTICS_MAX_BATCHES):
+        with transaction.atomic():
+            events = list(
+                EngagementEvent.objects.select_for_update(skip_locked=True)
+                .order_by("id")[: settings.ANALYTICS_BATCH_SIZE]
+            )
+            if not events:
+                break
+            post_counts, creator_counts = fold_events(events)
+            add_counts(PostEngagement, "post_id", post_counts)
+            add_counts(CreatorEngagement, "creator_id", creator_counts)
+            EngagementEvent.objects.filter(
+                id__in=[event.id for event in events]
+            ).delete()
+        processed += len(events)
+    return processed
+
+
+@shared_task
+def remove_old_hourly_rollups() -> None:
+    cutoff = timezone.now() - timedelta(
+        days=settings.ANALYTICS_HOURLY_RETENTION_DAYS
+    )
+    for model in (PostEngagement, CreatorEngagement):
+        model.objects.filter(period=Period.HOUR, bucket__lt=cutoff).delete()
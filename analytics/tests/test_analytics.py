@@ -0,0 +1,209 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import redis
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from analytics.events import _client, track
+from analytics.models import (
+    CreatorEngagement,
+    EngagementEvent,
+    Period,
+    PostEngagement,
+)
+from analytics.tasks import record_events, rollup_engagement
+from analytics.views import CreatorEngagementView, PostEngagementView
+from monitoring.testing import QueryBudgetTestMixin
+from post.models import Post
+
+
+def sample_user(index: int):
+    return get_user_model().objects.create_user(
+        f"user{index}@test.com", "testpass", username=f"user{index}"
+    )
+
+
+def event(kind, post, at: str) -> dict:
+    return {"kind": kind, "post": post.id, "creator": post.creator_id, "at": at}
+
+
+class RollupEngagementTests(TestCase):
+    def setUp(self):
+        self.creator = sample_user(0)
+        self.post = Post.objects.create(title="Post", creator=self.creator)
+        self.other_post = Post.objects.create(title="Other", creator=self.creator)
+
+    def test_events_are_folded_into_hours_and_days(self):
+        Kind = EngagementEvent.Kind
+        record_events(
+            [
+                event(Kind.VIEW, self.post, "2026-10-19T10:05:00"),
+                event(Kind.VIEW, self.post, "2026-10-19T10:55:00"),
+                event(Kind.LIKE, self.post, "2026-10-19T11:00:00"),
+                event(Kind.COMMENT, self.other_post, "2026-10-19T11:30:00"),
+            ]
+        )
+
+        self.assertEqual(rollup_engagement(), 4)
+
+        self.assertFalse(EngagementEvent.objects.exists())
+        hours = PostEngagement.objects.filter(
+            post=self.post, period=Period.HOUR
+        ).values_list("bucket", "views", "likes", "comments")
+        self.assertEqual(
+            list(hours),
+            [
+                (datetime(2026, 10, 19, 10), 2, 0, 0),
+                (datetime(2026, 10, 19, 11), 0, 1, 0),
+            ],
+        )
+        day = CreatorEngagement.objects.get(creator=self.creator, period=Period.DAY)
+        self.assertEqual(day.bucket, datetime(2026, 10, 19))
+        self.assertEqual((day.views, day.likes, day.comments), (2, 1, 1))
+
+    def test_later_rollups_add_to_buckets(self):
+        Kind = EngagementEvent.Kind
+        record_events([event(Kind.LIKE, self.post, "2026-10-19T10:00:00")])
+        rollup_engagement()
+        record_events(
+            [
+                event(Kind.LIKE, self.post, "2026-10-19T10:10:00"),
+                event(Kind.UNLIKE, self.post, "2026-10-19T10:20:00"),
+                event(Kind.VIEW, self.post, "2026-10-19T10:30:00"),
+            ]
+        )
+        rollup_engagement()
+
+        hour = PostEngagement.objects.get(post=self.post, period=Period.HOUR)
+        self.assertEqual((hour.views, hour.likes), (1, 1))
+
+    def test_events_of_deleted_posts_are_dropped(self):
+        record_events(
+            [event(EngagementEvent.Kind.VIEW, self.post, "2026-10-19T10:00:00")]
+        )
+        self.post.delete()
+
+        self.assertEqual(rollup_engagement(), 1)
+        self.assertFalse(PostEngagement.objects.exists())
+        self.assertEqual(CreatorEngagement.objects.count(), 2)
+
+    def test_track_queues_event_after_commit(self):
+        with (
+            patch("analytics.tasks.record_events.delay") as delay,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            track(EngagementEvent.Kind.VIEW, self.post)
+
+        (events,), _ = delay.call_args
+        self.assertEqual(events[0]["post"], self.post.id)
+        self.assertEqual(events[0]["creator"], self.creator.id)
+
+
+class EngagementSeriesTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.creator = sample_user(0)
+        self.client.force_authenticate(self.creator)
+        self.post = Post.objects.create(title="Post", creator=self.creator)
+        for hour in (8, 9, 13):
+            PostEngagement.objects.create(
+                post=self.post,
+                period=Period.HOUR,
+                bucket=datetime(2026, 10, 19, hour),
+                views=hour,
+            )
+        CreatorEngagement.objects.create(
+            creator=self.creator,
+            period=Period.DAY,
+            bucket=datetime(2026, 10, 19),
+            likes=3,
+        )
+
+    def test_post_series_in_range(self):
+        with self.assertWithinQueryBudget(PostEngagementView, "get"):
+            res = self.client.get(
+                reverse("analytics:post", args=[self.post.id]),
+                {"since": "2026-10-19T09:30:00", "until": "2026-10-19T23:00:00"},
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [point["views"] for point in res.data["results"]], [9, 13]
+        )
+
+    def test_creator_series_by_day(self):
+        with self.assertWithinQueryBudget(CreatorEngagementView, "get"):
+            res = self.client.get(
+                reverse("analytics:creator", args=[self.creator.id]),
+                {"period": "day", "since": "2026-10-01", "until": "2026-10-31"},
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["likes"], 3)
+
+    def test_other_users_analytics_forbidden(self):
+        self.client.force_authenticate(sample_user(1))
+
+        res = self.client.get(reverse("analytics:post", args=[self.post.id]))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        res = self.client.get(reverse("analytics:creator", args=[self.creator.id]))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_range_rejected(self):
+        url = reverse("analytics:creator", args=[self.creator.id])
+
+        for params in (
+            {"period": "week"},
+            {"since": "yesterday"},
+            {"since": "2026-10-20", "until": "2026-10-19"},
+            {"since": "2026-01-01", "until": "2026-10-19"},
+        ):
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_views_likes_and_comments_are_tracked(self):
+        reader = sample_user(1)
+        self.client.force_authenticate(reader)
+        post_url = reverse("post:post-detail", args=[self.post.id])
+
+        with (
+            patch("analytics.tasks.record_events.delay") as delay,
+            patch("notification.inbox.push_event"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.client.get(post_url)
+            self.client.post(f"{post_url}like/")
+            self.client.post(f"{post_url}comments/", {"content": "Nice"})
+
+        kinds = [call.args[0][0]["kind"] for call in delay.call_args_list]
+        self.assertEqual(
+            kinds,
+            [
+                EngagementEvent.Kind.VIEW,
+                EngagementEvent.Kind.LIKE,
+                EngagementEvent.Kind.COMMENT,
+            ],
+        )
+
+    @override_settings(ANALYTICS_REDIS_URL="redis://localhost:6379/0")
+    def test_redis_outage_does_not_fail_requests(self):
+        self.client.force_authenticate(sample_user(1))
+        post_url = reverse("post:post-detail", args=[self.post.id])
+        _client.cache_clear()
+        self.addCleanup(_client.cache_clear)
+
+        with (
+            patch("analytics.events.redis.Redis.rpush") as rpush,
+            self.assertLogs("analytics.events", "ERROR"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            rpush.side_effect = redis.ConnectionError
+            res = self.client.get(post_url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        rpush.assert_called_once()
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from analytics.views import CreatorEngagementView, PostEngagementView
+
+urlpatterns = [
+    path("posts/<int:pk>/", PostEngagementView.as_view(), name="post"),
+    path("creators/<int:pk>/", CreatorEngagementView.as_view(), name="creator"),
+]
+
+app_name = "analytics"
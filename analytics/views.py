@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from analytics.models import CreatorEngagement, Period, PostEngagement
+from analytics.serializers import EngagementSerializer, EngagementSeriesSerializer
+from analytics.tasks import bucket_start
+from post.models import Post
+
+SERIES_PARAMETERS = [
+    OpenApiParameter(
+        name="period",
+        description="Bucket size, hour (default) or day",
+        required=False,
+        type=str,
+        enum=Period.values,
+    ),
+    OpenApiParameter(
+        name="since",
+        description="ISO date or date and time, defaults to 48 hours or "
+        "30 days ago",
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name="until",
+        description="ISO date or date and time, defaults to now",
+        required=False,
+        type=str,
+    ),
+]
+
+
+class EngagementSeriesView(APIView):
+    """
+    Views, likes and comments per hour or day, read from the rollups with
+    one range scan of their (owner, period, bucket) unique index. Buckets
+    without engagement are left out.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    model = None
+    owner_field = None
+    default_spans = {
+        Period.HOUR: timedelta(hours=48),
+        Period.DAY: timedelta(days=30),
+    }
+    max_spans = {
+        Period.HOUR: timedelta(days=31),
+        Period.DAY: timedelta(days=731),
+    }
+
+    def get_owner_id(self, pk: int) -> int:
+        raise NotImplementedError
+
+    @staticmethod
+    def _param_to_datetime(name: str, value: str) -> datetime:
+        parsed = parse_datetime(value)
+        if parsed is None and parse_date(value) is not None:
+            parsed = datetime.combine(parse_date(value), datetime.min.time())
+        if parsed is None:
+            raise ValidationError({name: "Expected an ISO date or date and time."})
+        return parsed
+
+    def get_range(self) -> tuple:
+        params = self.request.query_params
+        period = params.get("period", Period.HOUR)
+        if period not in Period.values:
+            raise ValidationError(
+                {"period": f"Choose one of: {', '.join(Period.values)}."}
+            )
+
+        until = timezone.now()
+        if "until" in params:
+            until = self._param_to_datetime("until", params["until"])
+        since = until - self.default_spans[period]
+        if "since" in params:
+            since = self._param_to_datetime("since", params["since"])
+        if since > until:
+            raise ValidationError({"since": "Must not be after until."})
+        if until - since > self.max_spans[period]:
+            raise ValidationError(
+                {"since": f"At most {self.max_spans[period].days} days of {period}s."}
+            )
+        return period, bucket_start(since, period), until
+
+    @extend_schema(
+        parameters=SERIES_PARAMETERS,
+        responses={status.HTTP_200_OK: EngagementSeriesSerializer},
+    )
+    def get(self, request, pk=None):
+        period, since, until = self.get_range()
+        owner_id = self.get_owner_id(pk)
+        series = (
+            self.model.objects.filter(
+                **{self.owner_field: owner_id},
+                period=period,
+                bucket__gte=since,
+                bucket__lte=until,
+            )
+            .order_by("bucket")
+            .values("bucket", "views", "likes", "comments")
+        )
+        return Response(
+            {
+                "period": period,
+                "since": since,
+                "until": until,
+                "results": EngagementSerializer(series, many=True).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class PostEngagementView(EngagementSeriesView):
+    """Engagement of a post, for its creator"""
+
+    model = PostEngagement
+    owner_field = "post_id"
+    query_budgets = {"get": 2}
+
+    def get_owner_id(self, pk: int) -> int:
+        post = get_object_or_404(Post.objects.only("id", "creator"), pk=pk)
+        user = self.request.user
+        if post.creator_id != user.id and not user.is_staff:
+            raise PermissionDenied("Only the creator can see the post's analytics.")
+        return post.id
+
+
+class CreatorEngagementView(EngagementSeriesView):
+    """Engagement of all posts of a creator, for the creator"""
+
+    model = CreatorEngagement
+    owner_field = "creator_id"
+    query_budgets = {"get": 1}
+
+    def get_owner_id(self, pk: int) -> int:
+        user = self.request.user
+        if pk != user.id and not user.is_staff:
+            raise PermissionDenied("Only the creator can see their analytics.")
+        return pk
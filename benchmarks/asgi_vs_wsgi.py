@@ -0,0 +1,98 @@
+"""
+Compares the sync DRF endpoints served by gunicorn (WSGI) with their async
+counterparts under /api/async/ served by uvicorn (ASGI).
+
+Start both servers against the same database, e.g.
+
+    gunicorn social_media_api.wsgi:application -b 127.0.0.1:8001 -w 2
+    uvicorn social_media_api.asgi:application --port 8002 --workers 2
+
+then run
+
+    python -m benchmarks.asgi_vs_wsgi --token <token> --concurrency 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+from benchmarks.stats import percentile
+
+ENDPOINTS = {
+    "post list": ("/api/post/", "/api/async/post/"),
+    "followings": (
+        "/api/post/followings/",
+        "/api/async/post/followings/",
+    ),
+    "user list": ("/api/user/list/", "/api/async/user/list/"),
+}
+
+
+async def run(url: str, token: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker(session):
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    headers = {"Authorization": f"Token {token}"}
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "rps": requests / elapsed,
+        "mean": statistics.mean(latencies) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "errors": errors,
+    }
+
+
+async def main(options) -> None:
+    print(
+        f"{'endpoint':<12} {'server':<5} {'req/s':>9} {'mean ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    )
+    for name, (sync_path, async_path) in ENDPOINTS.items():
+        for server, url in (
+            ("wsgi", options.wsgi + sync_path),
+            ("asgi", options.asgi + async_path),
+        ):
+            result = await run(
+                url, options.token, options.requests, options.concurrency
+            )
+            print(
+                f"{name:<12} {server:<5} {result['rps']:>9.1f} "
+                f"{result['mean']:>9.1f} {result['p95']:>9.1f} "
+                f"{result['p99']:>9.1f} {result['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--wsgi", default="http://127.0.0.1:8001")
+    parser.add_argument("--asgi", default="http://127.0.0.1:8002")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,215 @@
+"""
+Benchmarks of the per-request hot paths, run in-process against the
+current database: serializer throughput, SQL statements per view action
+and the cost of the object permission checks.
+"""
+
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from monitoring.queries import get_query_budget, get_view_action
+from post.models import Comment, Post, Tag
+from post.permissions import IsCommentWriterOrReadOnly, IsPostCreatorOrReadOnly
+from post.serializers import (
+    CommentListSerializer,
+    PostDetailSerializer,
+    PostListSerializer,
+)
+from post.views import POST_LIST_PLAN, PostViewSet
+from user.permissions import IsOwnerOrReadOnly
+from user.serializers import UserListSerializer
+from user.views import USER_LIST_PLAN
+
+
+# the wrapping transaction, a savepoint inside it counts like in the tests
+TRANSACTION_STATEMENTS = {"BEGIN", "COMMIT", "ROLLBACK"}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def best_time(function, repeat: int, setup=None) -> float:
+    """Fastest of `repeat` runs in seconds, setup() runs untimed before each"""
+    best = float("inf")
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def serializer_cases(rows: int) -> dict:
+    """Serializer and the querysets it's fed by its views"""
+    User = get_user_model()
+    return {
+        "PostListSerializer": (
+            PostListSerializer,
+            POST_LIST_PLAN.apply(Post.objects.order_by("id"))[:rows],
+        ),
+        "PostDetailSerializer": (
+            PostDetailSerializer,
+            PostViewSet.query_plans["retrieve"].apply(Post.objects.order_by("id"))[
+                :rows
+            ],
+        ),
+        "UserListSerializer": (
+            UserListSerializer,
+            USER_LIST_PLAN.apply(User.objects.order_by("id"))[:rows],
+        ),
+        "CommentListSerializer": (
+            CommentListSerializer,
+            Comment.objects.order_by("id")[:rows],
+        ),
+    }
+
+
+def serializer_throughput(rows: int, repeat: int) -> dict:
+    """Rows per second of to_representation over already fetched instances"""
+    request = APIRequestFactory().get("/")
+    results = {}
+    for name, (serializer_class, queryset) in serializer_cases(rows).items():
+        instances = list(queryset)
+        seconds = best_time(
+            lambda _: serializer_class(
+                instances, many=True, context={"request": request}
+            ).data,
+            repeat,
+        )
+        results[name] = {
+            "rows": len(instances),
+            "rows_per_second": len(instances) / seconds if seconds else 0.0,
+        }
+    return results
+
+
+def query_cases(user, post, tag, followed, stranger) -> list:
+    """(method, path, data) of the API actions with a query budget"""
+    new_post = {"title": "Benchmark", "content": "Benchmark", "tags": [tag.id]}
+    return [
+        ("GET", "/api/post/", None),
+        ("GET", f"/api/post/{post.id}/", None),
+        ("POST", "/api/post/", new_post),
+        ("GET", f"/api/post/{post.id}/comments/", None),
+        ("POST", f"/api/post/{post.id}/comments/", {"content": "Benchmark"}),
+        ("POST", f"/api/post/{post.id}/like/", None),
+        ("GET", "/api/post/liked/", None),
+        ("GET", "/api/post/my/", None),
+        ("GET", "/api/post/followings/", None),
+        ("GET", "/api/user/list/", None),
+        ("GET", f"/api/user/{user.id}/", None),
+        ("POST", f"/api/user/follow/{stranger.id}/", None),
+        ("DELETE", f"/api/user/follow/{followed.id}/", None),
+    ]
+
+
+def benchmark_users():
+    """A user following someone, someone they follow and one they don't"""
+    User = get_user_model()
+    user = (
+        User.objects.filter(follows__isnull=False, created_posts__isnull=False)
+        .order_by("id")
+        .first()
+    )
+    followed = user.follows.order_by("id").first()
+    stranger = (
+        User.objects.exclude(id=user.id)
+        .exclude(followers=user)
+        .order_by("id")
+        .first()
+    )
+    return user, followed, stranger
+
+
+def view_query_counts() -> dict:
+    """
+    SQL statements per view action, authentication excluded, against its
+    declared budget. Writes are rolled back, so every run sees the same data.
+    """
+    user, followed, stranger = benchmark_users()
+    post = Post.objects.filter(comments__isnull=False).order_by("id").first()
+    tag = Tag.objects.order_by("id").first()
+    client = APIClient()
+    client.force_authenticate(user)
+
+    results = {}
+    for method, path, data in query_cases(
+        user, post, tag, followed, stranger
+    ):
+        match = resolve(path)
+        action = get_view_action(match.func, method)
+        with CaptureQueriesContext(connection) as queries:
+            try:
+                with transaction.atomic():
+                    response = client.generic(
+                        method,
+                        path,
+                        json.dumps(data) if data else "",
+                        content_type="application/json",
+                    )
+                    raise _Rollback
+            except _Rollback:
+                pass
+        results[f"{method} {match.view_name}"] = {
+            "status": response.status_code,
+            "queries": sum(
+                query["sql"] not in TRANSACTION_STATEMENTS
+                for query in queries.captured_queries
+            ),
+            "budget": get_query_budget(match.func.cls, action),
+        }
+    return results
+
+
+def permission_cases() -> dict:
+    """Permission, fresh instances it checks as the views load them"""
+    User = get_user_model()
+    return {
+        "IsPostCreatorOrReadOnly": (
+            IsPostCreatorOrReadOnly,
+            lambda rows: list(Post.objects.order_by("id")[:rows]),
+        ),
+        "IsCommentWriterOrReadOnly": (
+            IsCommentWriterOrReadOnly,
+            lambda rows: list(Comment.objects.order_by("id")[:rows]),
+        ),
+        "IsOwnerOrReadOnly": (
+            IsOwnerOrReadOnly,
+            lambda rows: list(User.objects.order_by("id")[:rows]),
+        ),
+    }
+
+
+def permission_overhead(rows: int, repeat: int) -> dict:
+    """Microseconds and SQL statements per has_object_permission call"""
+    user, _, _ = benchmark_users()
+    factory = APIRequestFactory()
+    results = {}
+    for name, (permission_class, load) in permission_cases().items():
+        permission = permission_class()
+        for method in ("GET", "PATCH"):
+            request = Request(factory.generic(method, "/"))
+            request.user = user
+
+            def check(objects):
+                for obj in objects:
+                    permission.has_object_permission(request, None, obj)
+
+            objects = load(rows)
+            with CaptureQueriesContext(connection) as queries:
+                check(objects)
+            seconds = best_time(check, repeat, setup=lambda: load(rows))
+            results[f"{name} {method}"] = {
+                "objects": len(objects),
+                "us_per_object": seconds / len(objects) * 1e6,
+                "queries_per_object": len(queries) / len(objects),
+            }
+    return results
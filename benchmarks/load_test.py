@@ -0,0 +1,371 @@
+"""
+Replays a mix of API traffic against a running server and reports latency
+percentiles, throughput and error rates per route.
+
+Virtual users log in as the users created by generate_dataset
+(user<id>@example.com), so fill the database first and raise the throttle
+rates of the server under test, e.g.
+
+    python manage.py generate_dataset --users 10000
+    THROTTLE_ANON_RATE=1000000/day THROTTLE_USER_RATE=1000000/day \\
+        gunicorn social_media_api.wsgi:application -b 127.0.0.1:8001 -w 4
+
+then save a baseline
+
+    python -m benchmarks.load_test --users 1-10000 --save baseline.json
+
+and compare a later run against it, exiting with 1 on a regression
+
+    python -m benchmarks.load_test --users 1-10000 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import aiohttp
+
+from benchmarks.stats import latency_summary
+
+DEFAULT_MIX = {
+    "feed": 30,
+    "list": 20,
+    "filter": 10,
+    "detail": 10,
+    "like": 10,
+    "comment": 8,
+    "follow": 7,
+    "login": 5,
+}
+SEARCH_WORDS = ("django", "redis", "celery", "cache", "query", "feed", "latency")
+
+
+class RouteResult:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+
+    def add(self, latency: float, status, ok: bool) -> None:
+        self.latencies.append(latency)
+        self.statuses[str(status)] += 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> dict:
+        requests = len(self.latencies)
+        return {
+            "requests": requests,
+            "rps": requests / elapsed if elapsed else 0.0,
+            "error_rate": self.errors / requests if requests else 0.0,
+            **latency_summary(self.latencies),
+            "statuses": dict(self.statuses),
+        }
+
+
+class LoadTest:
+    def __init__(self, options):
+        self.base_url = options.base_url.rstrip("/")
+        self.user_ids = options.users
+        self.password = options.password
+        self.tag_ids = options.tags
+        self.mix = options.mix
+        self.concurrency = options.concurrency
+        self.duration = options.duration
+        self.seed = options.seed
+        self.results = defaultdict(RouteResult)
+        self.post_ids = []
+        self.session = None
+
+    async def request(
+        self, route: str, method: str, path: str, token=None, expected=(200,), **kwargs
+    ):
+        """Sends a request, records it under `route`, returns the JSON body"""
+        headers = {"Authorization": f"Token {token}"} if token else {}
+        started = time.perf_counter()
+        body = None
+        try:
+            async with self.session.request(
+                method, self.base_url + path, headers=headers, **kwargs
+            ) as response:
+                status = response.status
+                if status in expected and response.content_type == "application/json":
+                    body = await response.json()
+                else:
+                    await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            status = type(error).__name__
+        self.results[route].add(
+            time.perf_counter() - started, status, status in expected
+        )
+        return body
+
+    def remember_posts(self, page) -> None:
+        """Collects post ids from a paginated or plain list response"""
+        posts = page.get("results") if isinstance(page, dict) else page
+        if posts:
+            self.post_ids.extend(post["id"] for post in posts)
+            # keep the pool recent and bounded
+            del self.post_ids[:-10000]
+
+    async def login(self, user_id: int):
+        body = await self.request(
+            "POST /api/user/login/",
+            "POST",
+            "/api/user/login/",
+            json={"email": f"user{user_id}@example.com", "password": self.password},
+        )
+        return body["token"] if body else None
+
+    async def scenario_feed(self, token, rng) -> None:
+        page = await self.request(
+            "GET /api/post/followings/", "GET", "/api/post/followings/", token
+        )
+        self.remember_posts(page)
+
+    async def scenario_list(self, token, rng) -> None:
+        page = await self.request(
+            "GET /api/post/",
+            "GET",
+            f"/api/post/?page={rng.randint(1, 5)}",
+            token,
+        )
+        self.remember_posts(page)
+
+    async def scenario_filter(self, token, rng) -> None:
+        if rng.random() < 0.5:
+            route, params = "GET /api/post/?title=", {"title": rng.choice(SEARCH_WORDS)}
+        else:
+            route, params = "GET /api/post/?tags=", {"tags": rng.choice(self.tag_ids)}
+        await self.request(route, "GET", "/api/post/", token, params=params)
+
+    async def scenario_detail(self, token, rng) -> None:
+        if not self.post_ids:
+            return await self.scenario_list(token, rng)
+        await self.request(
+            "GET /api/post/<id>/",
+            "GET",
+            f"/api/post/{rng.choice(self.post_ids)}/",
+            token,
+        )
+
+    async def scenario_like(self, token, rng) -> None:
+        if not self.post_ids:
+            return await self.scenario_list(token, rng)
+        await self.request(
+            "POST /api/post/<id>/like/",
+            "POST",
+            f"/api/post/{rng.choice(self.post_ids)}/like/",
+            token,
+            expected=(201,),
+        )
+
+    async def scenario_comment(self, token, rng) -> None:
+        if not self.post_ids:
+            return await self.scenario_list(token, rng)
+        await self.request(
+            "POST /api/post/<id>/comments/",
+            "POST",
+            f"/api/post/{rng.choice(self.post_ids)}/comments/",
+            token,
+            expected=(201,),
+            json={"content": f"Load test comment {rng.random():.6f}"},
+        )
+
+    async def scenario_follow(self, token, rng) -> None:
+        path = f"/api/user/follow/{rng.choice(self.user_ids)}/"
+        # 400 means the user is already followed (or is the follower)
+        followed = await self.request(
+            "POST /api/user/follow/<id>/",
+            "POST",
+            path,
+            token,
+            expected=(201, 400),
+        )
+        if followed and "error" in followed:
+            await self.request(
+                "DELETE /api/user/follow/<id>/",
+                "DELETE",
+                path,
+                token,
+                expected=(204, 400),
+            )
+
+    async def scenario_login(self, token, rng) -> None:
+        await self.login(rng.choice(self.user_ids))
+
+    async def virtual_user(self, index: int, deadline: float) -> None:
+        rng = random.Random(f"{self.seed}:{index}")
+        scenarios, weights = zip(*self.mix.items())
+        token = None
+        while time.perf_counter() < deadline:
+            if token is None:
+                token = await self.login(rng.choice(self.user_ids))
+                if token is None:
+                    await asyncio.sleep(0.1)
+                continue
+            scenario = rng.choices(scenarios, weights)[0]
+            await getattr(self, f"scenario_{scenario}")(token, rng)
+
+    async def run(self) -> dict:
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=timeout
+        ) as self.session:
+            started = time.perf_counter()
+            deadline = started + self.duration
+            await asyncio.gather(
+                *(
+                    self.virtual_user(index, deadline)
+                    for index in range(self.concurrency)
+                )
+            )
+            elapsed = time.perf_counter() - started
+
+        total = RouteResult()
+        for result in self.results.values():
+            total.latencies.extend(result.latencies)
+            total.statuses.update(result.statuses)
+            total.errors += result.errors
+        return {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "base_url": self.base_url,
+            "concurrency": self.concurrency,
+            "duration": self.duration,
+            "mix": self.mix,
+            "elapsed": elapsed,
+            "total": total.summary(elapsed),
+            "routes": {
+                route: result.summary(elapsed)
+                for route, result in sorted(self.results.items())
+            },
+        }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{'route':<34} {'requests':>9} {'req/s':>8} {'errors':>7} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    rows = list(report["routes"].items()) + [("total", report["total"])]
+    for route, stats in rows:
+        print(
+            f"{route:<34} {stats['requests']:>9} {stats['rps']:>8.1f} "
+            f"{stats['error_rate']:>7.1%} {stats['p50']:>8.1f} "
+            f"{stats['p95']:>8.1f} {stats['p99']:>8.1f}"
+        )
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """
+    Prints the change of every route against the baseline, returns the
+    routes whose p95/p99 grew or throughput dropped by more than threshold
+    """
+    regressions = []
+    print(
+        f"\n{'route':<34} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+        f" {'errors':>8}"
+    )
+    routes = dict(report["routes"], total=report["total"])
+    previous_routes = dict(baseline["routes"], total=baseline["total"])
+    for route, stats in routes.items():
+        previous = previous_routes.get(route)
+        if previous is None:
+            print(f"{route:<34} new route")
+            continue
+        changes = {
+            key: (stats[key] - previous[key]) / previous[key] if previous[key] else 0.0
+            for key in ("rps", "p50", "p95", "p99")
+        }
+        errors = stats["error_rate"] - previous["error_rate"]
+        regressed = (
+            changes["p95"] > threshold
+            or changes["p99"] > threshold
+            or changes["rps"] < -threshold
+            or errors > 0.01
+        )
+        if regressed:
+            regressions.append(route)
+        print(
+            f"{route:<34} {changes['rps']:>+8.1%} {changes['p50']:>+8.1%} "
+            f"{changes['p95']:>+8.1%} {changes['p99']:>+8.1%} {errors:>+8.1%}"
+            + ("  REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def id_range(value: str) -> range:
+    first, _, last = value.partition("-")
+    return range(int(first), int(last or first) + 1)
+
+
+def traffic_mix(value: str) -> dict:
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, value.split(",")):
+        scenario, _, weight = item.partition("=")
+        if scenario not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario {scenario!r}")
+        mix[scenario] = float(weight)
+    return {scenario: weight for scenario, weight in mix.items() if weight > 0}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--users",
+        type=id_range,
+        default=id_range("1-1000"),
+        help="Ids of the users to log in as, e.g. 1-10000",
+    )
+    parser.add_argument("--password", default="password")
+    parser.add_argument(
+        "--tags",
+        type=id_range,
+        default=id_range("1-50"),
+        help="Tag ids used by the tags filter",
+    )
+    parser.add_argument(
+        "--mix",
+        type=traffic_mix,
+        default=dict(DEFAULT_MIX),
+        help="Weights overriding the default mix, e.g. feed=50,login=0 "
+        f"(scenarios: {', '.join(DEFAULT_MIX)})",
+    )
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="Diff against this JSON baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative p95/p99/throughput change counted as a regression",
+    )
+    options = parser.parse_args()
+
+    report = asyncio.run(LoadTest(options).run())
+    print_report(report)
+
+    if options.save:
+        with open(options.save, "w") as file:
+            json.dump(report, file, indent=2)
+    if options.compare:
+        with open(options.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, options.threshold)
+        if regressions:
+            print(f"\nRegressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Micro-benchmarks of serializers, view query counts and permission checks.
+
+Runs in-process against a throwaway test database filled by the dataset
+generator, so it needs no server and leaves the configured database alone:
+
+    python -m benchmarks.micro --save
+
+records benchmarks/baselines/micro.json, and
+
+    python -m benchmarks.micro
+
+compares a later run against it, exiting with 1 on a regression. Timings
+regress when they're worse than the baseline by more than --threshold,
+query counts on any increase. Compare runs of the same database engine
+and dataset options only.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import django
+
+BASELINE = Path(__file__).parent / "baselines" / "micro.json"
+
+# (section, metric, True if higher is better, True if compared exactly)
+METRICS = (
+    ("serializers", "rows_per_second", True, False),
+    ("queries", "queries", False, True),
+    ("permissions", "us_per_object", False, False),
+    ("permissions", "queries_per_object", False, True),
+)
+
+
+def run(options) -> dict:
+    from django.db import connection
+    from django.test.utils import (
+        override_settings,
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    from benchmarks import hot_paths
+    from post.dataset import DatasetGenerator
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        DatasetGenerator(
+            users=options.users, seed=options.seed, log=lambda message: None
+        ).generate()
+        # a cold private cache and no sampling, every run does the same work
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                }
+            },
+            PROFILING_SAMPLE_RATE=0,
+            SLOW_QUERY_THRESHOLD_MS=None,
+        ):
+            return {
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "database": connection.vendor,
+                "users": options.users,
+                "seed": options.seed,
+                "rows": options.rows,
+                "serializers": hot_paths.serializer_throughput(
+                    options.rows, options.repeat
+                ),
+                "queries": hot_paths.view_query_counts(),
+                "permissions": hot_paths.permission_overhead(
+                    options.rows, options.repeat
+                ),
+            }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def print_report(report: dict) -> None:
+    print(f"{'serializer':<44} {'rows':>6} {'rows/s':>10}")
+    for name, stats in report["serializers"].items():
+        print(f"{name:<44} {stats['rows']:>6} {stats['rows_per_second']:>10.0f}")
+
+    print(f"\n{'view action':<44} {'status':>6} {'queries':>10} {'budget':>7}")
+    for name, stats in report["queries"].items():
+        over = stats["budget"] is not None and stats["queries"] > stats["budget"]
+        print(
+            f"{name:<44} {stats['status']:>6} {stats['queries']:>10} "
+            f"{stats['budget'] if stats['budget'] is not None else '-':>7}"
+            + ("  OVER BUDGET" if over else "")
+        )
+
+    print(f"\n{'permission':<44} {'us/obj':>6} {'queries/obj':>10}")
+    for name, stats in report["permissions"].items():
+        print(
+            f"{name:<44} {stats['us_per_object']:>6.2f} "
+            f"{stats['queries_per_object']:>10.2f}"
+        )
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """
+    Prints the change of every measurement against the baseline, returns
+    the ones which got worse: timings by more than threshold, counts at all
+    """
+    regressions = []
+    print(f"\n{'measurement':<64} {'baseline':>10} {'now':>10} {'change':>8}")
+    for section, metric, higher_is_better, exact in METRICS:
+        previous_section = baseline.get(section, {})
+        for name, stats in report[section].items():
+            label = f"{section}: {name} {metric}"
+            previous = previous_section.get(name)
+            if previous is None:
+                print(f"{label:<64} new")
+                continue
+            value, before = stats[metric], previous[metric]
+            change = (value - before) / before if before else 0.0
+            worse = value < before if higher_is_better else value > before
+            if exact:
+                regressed = worse
+            else:
+                regressed = worse and abs(change) > threshold
+            if regressed:
+                regressions.append(label)
+            print(
+                f"{label:<64} {before:>10.2f} {value:>10.2f} {change:>+8.1%}"
+                + ("  REGRESSION" if regressed else "")
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--users", type=int, default=500, help="Size of the generated dataset"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--rows", type=int, default=100, help="Instances serialized and checked"
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="Best of N runs")
+    parser.add_argument(
+        "--baseline", default=str(BASELINE), help="JSON baseline to read or write"
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="Write the run as the new baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.20,
+        help="Relative slowdown of a timing counted as a regression",
+    )
+    options = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "social_media_api.settings")
+    django.setup()
+
+    report = run(options)
+    print_report(report)
+
+    baseline_path = Path(options.baseline)
+    if options.save:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        return 0
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path}, run with --save first")
+        return 0
+    baseline = json.loads(baseline_path.read_text())
+    if baseline["database"] != report["database"]:
+        print(f"\nWarning: the baseline was recorded on {baseline['database']}")
+    regressions = compare(report, baseline, options.threshold)
+    if regressions:
+        print("\nRegressed:\n  " + "\n  ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+import statistics
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    index = min(int(len(values) * fraction), len(values) - 1)
+    return values[index]
+
+
+def latency_summary(latencies: list) -> dict:
+    """Mean and percentiles of latencies in seconds, reported in ms"""
+    if not latencies:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    return {
+        "mean": statistics.mean(latencies) * 1000,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+    }
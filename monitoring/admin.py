@@ -0,0 +1,104 @@
+from django.contrib import admin
+from django.utils.html import format_html, format_html_join
+
+from monitoring.models import RequestProfile, SlowQuery
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Captured profiles, slowest first"""
+
+    list_display = (
+        "route",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "query_count",
+        "query_ms",
+        "created_at",
+    )
+    list_filter = ("route", "method", "status_code")
+    search_fields = ("path",)
+    list_select_related = ("user",)
+    date_hierarchy = "created_at"
+    exclude = ("stats", "sql_timeline")
+    readonly_fields = (
+        "method",
+        "path",
+        "route",
+        "status_code",
+        "user",
+        "duration_ms",
+        "query_count",
+        "query_ms",
+        "created_at",
+        "profile",
+        "timeline",
+    )
+
+    def get_queryset(self, request):
+        # the compressed payloads are only needed on the change page
+        queryset = super().get_queryset(request)
+        if request.resolver_match.url_name.endswith("changelist"):
+            queryset = queryset.defer("stats", "sql_timeline")
+        return queryset
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Duration (ms)", ordering="duration")
+    def duration_ms(self, obj):
+        return round(obj.duration * 1000, 1)
+
+    @admin.display(description="SQL (ms)", ordering="query_duration")
+    def query_ms(self, obj):
+        return round(obj.query_duration * 1000, 1)
+
+    @admin.display(description="Profile")
+    def profile(self, obj):
+        return format_html("<pre>{}</pre>", obj.report())
+
+    @admin.display(description="SQL timeline")
+    def timeline(self, obj):
+        rows = format_html_join(
+            "\n",
+            "{}  +{}  {}",
+            (
+                (f"{offset * 1000:9.2f} ms", f"{duration * 1000:7.2f} ms", sql)
+                for offset, duration, sql in obj.timeline()
+            ),
+        )
+        return format_html("<pre>{}</pre>", rows)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = (
+        "fingerprint",
+        "database",
+        "count",
+        "total_duration",
+        "max_duration",
+        "last_seen",
+    )
+    list_filter = ("database",)
+    search_fields = ("fingerprint",)
+    readonly_fields = (
+        "fingerprint",
+        "sample",
+        "database",
+        "count",
+        "total_duration",
+        "max_duration",
+        "plan",
+        "first_seen",
+        "last_seen",
+    )
+    exclude = ("digest",)
+
+    def has_add_permission(self, request):
+        return False
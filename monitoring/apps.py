@@ -0,0 +1,24 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "monitoring"
+
+    def ready(self):
+        from celery.signals import task_postrun
+        from django.core.signals import request_finished
+        from django.db.backends.signals import connection_created
+        from prometheus_client import REGISTRY
+
+        from monitoring import queries, slow_queries
+        from monitoring import task_metrics  # noqa: F401 connects the signals
+        from monitoring.metrics import ScheduledPostCollector
+        from social_media_api.db_pool import PoolStatsCollector
+
+        REGISTRY.register(PoolStatsCollector())
+        REGISTRY.register(ScheduledPostCollector())
+        connection_created.connect(slow_queries.install)
+        connection_created.connect(queries.install)
+        request_finished.connect(slow_queries.flush)
+        task_postrun.connect(slow_queries.flush)
@@ -0,0 +1,46 @@
+"""
+Cache backends counting hits and misses into the cache_requests metric.
+
+Lookups through get(), get_many() and everything built on them, including
+the async variants and get_or_set(), are counted.
+"""
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from monitoring.metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    metrics_name = None
+
+    def _count(self, hits: int, misses: int) -> None:
+        if hits:
+            CACHE_REQUESTS.labels(self.metrics_name, "hit").inc(hits)
+        if misses:
+            CACHE_REQUESTS.labels(self.metrics_name, "miss").inc(misses)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            self._count(0, 1)
+            return default
+        self._count(1, 0)
+        return value
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    # get_many() of the base backend goes through get()
+    metrics_name = "locmem"
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    metrics_name = "redis"
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version)
+        self._count(len(values), len(keys) - len(values))
+        return values
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = "Lists recorded slow queries by total time, or shows the plan of one"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "id",
+            nargs="?",
+            type=int,
+            help="Show the sample statement and plan of this slow query",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="How many slow queries to list",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Forget every recorded slow query",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(f"Removed {deleted} slow queries")
+            return
+
+        if options["id"] is not None:
+            try:
+                query = SlowQuery.objects.get(id=options["id"])
+            except SlowQuery.DoesNotExist:
+                raise CommandError(f"Slow query {options['id']} does not exist")
+            self.stdout.write(query.sample)
+            self.stdout.write("")
+            self.stdout.write(query.plan or "No plan captured")
+            return
+
+        for query in SlowQuery.objects.all()[: options["limit"]]:
+            self.stdout.write(
+                f"{query.id:>5}  {query.count:>7}x  "
+                f"total {query.total_duration * 1000:>10.1f} ms  "
+                f"avg {query.average_duration * 1000:>8.1f} ms  "
+                f"max {query.max_duration * 1000:>8.1f} ms  "
+                f"{query.fingerprint[:120]}"
+            )
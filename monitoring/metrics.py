@@ -0,0 +1,132 @@
+"""
+Prometheus metrics of the API and the Celery workers.
+
+Requests are labelled by their resolved URL name rather than the path, so
+the number of series stays fixed however many posts and users exist. Run
+several workers with PROMETHEUS_MULTIPROC_DIR set to aggregate their
+samples in /metrics.
+"""
+
+import os
+
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent serving a request",
+    ["route", "method", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements run per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL per request",
+    ["route"],
+)
+THROTTLED_REQUESTS = Counter(
+    "http_throttled_requests",
+    "Requests rejected by a throttle",
+    ["route"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests",
+    "Cache lookups by result",
+    ["cache", "result"],
+)
+TASK_RUNTIME = Histogram(
+    "celery_task_duration_seconds",
+    "Time spent running a Celery task",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1800),
+)
+TASK_QUEUE_LATENCY = Histogram(
+    "celery_task_queue_latency_seconds",
+    "Time a task waited for a worker after it was due",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1800),
+)
+
+
+def route_name(request) -> str:
+    """URL name of the view which served the request"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name
+
+
+class ScheduledPostCollector:
+    """Backlog of scheduled posts waiting for publish_scheduled_posts"""
+
+    def describe(self):
+        return self.families()
+
+    def families(self):
+        return (
+            GaugeMetricFamily(
+                "scheduled_posts_pending",
+                "Scheduled posts waiting to be published",
+            ),
+            GaugeMetricFamily(
+                "scheduled_posts_overdue",
+                "Scheduled posts past their publish time",
+            ),
+            GaugeMetricFamily(
+                "scheduled_posts_lag_seconds",
+                "Age of the oldest scheduled post past its publish time",
+            ),
+            GaugeMetricFamily(
+                "scheduled_posts_failed",
+                "Scheduled posts given up after repeated failed attempts",
+            ),
+        )
+
+    def collect(self):
+        from post.models import ScheduledPost
+
+        now = timezone.now()
+        waiting = ~Q(status=ScheduledPost.Status.FAILED)
+        backlog = ScheduledPost.objects.aggregate(
+            pending=Count("id", filter=waiting),
+            overdue=Count("id", filter=waiting & Q(publish_at__lte=now)),
+            oldest=Min("publish_at", filter=waiting),
+            failed=Count("id", filter=~waiting),
+        )
+        lag = 0
+        if backlog["oldest"] is not None and backlog["oldest"] < now:
+            lag = (now - backlog["oldest"]).total_seconds()
+
+        pending, overdue, lag_seconds, failed = self.families()
+        pending.add_metric([], backlog["pending"])
+        overdue.add_metric([], backlog["overdue"])
+        lag_seconds.add_metric([], lag)
+        failed.add_metric([], backlog["failed"])
+        yield pending
+        yield overdue
+        yield lag_seconds
+        yield failed
+
+
+def metrics_registry():
+    """
+    The process registry, or one merging the samples of every process when
+    PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+
+    from social_media_api.db_pool import PoolStatsCollector
+
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    registry.register(PoolStatsCollector())
+    registry.register(ScheduledPostCollector())
+    return registry
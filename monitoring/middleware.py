@@ -0,0 +1,184 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from monitoring.metrics import (
+    REQUEST_DB_TIME,
+    REQUEST_LATENCY,
+    REQUEST_QUERIES,
+    THROTTLED_REQUESTS,
+    route_name,
+)
+from monitoring.profiling import profile_request, should_profile
+from monitoring.queries import (
+    QueryRecorder,
+    get_query_budget,
+    get_view_action,
+    recording,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInspectorMiddleware:
+    """
+    Counts and fingerprints SQL per request and reports N+1 patterns, on
+    the share of requests set by QUERY_INSPECTOR_SAMPLE_RATE
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_inspect():
+            return self.get_response(request)
+
+        recorder = request.query_recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        self.report(request, response, recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_inspect():
+            return await self.get_response(request)
+
+        # connections are per thread and the ORM runs in sync_to_async
+        # threads, so the recorder travels in the context instead
+        recorder = request.query_recorder = QueryRecorder()
+        with recording(recorder):
+            response = await self.get_response(request)
+
+        self.report(request, response, recorder)
+        return response
+
+    @staticmethod
+    def should_inspect() -> bool:
+        return random.random() < settings.QUERY_INSPECTOR_SAMPLE_RATE
+
+    @staticmethod
+    def query_budget(request):
+        """Budget declared by the view that handled the request, if any"""
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return None
+        view_class = getattr(match.func, "cls", None)
+        action = get_view_action(match.func, request.method)
+        return get_query_budget(view_class, action)
+
+    @classmethod
+    def report(cls, request, response, recorder: QueryRecorder) -> None:
+        duplicates = recorder.duplicates()
+        budget = cls.query_budget(request)
+
+        if duplicates:
+            logger.warning(
+                "Possible N+1 on %s %s: %s",
+                request.method,
+                request.path,
+                "; ".join(f"{count}x {sql}" for sql, count in duplicates.items()),
+            )
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                "Query budget exceeded on %s %s: %d queries, budget %d",
+                request.method,
+                request.path,
+                recorder.count,
+                budget,
+            )
+        logger.debug(
+            "%s %s ran %d queries in %.2f ms",
+            request.method,
+            request.path,
+            recorder.count,
+            recorder.duration * 1000,
+        )
+
+        if getattr(settings, "QUERY_INSPECTOR_HEADERS", settings.DEBUG):
+            response["X-Query-Count"] = recorder.count
+            response["X-Query-Time-Ms"] = f"{recorder.duration * 1000:.2f}"
+            response["X-Query-Duplicates"] = sum(duplicates.values())
+            if budget is not None:
+                response["X-Query-Budget"] = budget
+
+
+class MetricsMiddleware:
+    """
+    Observes latency per route, and the SQL recorded by
+    QueryInspectorMiddleware when it runs further down the chain
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def observe(request, response, duration: float) -> None:
+        route = route_name(request)
+        REQUEST_LATENCY.labels(route, request.method, response.status_code).observe(
+            duration
+        )
+        if response.status_code == 429:
+            THROTTLED_REQUESTS.labels(route).inc()
+
+        recorder = getattr(request, "query_recorder", None)
+        if recorder is not None:
+            REQUEST_QUERIES.labels(route).observe(recorder.count)
+            REQUEST_DB_TIME.labels(route).observe(recorder.duration)
+
+
+class ProfilingMiddleware:
+    """
+    Stores a cProfile profile and SQL timeline of sampled requests, see
+    monitoring/profiling.py. Requests served by async views are passed
+    through, their time is spent awaiting rather than in Python frames.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+        if not should_profile(request):
+            return self.get_response(request)
+        return profile_request(self.get_response, request)
@@ -0,0 +1,62 @@
+# Generated by Django 5.0.3 on 2026-10-19 16:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("method", models.CharField(max_length=8)),
+                ("path", models.CharField(max_length=2048)),
+                ("route", models.CharField(max_length=255)),
+                ("status_code", models.PositiveSmallIntegerField()),
+                ("duration", models.FloatField(help_text="Seconds")),
+                ("query_count", models.PositiveIntegerField()),
+                ("query_duration", models.FloatField(help_text="Seconds")),
+                ("stats", models.BinaryField()),
+                ("sql_timeline", models.BinaryField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-duration",),
+                "indexes": [
+                    models.Index(
+                        fields=["-duration"], name="request_profile_slowest_idx"
+                    ),
+                    models.Index(
+                        fields=["created_at"], name="request_profile_created_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
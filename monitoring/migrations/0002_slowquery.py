@@ -0,0 +1,41 @@
+# Generated by Django 5.0.3 on 2026-10-19 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitoring", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.CharField(max_length=40, unique=True)),
+                ("fingerprint", models.TextField()),
+                ("sample", models.TextField(help_text="The first statement seen")),
+                ("database", models.CharField(max_length=64)),
+                ("count", models.PositiveIntegerField(default=1)),
+                ("total_duration", models.FloatField(help_text="Seconds")),
+                ("max_duration", models.FloatField(help_text="Seconds")),
+                ("plan", models.TextField(blank=True)),
+                ("first_seen", models.DateTimeField(auto_now_add=True)),
+                ("last_seen", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "slow queries",
+                "ordering": ("-total_duration",),
+            },
+        ),
+    ]
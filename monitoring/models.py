@@ -0,0 +1,76 @@
+import json
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+from monitoring.profiling import render_stats
+
+
+class RequestProfile(models.Model):
+    """
+    cProfile stats and SQL timeline of a sampled request, both stored
+    zlib-compressed
+    """
+
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=2048)
+    route = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+    duration = models.FloatField(help_text="Seconds")
+    query_count = models.PositiveIntegerField()
+    query_duration = models.FloatField(help_text="Seconds")
+    stats = models.BinaryField()
+    sql_timeline = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-duration",)
+        indexes = [
+            models.Index(fields=["-duration"], name="request_profile_slowest_idx"),
+            models.Index(fields=["created_at"], name="request_profile_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path} ({self.duration * 1000:.0f} ms)"
+
+    def timeline(self) -> list:
+        """(offset, duration, sql) of every statement, in seconds"""
+        return json.loads(zlib.decompress(self.sql_timeline))
+
+    def report(self, limit: int = 40) -> str:
+        """The slowest functions by cumulative time"""
+        return render_stats(zlib.decompress(self.stats), limit)
+
+
+class SlowQuery(models.Model):
+    """Statements above SLOW_QUERY_THRESHOLD_MS, grouped by fingerprint"""
+
+    digest = models.CharField(max_length=40, unique=True)
+    fingerprint = models.TextField()
+    sample = models.TextField(help_text="The first statement seen")
+    database = models.CharField(max_length=64)
+    count = models.PositiveIntegerField(default=1)
+    total_duration = models.FloatField(help_text="Seconds")
+    max_duration = models.FloatField(help_text="Seconds")
+    plan = models.TextField(blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("-total_duration",)
+        verbose_name_plural = "slow queries"
+
+    def __str__(self) -> str:
+        return self.fingerprint[:80]
+
+    @property
+    def average_duration(self) -> float:
+        return self.total_duration / self.count
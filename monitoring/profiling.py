@@ -0,0 +1,126 @@
+"""
+Opt-in cProfile sampling of production requests.
+
+A fraction of requests (PROFILING_SAMPLE_RATE) is profiled, as are requests
+sent by staff with the PROFILING_HEADER header. Requests that are not
+sampled cost one random() call.
+"""
+
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import random
+import time
+import zlib
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from monitoring.metrics import route_name
+from monitoring.queries import QueryRecorder
+
+
+class TimelineRecorder(QueryRecorder):
+    """Also records when each statement started, relative to the request"""
+
+    def __init__(self):
+        super().__init__()
+        self.started = time.perf_counter()
+        self.timeline = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return super().__call__(execute, sql, params, many, context)
+        finally:
+            self.timeline.append(
+                (start - self.started, time.perf_counter() - start, sql)
+            )
+
+
+def _is_staff(request) -> bool:
+    if request.user.is_authenticated:
+        return request.user.is_staff
+    # token users are unknown until DRF authenticates them in the view
+    drf_request = Request(
+        request,
+        authenticators=[
+            authenticator()
+            for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    try:
+        return drf_request.user.is_staff
+    except AuthenticationFailed:
+        return False
+
+
+def should_profile(request) -> bool:
+    if random.random() < settings.PROFILING_SAMPLE_RATE:
+        return True
+    return settings.PROFILING_HEADER in request.headers and _is_staff(request)
+
+
+class _LoadedStats:
+    """Stands in for a Profile so pstats can read marshalled stats"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def render_stats(data: bytes, limit: int) -> str:
+    output = io.StringIO()
+    stats = pstats.Stats(_LoadedStats(marshal.loads(data)), stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return output.getvalue()
+
+
+def save_profile(request, response, profiler, recorder, duration) -> None:
+    from monitoring.models import RequestProfile
+
+    profiler.create_stats()
+    user = getattr(request, "user", None)
+    RequestProfile.objects.create(
+        method=request.method,
+        path=request.get_full_path()[:2048],
+        route=route_name(request),
+        status_code=response.status_code,
+        user=user if user is not None and user.is_authenticated else None,
+        duration=duration,
+        query_count=recorder.count,
+        query_duration=recorder.duration,
+        stats=zlib.compress(marshal.dumps(profiler.stats)),
+        sql_timeline=zlib.compress(json.dumps(recorder.timeline).encode()),
+    )
+
+
+def profile_request(get_response, request):
+    """Runs the request under cProfile and the SQL timeline recorder"""
+    profiler = cProfile.Profile()
+    recorder = TimelineRecorder()
+    try:
+        profiler.enable()
+    except ValueError:
+        # another profiler is active in this thread
+        return get_response(request)
+
+    start = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = get_response(request)
+    finally:
+        profiler.disable()
+
+    save_profile(request, response, profiler, recorder, time.perf_counter() - start)
+    return response
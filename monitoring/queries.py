@@ -0,0 +1,110 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRANSACTION_RE = re.compile(
+    r"^\s*(SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)\b", re.IGNORECASE
+)
+
+
+def fingerprint(sql: str) -> str:
+    """Returns the SQL statement with literals and placeholders normalized"""
+    sql = _STRING_RE.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_LIST_RE.sub("(...)", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+def duplicate_threshold() -> int:
+    return getattr(settings, "QUERY_INSPECTOR_DUPLICATE_THRESHOLD", 3)
+
+
+def find_duplicates(statements, threshold: int = None) -> dict:
+    """Returns fingerprints repeated at least `threshold` times with their counts"""
+    if threshold is None:
+        threshold = duplicate_threshold()
+
+    counts = Counter(
+        fingerprint(sql) for sql in statements if not _TRANSACTION_RE.match(sql)
+    )
+    return {sql: count for sql, count in counts.items() if count >= threshold}
+
+
+class QueryRecorder:
+    """Execute wrapper which records every statement run on a connection"""
+
+    def __init__(self):
+        self.statements = []
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.statements.append(sql)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def duplicates(self, threshold: int = None) -> dict:
+        return find_duplicates(self.statements, threshold)
+
+
+# recorder of the async request being served; sync_to_async copies the
+# context into the worker thread whose connection runs the ORM queries
+_active_recorder = ContextVar("active_query_recorder", default=None)
+
+
+class ActiveRecorderWrapper:
+    """Execute wrapper forwarding statements to the active request's recorder"""
+
+    def __call__(self, execute, sql, params, many, context):
+        recorder = _active_recorder.get()
+        if recorder is None:
+            return execute(sql, params, many, context)
+        return recorder(execute, sql, params, many, context)
+
+
+active_recorder_wrapper = ActiveRecorderWrapper()
+
+
+def install(connection, **kwargs) -> None:
+    """connection_created receiver, see monitoring.slow_queries.install"""
+    if active_recorder_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, active_recorder_wrapper)
+
+
+@contextmanager
+def recording(recorder: QueryRecorder):
+    """Records the statements of every thread the current context runs in"""
+    token = _active_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _active_recorder.reset(token)
+
+
+def get_view_action(view_func, method: str):
+    """Returns the viewset action or the handler name serving the request"""
+    actions = getattr(view_func, "actions", None)
+    if actions:
+        return actions.get(method.lower())
+    return method.lower()
+
+
+def get_query_budget(view_class, action):
+    """Returns the query budget declared on the view for specified action"""
+    budgets = getattr(view_class, "query_budgets", None) or {}
+    return budgets.get(action)
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+
+from monitoring.models import SlowQuery
+
+
+class SlowQuerySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SlowQuery
+        fields = (
+            "id",
+            "fingerprint",
+            "database",
+            "count",
+            "total_duration",
+            "average_duration",
+            "max_duration",
+            "first_seen",
+            "last_seen",
+        )
+
+
+class SlowQueryDetailSerializer(SlowQuerySerializer):
+    class Meta(SlowQuerySerializer.Meta):
+        fields = SlowQuerySerializer.Meta.fields + ("sample", "plan")
@@ -0,0 +1,178 @@
+"""
+Recorder of slow SQL statements.
+
+Installed as an execute wrapper on every database connection. A statement
+running longer than SLOW_QUERY_THRESHOLD_MS is fingerprinted and queued on
+its connection; the queue is written to SlowQuery once the request or
+Celery task finishes, outside of its transactions. On the first sighting
+of a fingerprint its plan is captured with EXPLAIN (ANALYZE, BUFFERS)
+inside a savepoint which is always rolled back, so explaining a write
+leaves no trace.
+"""
+
+import hashlib
+import logging
+import re
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from monitoring.queries import fingerprint
+
+logger = logging.getLogger(__name__)
+
+_EXPLAINABLE_RE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.I)
+
+# set while slow queries are being written, so their statements aren't
+_recording = ContextVar("recording_slow_queries", default=False)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class SlowStatement:
+    """Sightings of one fingerprint not yet written to SlowQuery"""
+
+    def __init__(self, sql_fingerprint, sql, params, sample):
+        self.fingerprint = sql_fingerprint
+        self.digest = hashlib.sha1(sql_fingerprint.encode()).hexdigest()
+        self.sql = sql
+        self.params = params
+        self.sample = sample
+        self.count = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+
+
+def explain(connection, sql: str, params) -> str:
+    """Plan of the statement, executed and rolled back where supported"""
+    if connection.vendor == "postgresql":
+        explain_sql = f"EXPLAIN (ANALYZE, BUFFERS) {sql}"
+    else:
+        explain_sql = f"EXPLAIN QUERY PLAN {sql}"
+
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                if connection.vendor == "postgresql":
+                    cursor.execute(
+                        "SET LOCAL statement_timeout = %s",
+                        [settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS],
+                    )
+                cursor.execute(explain_sql, params)
+                rows = cursor.fetchall()
+            raise _Rollback
+    except _Rollback:
+        pass
+    except DatabaseError as error:
+        return f"EXPLAIN failed: {error}"
+    return "\n".join(" ".join(str(column) for column in row) for row in rows)
+
+
+def save(connection, statement: SlowStatement) -> None:
+    from monitoring.models import SlowQuery
+
+    updated = SlowQuery.objects.filter(digest=statement.digest).update(
+        count=F("count") + statement.count,
+        total_duration=F("total_duration") + statement.total_duration,
+        max_duration=Greatest("max_duration", statement.max_duration),
+        last_seen=timezone.now(),
+    )
+    if updated:
+        return
+
+    plan = ""
+    if _EXPLAINABLE_RE.match(statement.sql):
+        plan = explain(connection, statement.sql, statement.params)
+    SlowQuery.objects.get_or_create(
+        digest=statement.digest,
+        defaults={
+            "fingerprint": statement.fingerprint,
+            "sample": statement.sample,
+            "database": connection.alias,
+            "count": statement.count,
+            "total_duration": statement.total_duration,
+            "max_duration": statement.max_duration,
+            "plan": plan,
+        },
+    )
+
+
+def flush(**kwargs) -> None:
+    """
+    Writes the slow statements queued on this thread's connections.
+    Receiver of request_finished and task_postrun, call it at the end of
+    commands which should record their slow queries as well.
+    """
+    token = _recording.set(True)
+    try:
+        for connection in connections.all(initialized_only=True):
+            pending = getattr(connection, "slow_statements", None)
+            if not pending:
+                continue
+            connection.slow_statements = {}
+            for statement in pending.values():
+                try:
+                    save(connection, statement)
+                except DatabaseError as error:
+                    logger.warning("Could not record slow query: %s", error)
+    finally:
+        _recording.reset(token)
+
+
+class SlowQueryRecorder:
+    """Execute wrapper timing statements against SLOW_QUERY_THRESHOLD_MS"""
+
+    max_pending = 100
+
+    def __call__(self, execute, sql, params, many, context):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is None or many or _recording.get():
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration * 1000 >= threshold:
+            self.queue(context["cursor"], sql, params, duration)
+        return result
+
+    def queue(self, cursor, sql, params, duration: float) -> None:
+        connection = cursor.db
+        if not hasattr(connection, "slow_statements"):
+            connection.slow_statements = {}
+        pending = connection.slow_statements
+
+        sql_fingerprint = fingerprint(sql)
+        statement = pending.get(sql_fingerprint)
+        if statement is None:
+            if len(pending) >= self.max_pending:
+                return
+            sample = connection.ops.last_executed_query(cursor.cursor, sql, params)
+            statement = pending[sql_fingerprint] = SlowStatement(
+                sql_fingerprint, sql, params, sample
+            )
+        statement.add(duration)
+
+
+recorder = SlowQueryRecorder()
+
+
+def install(connection, **kwargs) -> None:
+    """
+    connection_created receiver. The recorder goes first, so that wrappers
+    pushed and popped by execute_wrapper() around it stay balanced.
+    """
+    if recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, recorder)
@@ -0,0 +1,70 @@
+"""
+Celery signal handlers feeding the task metrics.
+
+The publisher stamps every message with its publish time, the worker
+reports how long the task waited after it was due (its ETA, if it has
+one) and how long it ran.
+"""
+
+import time
+from datetime import datetime
+
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_ready,
+)
+from django.conf import settings
+
+from monitoring.metrics import TASK_QUEUE_LATENCY, TASK_RUNTIME, metrics_registry
+
+PUBLISHED_AT_HEADER = "published_at"
+
+_started = {}
+
+
+def due_timestamp(request):
+    """Time the task could run at the earliest, None for unstamped messages"""
+    published_at = request.get(PUBLISHED_AT_HEADER)
+    if published_at is None:
+        return None
+    eta = request.get("eta")
+    if eta:
+        if isinstance(eta, str):
+            eta = datetime.fromisoformat(eta)
+        return max(published_at, eta.timestamp())
+    return published_at
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, task=None, **kwargs):
+    now = time.time()
+    _started[task_id] = time.perf_counter()
+    due = due_timestamp(task.request)
+    if due is not None:
+        TASK_QUEUE_LATENCY.labels(task.name).observe(max(now - due, 0))
+
+
+@task_postrun.connect
+def observe_task_runtime(task_id=None, task=None, state=None, **kwargs):
+    start = _started.pop(task_id, None)
+    if start is not None:
+        TASK_RUNTIME.labels(task.name, state or "UNKNOWN").observe(
+            time.perf_counter() - start
+        )
+
+
+@worker_ready.connect
+def serve_worker_metrics(**kwargs):
+    """Exposes the worker metrics on CELERY_METRICS_PORT, if it's set"""
+    if settings.CELERY_METRICS_PORT:
+        from prometheus_client import start_http_server
+
+        start_http_server(settings.CELERY_METRICS_PORT, registry=metrics_registry())
@@ -0,0 +1,14 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from monitoring.models import RequestProfile
+
+
+@shared_task
+def remove_old_request_profiles() -> int:
+    cutoff = timezone.now() - timedelta(days=settings.PROFILING_RETENTION_DAYS)
+    deleted, _ = RequestProfile.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
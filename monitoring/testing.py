@@ -0,0 +1,48 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from monitoring.queries import find_duplicates, get_query_budget
+
+
+class _AssertQueryBudgetContext(CaptureQueriesContext):
+    def __init__(self, test_case, budget, connection, allow_duplicates):
+        self.test_case = test_case
+        self.budget = budget
+        self.allow_duplicates = allow_duplicates
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+
+        statements = [query["sql"] for query in self.captured_queries]
+        duplicates = find_duplicates(statements)
+        details = "\n".join(
+            f"{count}x {sql}" for sql, count in duplicates.items()
+        )
+
+        self.test_case.assertLessEqual(
+            len(self),
+            self.budget,
+            f"{len(self)} queries executed, budget is {self.budget}\n"
+            + "\n".join(statements),
+        )
+        if not self.allow_duplicates:
+            self.test_case.assertFalse(
+                duplicates, f"Repeated queries (possible N+1):\n{details}"
+            )
+
+
+class QueryBudgetTestMixin:
+    """Adds assertions for the query budgets declared on views"""
+
+    def assertWithinQueryBudget(
+        self, view_class, action, using=DEFAULT_DB_ALIAS, allow_duplicates=True
+    ):
+        budget = get_query_budget(view_class, action)
+        if budget is None:
+            self.fail(f"{view_class.__name__} declares no query budget for {action}")
+        return _AssertQueryBudgetContext(
+            self, budget, connections[using], allow_duplicates
+        )
@@ -0,0 +1,135 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from rest_framework.throttling import UserRateThrottle
+
+from monitoring.task_metrics import due_timestamp
+from post.models import ScheduledPost
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+
+    @override_settings(QUERY_INSPECTOR_SAMPLE_RATE=1)
+    def test_requests_are_labelled_by_route(self):
+        labels = {"route": "post:post-list", "method": "GET", "status": "200"}
+        before = sample("http_request_duration_seconds_count", **labels)
+        queries_before = sample("http_request_db_queries_sum", route="post:post-list")
+
+        self.client.get(reverse("post:post-list"))
+        self.client.get(reverse("post:post-list") + "?page=1")
+
+        self.assertEqual(
+            sample("http_request_duration_seconds_count", **labels), before + 2
+        )
+        self.assertGreater(
+            sample("http_request_db_queries_sum", route="post:post-list"),
+            queries_before,
+        )
+
+    def test_throttled_requests_are_counted(self):
+        before = sample("http_throttled_requests_total", route="post:post-list")
+
+        with mock.patch.object(
+            UserRateThrottle, "THROTTLE_RATES", {"user": "1/minute"}
+        ):
+            cache.clear()
+            self.client.get(reverse("post:post-list"))
+            res = self.client.get(reverse("post:post-list"))
+
+        self.assertEqual(res.status_code, 429)
+        self.assertEqual(
+            sample("http_throttled_requests_total", route="post:post-list"),
+            before + 1,
+        )
+
+
+class CacheMetricsTests(TestCase):
+    def test_hits_and_misses_are_counted(self):
+        hits = sample("cache_requests_total", cache="locmem", result="hit")
+        misses = sample("cache_requests_total", cache="locmem", result="miss")
+
+        cache.set("metrics:present", 1)
+        cache.get("metrics:present")
+        cache.get("metrics:absent")
+        cache.get_many(["metrics:present", "metrics:absent"])
+
+        self.assertEqual(
+            sample("cache_requests_total", cache="locmem", result="hit"), hits + 2
+        )
+        self.assertEqual(
+            sample("cache_requests_total", cache="locmem", result="miss"),
+            misses + 2,
+        )
+
+    def test_default_is_returned_on_miss(self):
+        self.assertEqual(cache.get("metrics:absent", "default"), "default")
+
+
+class MetricsEndpointTests(TestCase):
+    def test_exposition(self):
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        ScheduledPost.objects.create(
+            creator=user,
+            title="Late",
+            publish_at=timezone.now() - timedelta(minutes=5),
+        )
+        ScheduledPost.objects.create(
+            creator=user,
+            title="Future",
+            publish_at=timezone.now() + timedelta(hours=1),
+        )
+        ScheduledPost.objects.create(
+            creator=user,
+            title="Failed",
+            publish_at=timezone.now() - timedelta(days=1),
+            status=ScheduledPost.Status.FAILED,
+        )
+
+        res = self.client.get(reverse("metrics"))
+
+        self.assertEqual(res.status_code, 200)
+        body = res.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn("scheduled_posts_pending 2.0", body)
+        self.assertIn("scheduled_posts_overdue 1.0", body)
+        self.assertIn("scheduled_posts_failed 1.0", body)
+        self.assertGreaterEqual(
+            REGISTRY.get_sample_value("scheduled_posts_lag_seconds"), 300
+        )
+        self.assertLess(REGISTRY.get_sample_value("scheduled_posts_lag_seconds"), 3600)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_required(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 401)
+
+        res = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+
+        self.assertEqual(res.status_code, 200)
+
+
+class TaskMetricsTests(TestCase):
+    def test_due_timestamp(self):
+        self.assertIsNone(due_timestamp({}))
+        self.assertEqual(due_timestamp({"published_at": 100.0}), 100.0)
+
+        eta = timezone.now() + timedelta(minutes=1)
+        request = SimpleNamespace(published_at=100.0, eta=eta.isoformat())
+        request.get = lambda key, default=None: getattr(request, key, default)
+
+        self.assertEqual(due_timestamp(request), eta.timestamp())
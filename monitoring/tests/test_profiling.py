@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from monitoring.models import RequestProfile
+from monitoring.tasks import remove_old_request_profiles
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.staff = get_user_model().objects.create_user(
+            "staff@test.com", "testpass", is_staff=True
+        )
+
+    def authenticate(self, user):
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_requests_not_sampled(self):
+        self.authenticate(self.user)
+
+        self.client.get(reverse("post:post-list"))
+
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_request_stored(self):
+        self.authenticate(self.user)
+
+        self.client.get(reverse("post:post-list"))
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.route, "post:post-list")
+        self.assertEqual(profile.status_code, 200)
+        self.assertEqual(profile.user, self.user)
+        self.assertEqual(profile.query_count, len(profile.timeline()))
+        self.assertTrue(any("post_post" in sql for _, _, sql in profile.timeline()))
+        self.assertIn("cumulative", profile.report())
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_header_honored_for_staff_only(self):
+        self.authenticate(self.user)
+        self.client.get(reverse("post:post-list"), HTTP_X_PROFILE_REQUEST="1")
+        self.assertFalse(RequestProfile.objects.exists())
+
+        self.authenticate(self.staff)
+        self.client.get(reverse("post:post-list"), HTTP_X_PROFILE_REQUEST="1")
+        self.assertEqual(RequestProfile.objects.get().user, self.staff)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_RETENTION_DAYS=0)
+    def test_old_profiles_removed(self):
+        self.client.get(reverse("post:post-list"))
+
+        self.assertEqual(remove_old_request_profiles(), 1)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_admin_lists_and_renders_profiles(self):
+        self.client.force_login(self.staff)
+        self.staff.is_superuser = True
+        self.staff.save()
+        self.client.get(reverse("post:post-list"))
+        profile = RequestProfile.objects.first()
+
+        changelist = self.client.get(
+            reverse("admin:monitoring_requestprofile_changelist")
+        )
+        change = self.client.get(
+            reverse("admin:monitoring_requestprofile_change", args=[profile.id])
+        )
+
+        self.assertContains(changelist, profile.path)
+        self.assertContains(change, "cumulative")
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from monitoring.queries import find_duplicates, fingerprint
+from post.views import PostViewSet
+
+
+class FingerprintTests(TestCase):
+    def test_literals_are_normalized(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM post_post WHERE id = 12 AND title = 'a''b'"),
+            fingerprint("SELECT * FROM post_post WHERE id = 7 AND title = 'c'"),
+        )
+
+    def test_in_lists_are_collapsed(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "post_tag" WHERE "id" IN (1, 2, 3)'),
+            fingerprint('SELECT * FROM "post_tag" WHERE "id" IN (%s)'),
+        )
+
+    def test_identifiers_are_kept(self):
+        self.assertNotEqual(
+            fingerprint('SELECT "t1"."id" FROM "post_post" t1'),
+            fingerprint('SELECT "t2"."id" FROM "post_post" t2'),
+        )
+
+    def test_find_duplicates(self):
+        statements = [f"SELECT * FROM post_tag WHERE id = {i}" for i in range(3)]
+        statements.append("SELECT COUNT(*) FROM post_post")
+
+        duplicates = find_duplicates(statements, threshold=3)
+
+        self.assertEqual(duplicates, {"SELECT * FROM post_tag WHERE id = ?": 3})
+
+
+@override_settings(QUERY_INSPECTOR_HEADERS=True, QUERY_INSPECTOR_SAMPLE_RATE=1)
+class QueryInspectorMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+
+    def test_headers_exposed(self):
+        res = self.client.get(reverse("post:post-list"))
+
+        self.assertIn("X-Query-Count", res)
+        self.assertIn("X-Query-Time-Ms", res)
+        self.assertIn("X-Query-Duplicates", res)
+        self.assertEqual(
+            res["X-Query-Budget"], str(PostViewSet.query_budgets["list"])
+        )
+
+    @override_settings(QUERY_INSPECTOR_HEADERS=False)
+    def test_headers_hidden(self):
+        res = self.client.get(reverse("post:post-list"))
+
+        self.assertNotIn("X-Query-Count", res)
+
+    @override_settings(QUERY_INSPECTOR_SAMPLE_RATE=0)
+    def test_requests_not_sampled_are_not_inspected(self):
+        with patch("monitoring.middleware.QueryRecorder") as recorder:
+            res = self.client.get(reverse("post:post-list"))
+
+        self.assertNotIn("X-Query-Count", res)
+        recorder.assert_not_called()
+
+    async def test_async_route_queries_counted(self):
+        token = await Token.objects.acreate(user=self.user)
+
+        res = await self.async_client.get(
+            reverse("post-async:post-list"),
+            headers={"Authorization": f"Token {token.key}"},
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(int(res["X-Query-Count"]), 0)
@@ -0,0 +1,114 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from monitoring.models import SlowQuery
+from monitoring.slow_queries import flush, recorder
+from post.models import Post, Tag
+
+
+class SlowQueryRecorderTests(TestCase):
+    def tearDown(self):
+        # statements of the assertions are still queued
+        connection.slow_statements = {}
+
+    def test_installed_on_connections(self):
+        self.assertIn(recorder, connection.execute_wrappers)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled(self):
+        list(Post.objects.filter(title__icontains="django"))
+        flush()
+
+        self.assertFalse(SlowQuery.objects.exists())
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_fingerprinted_and_counted(self):
+        list(Post.objects.filter(title__icontains="django"))
+        list(Post.objects.filter(title__icontains="celery"))
+        flush()
+
+        query = SlowQuery.objects.get(fingerprint__contains='FROM "post_post"')
+        self.assertEqual(query.count, 2)
+        self.assertIn("django", query.sample)
+        self.assertNotIn("celery", query.fingerprint)
+        self.assertTrue(query.plan)
+        self.assertGreaterEqual(query.max_duration, 0)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_explained_writes_are_rolled_back(self):
+        Tag.objects.create(name="django")
+        flush()
+
+        query = SlowQuery.objects.get(fingerprint__startswith='INSERT INTO "post_tag"')
+        self.assertTrue(query.plan)
+        self.assertEqual(Tag.objects.count(), 1)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_recorded_after_request(self):
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        client.get(reverse("post:post-list"), {"title": "django"})
+
+        self.assertTrue(SlowQuery.objects.filter(fingerprint__contains="LIKE").exists())
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_command(self):
+        list(Post.objects.filter(title__icontains="django"))
+        flush()
+        query = SlowQuery.objects.get(fingerprint__contains='FROM "post_post"')
+        listing, details = StringIO(), StringIO()
+
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=None):
+            call_command("slow_queries", stdout=listing)
+            call_command("slow_queries", query.id, stdout=details)
+
+        self.assertIn(query.fingerprint[:80], listing.getvalue())
+        self.assertIn(query.plan, details.getvalue())
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+class SlowQueryViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.query = SlowQuery.objects.create(
+            digest="0" * 40,
+            fingerprint="SELECT * FROM post_post WHERE title LIKE ?",
+            sample="SELECT * FROM post_post WHERE title LIKE '%django%'",
+            database="default",
+            total_duration=1.5,
+            max_duration=1.0,
+            count=2,
+            plan="Seq Scan on post_post",
+        )
+
+    def test_staff_only(self):
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(user)
+
+        res = self.client.get(reverse("monitoring:slow-query-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_list_and_plan(self):
+        staff = get_user_model().objects.create_user(
+            "staff@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(staff)
+
+        listing = self.client.get(reverse("monitoring:slow-query-list"))
+        detail = self.client.get(
+            reverse("monitoring:slow-query-detail", args=[self.query.id])
+        )
+
+        self.assertEqual(listing.data["results"][0]["average_duration"], 0.75)
+        self.assertNotIn("plan", listing.data["results"][0])
+        self.assertEqual(detail.data["plan"], "Seq Scan on post_post")
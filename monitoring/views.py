@@ -0,0 +1,54 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from rest_framework import viewsets
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAdminUser
+
+from monitoring.metrics import metrics_registry
+from monitoring.models import SlowQuery
+from monitoring.serializers import SlowQueryDetailSerializer, SlowQuerySerializer
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus exposition of the process metrics, guarded by a bearer
+    token when METRICS_TOKEN is set
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        provided = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(provided.encode(), expected.encode()):
+            return HttpResponse(status=401)
+
+    return HttpResponse(
+        generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+class SlowQueryPagination(PageNumberPagination):
+    page_size = 20
+    max_page_size = 100
+
+
+class SlowQueryViewSet(viewsets.ReadOnlyModelViewSet):
+    """Slow queries recorded by monitoring/slow_queries.py, staff only"""
+
+    queryset = SlowQuery.objects.all()
+    pagination_class = SlowQueryPagination
+    permission_classes = (IsAdminUser,)
+    query_budgets = {"list": 2, "retrieve": 1}
+
+    def get_queryset(self):
+        if self.action == "list":
+            return self.queryset.defer("sample", "plan")
+        return self.queryset
+
+    def get_serializer_class(self):
+        if self.action == "retrieve":
+            return SlowQueryDetailSerializer
+        return SlowQuerySerializer
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from notification.models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("recipient", "verb", "post", "actors_count", "is_read", "updated_at")
+    list_filter = ("verb", "is_read")
+    list_select_related = ("recipient",)
+    raw_id_fields = ("recipient", "post", "last_actor")
@@ -0,0 +1,90 @@
+"""
+Recording of notification events.
+
+Views only push small events to a Redis list once their transaction
+commits. The flush_notifications beat task drains the list in batches and
+writes them aggregated, so a burst of likes on one post costs a single row
+update instead of a row per like.
+"""
+
+import json
+import logging
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from notification.models import Notification
+
+EVENT_QUEUE = "notification:events"
+
+logger = logging.getLogger(__name__)
+
+
+def unread_cache_key(user_id: int) -> str:
+    return f"notification:unread:{user_id}"
+
+
+@lru_cache
+def _client():
+    return redis.Redis.from_url(settings.NOTIFICATION_REDIS_URL)
+
+
+def notify(verb: str, actor_id: int, recipient_id: int, post_id=None) -> None:
+    """Queues an event for the recipient's inbox after the current commit"""
+    if actor_id == recipient_id:
+        return
+    event = {
+        "verb": verb,
+        "actor": actor_id,
+        "recipient": recipient_id,
+        "post": post_id,
+    }
+    transaction.on_commit(lambda: push_event(event))
+
+
+def push_event(event: dict) -> None:
+    if settings.NOTIFICATION_REDIS_URL:
+        try:
+            _client().rpush(EVENT_QUEUE, json.dumps(event))
+        except redis.RedisError:
+            logger.exception("Could not queue %s notification", event["verb"])
+    else:
+        from notification.tasks import deliver_notifications
+
+        deliver_notifications.delay([event])
+
+
+def pop_events(count: int) -> list:
+    events = _client().lpop(EVENT_QUEUE, count) or []
+    return [json.loads(event) for event in events]
+
+
+def requeue_events(events: list) -> None:
+    """Puts popped events back at the head of the queue, in their order"""
+    _client().lpush(EVENT_QUEUE, *[json.dumps(event) for event in reversed(events)])
+
+
+def unread_count(user_id: int) -> int:
+    key = unread_cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            recipient_id=user_id, is_read=False
+        ).count()
+        cache.set(key, count, settings.NOTIFICATION_UNREAD_CACHE_SECONDS)
+    return count
+
+
+def add_unread(user_id: int, count: int) -> None:
+    try:
+        cache.incr(unread_cache_key(user_id), count)
+    except ValueError:
+        # not cached, the next read counts from the database
+        pass
+
+
+def reset_unread(user_id: int) -> None:
+    cache.delete(unread_cache_key(user_id))
@@ -0,0 +1,114 @@
+# Generated by Django 5.0.3 on 2026-10-19 22:00
+
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models, transaction
+from django.db.models import Count
+
+BATCH_SIZE = 10000
+
+
+def merge_unread_duplicates(apps, schema_editor):
+    """
+    Concurrent deliveries could create several unread rows for the same
+    recipient, verb and post. Fold them into the latest one, so the unique
+    constraint can be added, and record the known last actors.
+    """
+    alias = schema_editor.connection.alias
+    Notification = apps.get_model("notification", "Notification")
+    NotificationActor = apps.get_model("notification", "NotificationActor")
+    unread = Notification.objects.using(alias).filter(is_read=False)
+
+    duplicates = list(
+        unread.order_by()
+        .values("recipient_id", "verb", "post_id")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        with transaction.atomic(using=alias):
+            rows = list(
+                unread.select_for_update()
+                .filter(
+                    recipient_id=group["recipient_id"],
+                    verb=group["verb"],
+                    post_id=group["post_id"],
+                )
+                .order_by("-updated_at", "-id")
+            )
+            latest = rows[0]
+            latest.actors_count = sum(row.actors_count for row in rows)
+            latest.save(update_fields=("actors_count",))
+            unread.filter(id__in=[row.id for row in rows[1:]]).delete()
+
+    actors = [
+        NotificationActor(notification_id=row_id, actor_id=actor_id)
+        for row_id, actor_id in unread.filter(last_actor__isnull=False).values_list(
+            "id", "last_actor_id"
+        )
+    ]
+    NotificationActor.objects.using(alias).bulk_create(
+        actors, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("notification", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationActor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "notification",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="actors",
+                        to="notification.notification",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("notification", "actor"),
+                        name="notification_actor_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(merge_unread_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="notification",
+            constraint=models.UniqueConstraint(
+                models.F("recipient"),
+                models.F("verb"),
+                django.db.models.functions.comparison.Coalesce(models.F("post"), 0),
+                condition=models.Q(("is_read", False)),
+                name="notification_unread_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+
+
+class Notification(models.Model):
+    """
+    Inbox entry of a user. Events of the same kind about the same post are
+    aggregated into one unread row, which counts the distinct actors and
+    remembers the latest one.
+    """
+
+    class Verb(models.TextChoices):
+        LIKE = "like", "liked your post"
+        COMMENT = "comment", "commented on your post"
+        FOLLOW = "follow", "started following you"
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="notifications",
+    )
+    verb = models.CharField(max_length=16, choices=Verb.choices)
+    # posts may be partitioned on (id, created_at), so the id alone can't
+    # back a database constraint
+    post = models.ForeignKey(
+        "post.Post",
+        on_delete=models.CASCADE,
+        related_name="notifications",
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
+    last_actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+    )
+    actors_count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("-updated_at", "-id")
+        indexes = (
+            models.Index(
+                fields=("recipient", "is_read", "verb", "post"),
+                name="notification_unread_idx",
+            ),
+            models.Index(
+                fields=("recipient", "-updated_at", "-id"),
+                name="notification_inbox_idx",
+            ),
+        )
+        constraints = (
+            # follows have no post, and NULLs never conflict
+            models.UniqueConstraint(
+                F("recipient"),
+                F("verb"),
+                Coalesce(F("post"), 0),
+                condition=Q(is_read=False),
+                name="notification_unread_uniq",
+            ),
+        )
+
+    @property
+    def message(self) -> str:
+        actor = self.last_actor.username if self.last_actor else "Someone"
+        others = self.actors_count - 1
+        if others == 1:
+            actor = f"{actor} and 1 other"
+        elif others > 1:
+            actor = f"{actor} and {others} others"
+        return f"{actor} {self.get_verb_display()}"
+
+    def __str__(self) -> str:
+        return f"{self.recipient}: {self.message}"
+
+
+class NotificationActor(models.Model):
+    """An actor of an aggregated notification, counted once however often"""
+
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, related_name="actors"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("notification", "actor"), name="notification_actor_uniq"
+            ),
+        )
@@ -0,0 +1,36 @@
+from rest_framework import serializers
+
+from notification.models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    post = serializers.HyperlinkedRelatedField(
+        view_name="post:post-detail",
+        read_only=True,
+    )
+    last_actor = serializers.HyperlinkedRelatedField(
+        view_name="user:manage",
+        read_only=True,
+    )
+
+    class Meta:
+        model = Notification
+        fields = (
+            "id",
+            "verb",
+            "message",
+            "post",
+            "last_actor",
+            "actors_count",
+            "is_read",
+            "created_at",
+            "updated_at",
+        )
+
+
+class NotificationReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        help_text="Notifications to mark as read, all of them when omitted",
+    )
@@ -0,0 +1,114 @@
+from collections import defaultdict
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notification import inbox
+from notification.models import Notification, NotificationActor
+
+
+@shared_task
+def deliver_notifications(events: list) -> None:
+    """
+    Writes a batch of events, aggregating them per recipient, verb and post.
+    Each actor counts once per unread row, however often they repeat the
+    action. The unread rows are unique, so concurrent deliveries create a
+    row once and then take turns updating it.
+    """
+    groups = defaultdict(list)
+    for event in events:
+        if event["actor"] != event["recipient"]:
+            groups[event["recipient"], event["verb"], event["post"]].append(
+                event["actor"]
+            )
+    if not groups:
+        return
+
+    posts = {key[2] for key in groups}
+    same_post = Q(post_id__in=posts - {None})
+    if None in posts:
+        same_post |= Q(post__isnull=True)
+
+    new_unread = defaultdict(int)
+    with transaction.atomic():
+        # rows without actors, a concurrent delivery may create some first
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    recipient_id=recipient_id,
+                    verb=verb,
+                    post_id=post_id,
+                    actors_count=0,
+                )
+                for recipient_id, verb, post_id in groups
+            ],
+            ignore_conflicts=True,
+        )
+        rows = {
+            (row.recipient_id, row.verb, row.post_id): row
+            for row in Notification.objects.select_for_update().filter(
+                same_post,
+                recipient_id__in={key[0] for key in groups},
+                verb__in={key[1] for key in groups},
+                is_read=False,
+            )
+        }
+        known = set(
+            NotificationActor.objects.filter(
+                notification__in=[rows[key] for key in groups],
+                actor_id__in={actor for actors in groups.values() for actor in actors},
+            ).values_list("notification_id", "actor_id")
+        )
+
+        now = timezone.now()
+        new_actors, updated = [], []
+        for key, actors in groups.items():
+            row = rows[key]
+            added = [
+                actor
+                for actor in dict.fromkeys(actors)
+                if (row.id, actor) not in known
+            ]
+            if not added:
+                continue
+            if not row.actors_count:
+                # still without actors, so created by this delivery
+                new_unread[row.recipient_id] += 1
+            new_actors.extend(
+                NotificationActor(notification_id=row.id, actor_id=actor)
+                for actor in added
+            )
+            row.last_actor_id = actors[-1]
+            row.actors_count += len(added)
+            row.updated_at = now
+            updated.append(row)
+
+        NotificationActor.objects.bulk_create(new_actors)
+        Notification.objects.bulk_update(
+            updated, ("last_actor", "actors_count", "updated_at")
+        )
+
+    for recipient_id, count in new_unread.items():
+        inbox.add_unread(recipient_id, count)
+
+
+@shared_task
+def flush_notifications() -> None:
+    """
+    Drains the event queue filled by the views in batches. A batch that
+    fails to be written goes back to the queue for the next run.
+    """
+    if not settings.NOTIFICATION_REDIS_URL:
+        return
+    for _ in range(settings.NOTIFICATION_MAX_BATCHES):
+        events = inbox.pop_events(settings.NOTIFICATION_BATCH_SIZE)
+        if not events:
+            break
+        try:
+            deliver_notifications(events)
+        except Exception:
+            inbox.requeue_events(events)
+            raise
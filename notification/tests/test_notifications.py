@@ -0,0 +1,249 @@
+from unittest.mock import patch
+
+import redis
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from monitoring.testing import QueryBudgetTestMixin
+from notification import inbox
+from notification.models import Notification
+from notification.tasks import deliver_notifications, flush_notifications
+from notification.views import NotificationViewSet
+from post.models import Post, Tag
+
+NOTIFICATION_URL = reverse("notification:notification-list")
+UNREAD_URL = reverse("notification:notification-unread-count")
+READ_URL = reverse("notification:notification-read")
+
+
+def sample_user(index: int):
+    return get_user_model().objects.create_user(
+        f"user{index}@test.com", "testpass", username=f"user{index}"
+    )
+
+
+def like_event(actor, post) -> dict:
+    return {
+        "verb": Notification.Verb.LIKE,
+        "actor": actor.id,
+        "recipient": post.creator_id,
+        "post": post.id,
+    }
+
+
+class DeliverNotificationsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = sample_user(0)
+        self.post = Post.objects.create(
+            title="Post", content="...", creator=self.author
+        )
+        self.fans = [sample_user(index) for index in range(1, 5)]
+
+    def test_batch_is_aggregated(self):
+        deliver_notifications(
+            [like_event(fan, self.post) for fan in self.fans[:3]]
+        )
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actors_count, 3)
+        self.assertEqual(notification.last_actor, self.fans[2])
+        self.assertEqual(
+            notification.message, "user3 and 2 others liked your post"
+        )
+
+    def test_later_batches_update_unread_row(self):
+        deliver_notifications([like_event(self.fans[0], self.post)])
+        deliver_notifications([like_event(self.fans[1], self.post)])
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actors_count, 2)
+        self.assertEqual(notification.message, "user2 and 1 other liked your post")
+
+    def test_repeated_actors_are_counted_once(self):
+        like = like_event(self.fans[0], self.post)
+        deliver_notifications([like, like_event(self.fans[1], self.post), like])
+        # liked again after unliking
+        deliver_notifications([like])
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actors_count, 2)
+        self.assertEqual(notification.message, "user1 and 1 other liked your post")
+        self.assertEqual(inbox.unread_count(self.author.id), 1)
+
+    def test_unread_rows_are_unique(self):
+        follow = {"recipient": self.author, "verb": Notification.Verb.FOLLOW}
+        Notification.objects.create(**follow)
+        Notification.objects.create(**follow, is_read=True)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(**follow)
+
+    def test_read_notifications_are_not_reused(self):
+        deliver_notifications([like_event(self.fans[0], self.post)])
+        Notification.objects.update(is_read=True)
+        deliver_notifications([like_event(self.fans[1], self.post)])
+
+        self.assertEqual(Notification.objects.filter(is_read=False).count(), 1)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_own_actions_are_skipped(self):
+        deliver_notifications([like_event(self.author, self.post)])
+        self.assertFalse(Notification.objects.exists())
+
+    def test_follows_are_aggregated(self):
+        deliver_notifications(
+            [
+                {
+                    "verb": Notification.Verb.FOLLOW,
+                    "actor": fan.id,
+                    "recipient": self.author.id,
+                    "post": None,
+                }
+                for fan in self.fans
+            ]
+        )
+
+        notification = Notification.objects.get()
+        self.assertIsNone(notification.post)
+        self.assertEqual(
+            notification.message, "user4 and 3 others started following you"
+        )
+
+    @override_settings(NOTIFICATION_REDIS_URL="redis://localhost:6379/0")
+    def test_failed_batch_is_requeued(self):
+        events = [like_event(fan, self.post) for fan in self.fans]
+        with (
+            patch("notification.inbox.pop_events", return_value=events),
+            patch("notification.inbox.requeue_events") as requeue_events,
+            patch(
+                "notification.models.NotificationActor.objects.bulk_create",
+                side_effect=DatabaseError,
+            ),
+            self.assertRaises(DatabaseError),
+        ):
+            flush_notifications()
+
+        requeue_events.assert_called_once_with(events)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_unread_counter_is_cached(self):
+        self.assertEqual(inbox.unread_count(self.author.id), 0)
+        deliver_notifications([like_event(self.fans[0], self.post)])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(inbox.unread_count(self.author.id), 1)
+
+
+class NotifyFromViewsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.author = sample_user(0)
+        self.user = sample_user(1)
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(
+            title="Post", content="...", creator=self.author
+        )
+        self.post.tags.add(Tag.objects.create(name="django"))
+        # engagement events are covered by the analytics tests
+        analytics = patch("analytics.events.push_event")
+        analytics.start()
+        self.addCleanup(analytics.stop)
+
+    def assert_event_pushed(self, method, url, expected):
+        with patch("notification.inbox.push_event") as push_event:
+            with self.captureOnCommitCallbacks(execute=True):
+                method(url)
+        push_event.assert_called_once_with(expected)
+
+    def test_like_notifies_creator(self):
+        self.assert_event_pushed(
+            self.client.post,
+            reverse("post:post-like-post", args=[self.post.id]),
+            like_event(self.user, self.post),
+        )
+
+    @override_settings(NOTIFICATION_REDIS_URL="redis://localhost:6379/0")
+    def test_redis_outage_does_not_fail_requests(self):
+        inbox._client.cache_clear()
+        self.addCleanup(inbox._client.cache_clear)
+
+        with (
+            patch("notification.inbox.redis.Redis.rpush") as rpush,
+            self.assertLogs("notification.inbox", "ERROR"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            rpush.side_effect = redis.ConnectionError
+            res = self.client.post(
+                reverse("post:post-like-post", args=[self.post.id])
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        rpush.assert_called_once()
+        self.assertTrue(self.post.likes.filter(id=self.user.id).exists())
+
+    def test_unlike_does_not_notify(self):
+        self.post.likes.add(self.user)
+        with patch("notification.inbox.push_event") as push_event:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse("post:post-like-post", args=[self.post.id]))
+        push_event.assert_not_called()
+
+    def test_follow_notifies_user(self):
+        self.assert_event_pushed(
+            self.client.post,
+            reverse("user:follow", args=[self.author.id]),
+            {
+                "verb": Notification.Verb.FOLLOW,
+                "actor": self.user.id,
+                "recipient": self.author.id,
+                "post": None,
+            },
+        )
+
+
+class NotificationApiTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = sample_user(0)
+        self.client.force_authenticate(self.author)
+        fans = [sample_user(index) for index in range(1, 4)]
+        events = []
+        for index in range(NotificationViewSet.pagination_class.page_size + 2):
+            post = Post.objects.create(
+                title=f"Post {index}", content="...", creator=self.author
+            )
+            events.extend(like_event(fan, post) for fan in fans)
+        deliver_notifications(events)
+
+    def test_auth_required(self):
+        res = APIClient().get(NOTIFICATION_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_list_within_budget(self):
+        with self.assertWithinQueryBudget(
+            NotificationViewSet, "list", allow_duplicates=False
+        ):
+            res = self.client.get(NOTIFICATION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"][0]["message"], "user3 and 2 others liked your post"
+        )
+
+    def test_mark_read(self):
+        ids = list(Notification.objects.values_list("id", flat=True)[:2])
+        self.assertEqual(self.client.get(UNREAD_URL).data["unread"], 22)
+
+        res = self.client.post(READ_URL, {"ids": ids}, format="json")
+        self.assertEqual(res.data["marked"], 2)
+        self.assertEqual(self.client.get(UNREAD_URL).data["unread"], 20)
+
+        self.client.post(READ_URL)
+        self.assertEqual(self.client.get(UNREAD_URL).data["unread"], 0)
@@ -0,0 +1,13 @@
+from django.urls import path, include
+from rest_framework import routers
+
+from notification.views import NotificationViewSet
+
+router = routers.DefaultRouter()
+router.register("", NotificationViewSet, basename="notification")
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
+
+app_name = "notification"
@@ -0,0 +1,63 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from notification import inbox
+from notification.serializers import (
+    NotificationReadSerializer,
+    NotificationSerializer,
+)
+
+
+class NotificationPagination(PageNumberPagination):
+    page_size = 20
+    max_page_size = 100
+
+
+class NotificationViewSet(mixins.ListModelMixin, GenericViewSet):
+    serializer_class = NotificationSerializer
+    pagination_class = NotificationPagination
+    permission_classes = (IsAuthenticated,)
+    query_budgets = {"list": 2, "unread_count": 1, "read": 1}
+
+    def get_queryset(self):
+        return self.request.user.notifications.select_related("last_actor")
+
+    @extend_schema(responses={status.HTTP_200_OK: {"type": "unread"}})
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="unread-count",
+    )
+    def unread_count(self, request) -> Response:
+        """Number of unread notifications of the user"""
+        return Response(
+            {"unread": inbox.unread_count(request.user.id)},
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        request=NotificationReadSerializer,
+        responses={status.HTTP_200_OK: {"type": "message"}},
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="read",
+    )
+    def read(self, request) -> Response:
+        """Mark specified notifications, or all of them, as read"""
+        serializer = NotificationReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        queryset = request.user.notifications.filter(is_read=False)
+        if "ids" in serializer.validated_data:
+            queryset = queryset.filter(id__in=serializer.validated_data["ids"])
+        marked = queryset.update(is_read=True)
+        inbox.reset_unread(request.user.id)
+
+        return Response({"marked": marked}, status=status.HTTP_200_OK)
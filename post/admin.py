@@ -1,13 +1,20 @@
 from django.contrib import admin
 
 from post.models import Post, Comment, Tag
+from social_media_api.pagination import EstimatedCountPaginator
+from user import purge
+from user.admin import SoftDeleteAdminMixin
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("writer", "post", "content", "created_at")
-    list_filter = ("created_at", "post")
+    list_filter = ("created_at",)
+    list_select_related = ("writer", "post__creator")
     search_fields = ("writer__username", "post__title")
+    raw_id_fields = ("writer", "post")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Tag)
@@ -16,7 +23,12 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = ("title", "creator", "created_at")
     list_filter = ("created_at", "tags")
+    list_select_related = ("creator",)
     search_fields = ("title", "creator__username")
+    raw_id_fields = ("creator",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    soft_delete = staticmethod(purge.soft_delete_post)
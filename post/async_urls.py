@@ -0,0 +1,19 @@
+from django.urls import path
+
+from post.async_views import (
+    followings_posts,
+    followings_stream,
+    post_comments,
+    post_detail,
+    post_list,
+)
+
+urlpatterns = [
+    path("", post_list, name="post-list"),
+    path("followings/", followings_posts, name="post-followings-posts"),
+    path("followings/stream/", followings_stream, name="post-followings-stream"),
+    path("<int:pk>/", post_detail, name="post-detail"),
+    path("<int:pk>/comments/", post_comments, name="post-comments"),
+]
+
+app_name = "post-async"
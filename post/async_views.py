@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+
+from post import partitioning
+from post.models import Comment, Post
+from post.serializers import (
+    ArchivedPostSerializer,
+    CommentListSerializer,
+    PostDetailSerializer,
+    PostListSerializer,
+)
+from post.streams import hub, post_summary
+from post.views import PostDefaultPagination, PostViewSet
+from social_media_api.async_api import apaginate, async_api_view, render
+
+
+def _filter_posts(request, queryset):
+    """Applies the title, tags and since filters of PostViewSet"""
+    title = request.GET.get("title")
+    tags = request.GET.get("tags")
+    since = request.GET.get("since")
+
+    if since:
+        queryset = queryset.filter(
+            created_at__gte=PostViewSet._param_to_datetime(since)
+        )
+    if title:
+        queryset = queryset.filter(title__icontains=title)
+    if tags:
+        queryset = queryset.filter(tags__id__in=PostViewSet._params_to_ints(tags))
+    return queryset
+
+
+@async_api_view
+async def post_list(request):
+    """List posts with filter by title or tags"""
+    queryset = PostViewSet.query_plans["list"].apply(
+        _filter_posts(request, Post.objects.all())
+    )
+    page = await apaginate(request, queryset, PostDefaultPagination.page_size)
+    page["results"] = PostListSerializer(
+        page["results"], many=True, context={"request": request}
+    ).data
+    return render(page)
+
+
+def _archived_post_data(request, pk):
+    row = PostViewSet._get_archived_post(pk)
+    if row is None:
+        return None
+    return ArchivedPostSerializer(row, context={"request": request}).data
+
+
+@async_api_view
+async def post_detail(request, pk):
+    """Retrieve a post, falling back to the partition archive"""
+    queryset = PostViewSet.query_plans["retrieve"].apply(Post.objects.all())
+    try:
+        post = await queryset.aget(pk=pk)
+    except Post.DoesNotExist:
+        # the archived serializer resolves tags and comments with the sync ORM
+        data = await sync_to_async(_archived_post_data)(request, pk)
+        if data is None:
+            raise Http404
+        return render(data)
+    return render(PostDetailSerializer(post, context={"request": request}).data)
+
+
+@async_api_view
+async def followings_posts(request):
+    """The user receives all the posts of the users he/she follows"""
+    queryset = Post.objects.filter(creator__in=request.user.follows.all())
+    since = request.GET.get("since")
+    if since:
+        queryset = queryset.filter(
+            created_at__gte=PostViewSet._param_to_datetime(since)
+        )
+    queryset = PostViewSet.query_plans["followings_posts"].apply(queryset)
+    posts = [post async for post in queryset]
+    return render(
+        PostListSerializer(posts, many=True, context={"request": request}).data
+    )
+
+
+@async_api_view
+async def post_comments(request, pk):
+    """Get a list of comments for specified post"""
+    try:
+        post = await Post.objects.only("created_at").aget(pk=pk)
+    except Post.DoesNotExist:
+        raise Http404
+
+    queryset = Comment.objects.filter(post=post)
+    boundary = await sync_to_async(partitioning.legacy_boundary)(
+        Post._meta.db_table
+    )
+    if boundary and post.created_at >= boundary:
+        # comments never predate their post, older partitions are skipped
+        queryset = queryset.filter(created_at__gte=post.created_at)
+    comments = [comment async for comment in queryset]
+    return render(
+        CommentListSerializer(comments, many=True, context={"request": request}).data
+    )
+
+
+def _sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: post\ndata: {json.dumps(event)}\n\n"
+
+
+@async_api_view
+async def followings_stream(request):
+    """
+    Server-sent events with the posts of the users he/she follows as they
+    are created. Follows are read when the stream opens, a reconnect with
+    Last-Event-ID first replays the posts it missed.
+    """
+    creator_ids = [
+        pk async for pk in request.user.follows.values_list("id", flat=True)
+    ]
+
+    missed = []
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    if last_event_id.isdigit() and creator_ids:
+        queryset = Post.objects.filter(
+            creator_id__in=creator_ids, id__gt=int(last_event_id)
+        ).order_by("id")[: hub.queue_size]
+        missed = [post_summary(post) async for post in queryset]
+
+    async def events():
+        queue = hub.subscribe(creator_ids)
+        try:
+            yield "retry: 3000\n\n"
+            for event in missed:
+                yield _sse(event)
+            replayed = missed[-1]["id"] if missed else 0
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), settings.POST_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event["id"] > replayed:
+                    yield _sse(event)
+        finally:
+            hub.unsubscribe(queue, creator_ids)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
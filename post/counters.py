@@ -0,0 +1,171 @@
+"""
+Sharded like counters for posts liked faster than a single counter, or
+counting their likes on every read, can keep up with.
+
+A hot post gets LIKE_COUNTER_SHARDS counter rows. Each like or unlike adds
+to a random one, so concurrent likes rarely wait on the same row lock, and
+reads sum the few shards instead of counting every like (see likes_count).
+
+Likes per post and minute are counted in the cache. A post is promoted when
+its rate reaches LIKE_COUNTER_PROMOTE_RATE and demoted by the
+rebalance_like_counters beat task once it falls below
+LIKE_COUNTER_DEMOTE_RATE. The same task re-bases the shards of the posts
+that stay hot on their exact like count, repairing the drift left by likes
+racing a promotion or by an evicted cache entry.
+"""
+
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+from post.models import LikeCounterShard, Post
+
+RATE_TIMEOUT = 2 * 60
+
+
+def _minute() -> int:
+    return int(time.time() // 60)
+
+
+def rate_key(post_id: int, minute: int) -> str:
+    return f"like-rate:{post_id}:{minute}"
+
+
+def hot_key(post_id: int) -> str:
+    return f"like-counter-hot:{post_id}"
+
+
+def _count_rate(post_id: int) -> int:
+    key = rate_key(post_id, _minute())
+    cache.add(key, 0, RATE_TIMEOUT)
+    return cache.incr(key)
+
+
+def count_like(post_id: int, delta: int) -> None:
+    """
+    Records a like (delta 1) or an unlike (delta -1) of the post, meant to
+    be called in the transaction adding or removing it. Posts that aren't
+    hot cost no query.
+    """
+    rate = _count_rate(post_id) if delta > 0 else 0
+    if cache.get(hot_key(post_id)):
+        shard = random.randrange(settings.LIKE_COUNTER_SHARDS)
+        if (
+            LikeCounterShard.objects.filter(post_id=post_id, shard=shard)
+            .update(count=F("count") + delta)
+        ):
+            return
+    if rate == settings.LIKE_COUNTER_PROMOTE_RATE:
+        promote(post_id)
+
+
+def live_likes(post_id: int):
+    """The likes of the post, leaving out soft-deleted users"""
+    return Post.likes.through.objects.filter(post_id=post_id, user__is_deleted=False)
+
+
+def toggle_like(post_id: int, user_id: int) -> int:
+    """
+    Likes the post, or unlikes it when the user already likes it. Returns
+    1 or -1 for the like added or removed, 0 when a concurrent request of
+    the same user added it first. Only a statement which actually added or
+    removed a row is counted, in the same transaction. Within an enclosing
+    transaction no savepoint is taken, a like costs the DELETE and INSERT.
+    """
+    likes = Post.likes.through
+    with transaction.atomic(savepoint=False):
+        removed, _ = likes.objects.filter(post_id=post_id, user_id=user_id).delete()
+        if removed:
+            count_like(post_id, -1)
+            return -1
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {connection.ops.quote_name(likes._meta.db_table)} "
+                f"(post_id, user_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+                [post_id, user_id],
+            )
+            added = cursor.rowcount
+        if added:
+            count_like(post_id, 1)
+    return added
+
+
+def promote(post_id: int) -> None:
+    """Creates the shards of the post, holding its current like count"""
+    likes = live_likes(post_id).count()
+    LikeCounterShard.objects.bulk_create(
+        [
+            LikeCounterShard(
+                post_id=post_id, shard=shard, count=likes if shard == 0 else 0
+            )
+            for shard in range(settings.LIKE_COUNTER_SHARDS)
+        ],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(lambda: cache.set(hot_key(post_id), True, None))
+
+
+def demote(post_ids: list) -> None:
+    """Drops the shards, the likes of the posts are counted again"""
+    cache.delete_many([hot_key(post_id) for post_id in post_ids])
+    LikeCounterShard.objects.filter(post_id__in=post_ids).delete()
+
+
+def resync(post_id: int) -> None:
+    """
+    Adds the difference between the exact like count and the shards' sum
+    to the first shard. Locking the shards waits for the likes in flight,
+    so the count is exact at that point.
+    """
+    with transaction.atomic():
+        shards = list(
+            LikeCounterShard.objects.select_for_update()
+            .filter(post_id=post_id)
+            .order_by("shard")
+        )
+        if not shards:
+            return
+        likes = live_likes(post_id).count()
+        drift = likes - sum(shard.count for shard in shards)
+        if drift:
+            LikeCounterShard.objects.filter(pk=shards[0].pk).update(
+                count=F("count") + drift
+            )
+
+
+def rebalance() -> tuple:
+    """
+    Demotes the hot posts liked less than LIKE_COUNTER_DEMOTE_RATE times in
+    both the last and the current minute and re-syncs the others. Returns
+    the ids of the posts kept and of the ones demoted.
+    """
+    post_ids = list(
+        LikeCounterShard.objects.order_by()
+        .values_list("post_id", flat=True)
+        .distinct()
+    )
+    minute = _minute()
+    keys = {
+        post_id: (rate_key(post_id, minute - 1), rate_key(post_id, minute))
+        for post_id in post_ids
+    }
+    rates = cache.get_many([key for pair in keys.values() for key in pair])
+
+    hot, cold = [], []
+    for post_id, pair in keys.items():
+        rate = max(rates.get(key, 0) for key in pair)
+        if rate >= settings.LIKE_COUNTER_DEMOTE_RATE:
+            hot.append(post_id)
+        else:
+            cold.append(post_id)
+
+    if cold:
+        demote(cold)
+    for post_id in hot:
+        resync(post_id)
+    cache.set_many({hot_key(post_id): True for post_id in hot}, None)
+    return hot, cold
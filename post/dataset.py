@@ -0,0 +1,352 @@
+"""
+Synthetic dataset of production-like scale and shape.
+
+Users follow each other along a power-law graph: how many users someone
+follows is Pareto distributed, and whom they follow is drawn from a Zipf
+popularity ranking, so a few accounts gather most of the followers. Posts
+per creator, likes and comments per post follow the same kind of skew,
+tags are drawn by Zipf popularity as well.
+
+Rows are written with COPY on PostgreSQL and batched INSERTs elsewhere,
+with explicit ids, skipping the ORM. Every stage draws from its own
+generator seeded with the --seed value, so the same options always
+produce the same dataset.
+"""
+
+import itertools
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from post.models import Comment, Post, Tag
+
+PASSWORD = "password"
+PARETO_ALPHA = 1.5
+
+WORDS = (
+    "django python postgres redis celery async cache query index api feed "
+    "like follow comment image tag scale latency worker queue stream batch "
+    "shard replica partition profile metric trace deploy review release"
+).split()
+
+
+def pareto_count(rng: random.Random, mean: float, cap: int) -> int:
+    """Heavy-tailed non-negative integer averaging about `mean`"""
+    value = (rng.paretovariate(PARETO_ALPHA) - 1) * mean * (PARETO_ALPHA - 1)
+    return min(int(value), cap)
+
+
+def zipf_weights(size: int, exponent: float = 1.0) -> list:
+    return list(
+        itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(size))
+    )
+
+
+def sample_distinct(rng, population, cum_weights, k: int, exclude=None) -> set:
+    """
+    Up to k distinct items drawn by weight. Rare items are hard to hit, so
+    the draws stop after a few rounds rather than chase the last ones.
+    """
+    chosen = set()
+    for _ in range(4):
+        missing = k - len(chosen)
+        if missing <= 0:
+            break
+        chosen.update(rng.choices(population, cum_weights=cum_weights, k=missing))
+        chosen.discard(exclude)
+    return chosen
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=words)).capitalize()
+
+
+class TableWriter:
+    """Streams rows into a table, COPY on PostgreSQL, INSERTs otherwise"""
+
+    def __init__(self, cursor, table: str, columns: tuple, batch_size: int):
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+        quote = connection.ops.quote_name
+        column_list = ", ".join(quote(column) for column in columns)
+        self.copy = None
+        if connection.vendor == "postgresql":
+            self.copy_sql = f"COPY {quote(table)} ({column_list}) FROM STDIN"
+        else:
+            placeholders = ", ".join(["%s"] * len(columns))
+            self.insert_sql = (
+                f"INSERT INTO {quote(table)} ({column_list}) VALUES ({placeholders})"
+            )
+
+    def __enter__(self):
+        if connection.vendor == "postgresql":
+            self.copy_context = self.cursor.copy(self.copy_sql)
+            self.copy = self.copy_context.__enter__()
+        return self
+
+    def write(self, row: tuple) -> None:
+        self.count += 1
+        if self.copy is not None:
+            self.copy.write_row(row)
+            return
+        self.rows.append(
+            tuple(
+                (
+                    connection.ops.adapt_datetimefield_value(value)
+                    if isinstance(value, datetime)
+                    else value
+                )
+                for value in row
+            )
+        )
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.rows:
+            self.cursor.executemany(self.insert_sql, self.rows)
+            self.rows = []
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.copy is not None:
+            return self.copy_context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None:
+            self.flush()
+
+
+def _through_columns(field) -> tuple:
+    through = field.remote_field.through
+    return (
+        through._meta.db_table,
+        (
+            through._meta.get_field(field.m2m_field_name()).column,
+            through._meta.get_field(field.m2m_reverse_field_name()).column,
+        ),
+    )
+
+
+class DatasetGenerator:
+    def __init__(
+        self,
+        users: int,
+        avg_follows: float = 20,
+        avg_posts: float = 5,
+        tags: int = 200,
+        avg_likes: float = 10,
+        avg_comments: float = 2,
+        days: int = 365,
+        seed: int = 42,
+        batch_size: int = 10000,
+        log=print,
+    ):
+        self.users = users
+        self.avg_follows = avg_follows
+        self.avg_posts = avg_posts
+        self.tags = tags
+        self.avg_likes = avg_likes
+        self.avg_comments = avg_comments
+        self.days = days
+        self.seed = seed
+        self.batch_size = batch_size
+        self.log = log
+        self.now = timezone.now().replace(microsecond=0)
+
+    def rng(self, stage: str) -> random.Random:
+        return random.Random(f"{self.seed}:{stage}")
+
+    def writer(self, cursor, table: str, columns: tuple) -> TableWriter:
+        return TableWriter(cursor, table, columns, self.batch_size)
+
+    def next_id(self, model) -> int:
+        return (model.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+
+    def random_moment(self, rng, after: datetime = None) -> datetime:
+        start = after or self.now - timedelta(days=self.days)
+        seconds = int((self.now - start).total_seconds())
+        return start + timedelta(seconds=rng.randint(0, max(seconds, 0)))
+
+    def generate(self) -> dict:
+        """Writes the dataset in one transaction, returns row counts by stage"""
+        stages = (
+            ("users", self.write_users),
+            ("follows", self.write_follows),
+            ("tags", self.write_tags),
+            ("posts", self.write_posts),
+            ("post tags", self.write_post_tags),
+            ("likes", self.write_likes),
+            ("comments", self.write_comments),
+        )
+        counts = {}
+        with transaction.atomic(), connection.cursor() as cursor:
+            for name, write in stages:
+                start = time.perf_counter()
+                counts[name] = write(cursor)
+                self.log(f"{counts[name]} {name} in {time.perf_counter() - start:.1f}s")
+            models = [get_user_model(), Tag, Post, Comment]
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        return counts
+
+    def write_users(self, cursor) -> int:
+        User = get_user_model()
+        rng = self.rng("users")
+        first_id = self.next_id(User)
+        password = make_password(PASSWORD)
+        columns = (
+            "id",
+            "password",
+            "is_superuser",
+            "is_staff",
+            "is_active",
+            "is_deleted",
+            "date_joined",
+            "first_name",
+            "last_name",
+            "email",
+            "username",
+            "avatar_renditions",
+            "bio",
+        )
+        with self.writer(cursor, User._meta.db_table, columns) as writer:
+            for user_id in range(first_id, first_id + self.users):
+                writer.write(
+                    (
+                        user_id,
+                        password,
+                        False,
+                        False,
+                        True,
+                        False,
+                        self.random_moment(rng),
+                        "",
+                        "",
+                        f"user{user_id}@example.com",
+                        f"user{user_id}",
+                        "{}",
+                        sentence(rng, rng.randint(3, 12)),
+                    )
+                )
+        self.user_ids = range(first_id, first_id + self.users)
+        return writer.count
+
+    def write_follows(self, cursor) -> int:
+        rng = self.rng("follows")
+        # popularity ranking, the first users of the shuffle are the celebrities
+        ranking = list(self.user_ids)
+        rng.shuffle(ranking)
+        weights = zipf_weights(len(ranking))
+
+        table, columns = _through_columns(get_user_model().follows.field)
+        with self.writer(cursor, table, columns) as writer:
+            for user_id in self.user_ids:
+                count = pareto_count(rng, self.avg_follows, len(ranking) - 1)
+                for followed in sample_distinct(
+                    rng, ranking, weights, count, exclude=user_id
+                ):
+                    writer.write((user_id, followed))
+        return writer.count
+
+    def write_tags(self, cursor) -> int:
+        first_id = self.next_id(Tag)
+        with self.writer(cursor, Tag._meta.db_table, ("id", "name")) as writer:
+            for tag_id in range(first_id, first_id + self.tags):
+                writer.write((tag_id, f"{WORDS[tag_id % len(WORDS)]}{tag_id}"))
+        self.tag_ids = range(first_id, first_id + self.tags)
+        return writer.count
+
+    def write_posts(self, cursor) -> int:
+        rng = self.rng("posts")
+        self.first_post_id = post_id = self.next_id(Post)
+        # creator and creation timestamp of every post, by id offset
+        self.post_creators = array("q")
+        self.post_created = array("d")
+        columns = (
+            "id",
+            "title",
+            "content",
+            "image_renditions",
+            "creator_id",
+            "is_deleted",
+            "created_at",
+            "updated_at",
+        )
+        with self.writer(cursor, Post._meta.db_table, columns) as writer:
+            for user_id in self.user_ids:
+                for _ in range(pareto_count(rng, self.avg_posts, 10000)):
+                    created_at = self.random_moment(rng)
+                    writer.write(
+                        (
+                            post_id,
+                            sentence(rng, rng.randint(2, 8)),
+                            sentence(rng, rng.randint(10, 60)),
+                            "{}",
+                            user_id,
+                            False,
+                            created_at,
+                            created_at,
+                        )
+                    )
+                    self.post_creators.append(user_id)
+                    self.post_created.append(created_at.timestamp())
+                    post_id += 1
+        return writer.count
+
+    def write_post_tags(self, cursor) -> int:
+        rng = self.rng("post tags")
+        tag_ids = list(self.tag_ids)
+        weights = zipf_weights(len(tag_ids))
+
+        table, columns = _through_columns(Post.tags.field)
+        with self.writer(cursor, table, columns) as writer:
+            for offset in range(len(self.post_creators)):
+                for tag_id in sample_distinct(rng, tag_ids, weights, rng.randint(1, 3)):
+                    writer.write((self.first_post_id + offset, tag_id))
+        return writer.count
+
+    def write_likes(self, cursor) -> int:
+        rng = self.rng("likes")
+        likers = list(self.user_ids)
+        rng.shuffle(likers)
+        weights = zipf_weights(len(likers), exponent=0.5)
+
+        table, columns = _through_columns(Post.likes.field)
+        with self.writer(cursor, table, columns) as writer:
+            for offset, creator_id in enumerate(self.post_creators):
+                count = pareto_count(rng, self.avg_likes, len(likers) - 1)
+                for user_id in sample_distinct(
+                    rng, likers, weights, count, exclude=creator_id
+                ):
+                    writer.write((self.first_post_id + offset, user_id))
+        return writer.count
+
+    def write_comments(self, cursor) -> int:
+        rng = self.rng("comments")
+        comment_id = self.next_id(Comment)
+        columns = ("id", "post_id", "writer_id", "content", "created_at", "updated_at")
+        with self.writer(cursor, Comment._meta.db_table, columns) as writer:
+            for offset, timestamp in enumerate(self.post_created):
+                post_created = datetime.fromtimestamp(timestamp, self.now.tzinfo)
+                for _ in range(pareto_count(rng, self.avg_comments, 1000)):
+                    created_at = self.random_moment(rng, after=post_created)
+                    writer.write(
+                        (
+                            comment_id,
+                            self.first_post_id + offset,
+                            rng.choice(self.user_ids),
+                            sentence(rng, rng.randint(3, 30)),
+                            created_at,
+                            created_at,
+                        )
+                    )
+                    comment_id += 1
+        return writer.count
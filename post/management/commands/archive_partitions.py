@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from post import partitioning
+
+
+class Command(BaseCommand):
+    help = "Moves old post and comment partitions into compressed archive storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-months",
+            type=int,
+            default=None,
+            help="Archive partitions which ended more than this many months ago",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            for model in partitioning.PARTITIONED_MODELS:
+                partitioning.archive_partitions(
+                    model, options["older_than_months"], log=self.stdout.write
+                )
+        except partitioning.PartitioningNotSupported as error:
+            raise CommandError(error)
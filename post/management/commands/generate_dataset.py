@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+
+from post.dataset import PASSWORD, DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates users, a power-law follow graph, posts, tags, likes and "
+        "comments in bulk, deterministically for a given seed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument(
+            "--avg-follows", type=float, default=20, help="Follows per user"
+        )
+        parser.add_argument("--avg-posts", type=float, default=5, help="Posts per user")
+        parser.add_argument("--tags", type=int, default=200)
+        parser.add_argument(
+            "--avg-likes", type=float, default=10, help="Likes per post"
+        )
+        parser.add_argument(
+            "--avg-comments", type=float, default=2, help="Comments per post"
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Posts are spread over this many past days",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Rows per INSERT where COPY isn't available",
+        )
+
+    def handle(self, *args, **options):
+        DatasetGenerator(
+            users=options["users"],
+            avg_follows=options["avg_follows"],
+            avg_posts=options["avg_posts"],
+            tags=options["tags"],
+            avg_likes=options["avg_likes"],
+            avg_comments=options["avg_comments"],
+            days=options["days"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write,
+        ).generate()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done, every generated user logs in with password {PASSWORD!r}"
+            )
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from post import partitioning
+
+
+class Command(BaseCommand):
+    help = "Converts post and comment tables to monthly partitions and creates future ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Convert the existing tables to partitioned tables first",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=None,
+            help="How many months of partitions to create in advance",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            for model in partitioning.PARTITIONED_MODELS:
+                if options["convert"]:
+                    partitioning.convert_table(model, log=self.stdout.write)
+                partitioning.create_partitions(
+                    model, options["months_ahead"], log=self.stdout.write
+                )
+        except partitioning.PartitioningNotSupported as error:
+            raise CommandError(error)
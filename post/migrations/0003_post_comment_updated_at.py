@@ -0,0 +1,73 @@
+# Generated by Django 5.0.3 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Splits created_at into an immutable created_at and updated_at.
+
+    On PostgreSQL 11+ adding updated_at with a constant default only touches
+    the catalog, so no table rewrite happens. Existing rows are backfilled in
+    batches by 0004, indexes are built concurrently by 0005.
+    """
+
+    dependencies = [
+        ("post", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="comment",
+            options={"ordering": ("created_at", "id")},
+        ),
+        migrations.AlterModelOptions(
+            name="post",
+            options={
+                "ordering": ("created_at", "id"),
+                "verbose_name": "posts",
+                "verbose_name_plural": "posts",
+            },
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name="comment",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name="comment",
+            name="post",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="comments",
+                to="post.post",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="comment",
+            name="writer",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="comments",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="post",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.3 on 2026-10-19 12:00
+
+from django.db import migrations, transaction
+from django.db.models import F
+
+BATCH_SIZE = 10000
+
+
+def backfill_updated_at(apps, schema_editor):
+    """
+    The old created_at column was rewritten on every save, so it holds the
+    last modification time. Copy it in short id-range transactions instead
+    of one statement that would lock the whole table.
+    """
+    for model_name in ("Post", "Comment"):
+        model = apps.get_model("post", model_name)
+        manager = model._base_manager.using(schema_editor.connection.alias)
+        last_id = 0
+
+        while True:
+            ids = list(
+                manager.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:BATCH_SIZE]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic(using=schema_editor.connection.alias):
+                manager.filter(id__gte=ids[0], id__lte=ids[-1]).update(
+                    updated_at=F("created_at")
+                )
+            last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("post", "0003_post_comment_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
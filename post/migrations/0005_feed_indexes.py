@@ -0,0 +1,49 @@
+# Generated by Django 5.0.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+from social_media_api.migration_operations import (
+    AddIndexConcurrentlyIfSupported,
+    AddThroughIndex,
+)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("post", "0004_backfill_updated_at"),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "created_at", "id"],
+                name="comment_post_created_idx",
+            ),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="post",
+            index=models.Index(fields=["created_at", "id"], name="post_created_idx"),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="post",
+            index=models.Index(
+                fields=["creator", "created_at", "id"],
+                name="post_creator_created_idx",
+            ),
+        ),
+        AddThroughIndex(
+            model_name="post",
+            field_name="likes",
+            fields=["user", "post"],
+            name="post_likes_user_post_idx",
+        ),
+        AddThroughIndex(
+            model_name="post",
+            field_name="tags",
+            fields=["tag", "post"],
+            name="post_tags_tag_post_idx",
+        ),
+    ]
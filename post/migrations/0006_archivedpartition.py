@@ -0,0 +1,49 @@
+# Generated by Django 5.0.3 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("post", "0005_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedPartition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("table", models.CharField(max_length=63)),
+                ("month", models.DateField()),
+                ("path", models.CharField(max_length=255)),
+                ("row_count", models.PositiveIntegerField(default=0)),
+                ("min_id", models.BigIntegerField(null=True)),
+                ("max_id", models.BigIntegerField(null=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ("table", "month"),
+                "indexes": [
+                    models.Index(
+                        fields=["table", "min_id", "max_id"],
+                        name="archived_partition_ids_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("table", "month"),
+                        name="archived_partition_unique_month",
+                    )
+                ],
+            },
+        ),
+    ]
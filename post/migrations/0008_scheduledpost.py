@@ -0,0 +1,62 @@
+# Generated by Django 5.0.3 on 2026-10-19 15:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("post", "0007_post_image_renditions"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduledPost",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=150)),
+                ("content", models.TextField(blank=True)),
+                ("image_path", models.CharField(blank=True, max_length=255)),
+                ("image_content_type", models.CharField(blank=True, max_length=100)),
+                ("publish_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "creator",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scheduled_posts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "tags",
+                    models.ManyToManyField(
+                        blank=True, related_name="scheduled_posts", to="post.tag"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("publish_at", "id"),
+                "indexes": [
+                    models.Index(
+                        fields=["publish_at", "id"], name="scheduled_post_publish_idx"
+                    ),
+                    models.Index(
+                        fields=["creator", "publish_at"],
+                        name="scheduled_post_creator_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.3 on 2026-10-19 19:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("post", "0008_scheduledpost"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LikeCounterShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("shard", models.PositiveSmallIntegerField()),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="like_counter_shards",
+                        to="post.post",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("post", "shard"),
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "shard"), name="like_counter_shard_uniq"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.3 on 2026-10-19 20:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+from social_media_api.migration_operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("post", "0009_likecountershard"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="is_deleted",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_deleted", True)),
+                fields=["id"],
+                name="post_deleted_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.3 on 2026-10-19 21:00
+
+from django.db import migrations, models
+
+from social_media_api.migration_operations import (
+    AddIndexConcurrentlyIfSupported,
+    RemoveIndexConcurrentlyIfSupported,
+)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("post", "0010_soft_delete"),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["created_at", "id"],
+                name="post_live_created_idx",
+            ),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["creator", "created_at", "id"],
+                name="post_live_creator_created_idx",
+            ),
+        ),
+        RemoveIndexConcurrentlyIfSupported(
+            model_name="post",
+            name="post_created_idx",
+        ),
+        RemoveIndexConcurrentlyIfSupported(
+            model_name="post",
+            name="post_creator_created_idx",
+        ),
+        RemoveIndexConcurrentlyIfSupported(
+            model_name="post",
+            name="post_deleted_idx",
+        ),
+    ]
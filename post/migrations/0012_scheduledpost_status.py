@@ -0,0 +1,36 @@
+# Generated by Django 5.0.3 on 2026-10-19 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("post", "0011_live_post_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scheduledpost",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scheduledpost",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="scheduledpost",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "pending"),
+                    ("publishing", "publishing"),
+                    ("failed", "failed"),
+                ],
+                default="pending",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.3 on 2026-10-20 00:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("post", "0012_scheduledpost_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("min_id", models.BigIntegerField()),
+                ("max_id", models.BigIntegerField()),
+                ("offset", models.BigIntegerField()),
+                ("size", models.PositiveIntegerField()),
+                (
+                    "partition",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="post.archivedpartition",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("partition", "min_id"),
+                "indexes": [
+                    models.Index(
+                        fields=["partition", "min_id"], name="archived_chunk_min_id_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -3,10 +3,19 @@ import uuid
 
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 from django.utils.translation import gettext as _
 
 
+class CommentManager(models.Manager):
+    """Leaves out comments of soft-deleted writers waiting to be purged"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(writer__is_deleted=False)
+
+
 class Comment(models.Model):
     writer = models.ForeignKey(
         get_user_model(),
@@ -19,12 +28,21 @@ class Comment(models.Model):
         related_name="comments",
     )
     content = models.TextField(max_length=255)
-    created_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CommentManager()
 
     class Meta:
         ordering = (
             "created_at",
-            "post",
+            "id",
+        )
+        indexes = (
+            models.Index(
+                fields=("post", "created_at", "id"),
+                name="comment_post_created_idx",
+            ),
         )
 
     def __str__(self) -> str:
@@ -45,10 +63,27 @@ def post_image_file_path(instance, filename):
     return os.path.join("uploads/users/", filename)
 
 
+class PostManager(models.Manager):
+    """
+    Leaves out soft-deleted posts waiting to be purged, see user/purge.py,
+    and the posts of soft-deleted users before the purge gets to hide them
+    """
+
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .filter(is_deleted=False, creator__is_deleted=False)
+        )
+
+
 class Post(models.Model):
     image = models.ImageField(
         _("post_image"), null=True, upload_to=post_image_file_path
     )
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     title = models.CharField(max_length=150)
     content = models.TextField(blank=True)
     creator = models.ForeignKey(
@@ -58,12 +93,28 @@ class Post(models.Model):
         get_user_model(), related_name="liked_posts", blank=True
     )
     tags = models.ManyToManyField(Tag, verbose_name="tag_posts")
-    created_at = models.DateTimeField(auto_now=True)
+    is_deleted = models.BooleanField(default=False, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PostManager()
 
     class Meta:
         ordering = (
             "created_at",
-            "title",
+            "id",
+        )
+        indexes = (
+            models.Index(
+                fields=("created_at", "id"),
+                condition=Q(is_deleted=False),
+                name="post_live_created_idx",
+            ),
+            models.Index(
+                fields=("creator", "created_at", "id"),
+                condition=Q(is_deleted=False),
+                name="post_live_creator_created_idx",
+            ),
         )
         verbose_name = "posts"
         verbose_name_plural = "posts"
@@ -71,7 +122,164 @@ class Post(models.Model):
     @property
     def count_likes(self) -> int:
         """Returns the number of likes on the post."""
-        return self.likes.count()
+        if hasattr(self, "likes_total"):
+            return self.likes_total
+        total = self.like_counter_shards.aggregate(total=Sum("count"))["total"]
+        return self.likes.count() if total is None else total
 
     def __str__(self) -> str:
         return f"{self.creator}: {self.title}"
+
+
+class ScheduledPost(models.Model):
+    """Post waiting to be published, removed once the post exists"""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "pending"
+        # claimed by publish_scheduled_posts, which is copying its image
+        PUBLISHING = "publishing", "publishing"
+        # gave up after SCHEDULED_POST_MAX_ATTEMPTS failed attempts
+        FAILED = "failed", "failed"
+
+    creator = models.ForeignKey(
+        get_user_model(), related_name="scheduled_posts", on_delete=models.CASCADE
+    )
+    title = models.CharField(max_length=150)
+    content = models.TextField(blank=True)
+    tags = models.ManyToManyField(Tag, related_name="scheduled_posts", blank=True)
+    # upload staged in media storage, see post/staging.py
+    image_path = models.CharField(max_length=255, blank=True)
+    image_content_type = models.CharField(max_length=100, blank=True)
+    publish_at = models.DateTimeField()
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("publish_at", "id")
+        indexes = (
+            models.Index(
+                fields=("publish_at", "id"), name="scheduled_post_publish_idx"
+            ),
+            models.Index(
+                fields=("creator", "publish_at"), name="scheduled_post_creator_idx"
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.creator}: {self.title} at {self.publish_at}"
+
+
+class LikeCounterShard(models.Model):
+    """One of the like counters of a hot post, see post/counters.py"""
+
+    # posts may be partitioned on (id, created_at), so the id alone can't
+    # back a database constraint; the unique constraint indexes post first
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="like_counter_shards",
+        db_constraint=False,
+        db_index=False,
+    )
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ("post", "shard")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("post", "shard"), name="like_counter_shard_uniq"
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"post {self.post_id} shard {self.shard}: {self.count}"
+
+
+def likes_count() -> Coalesce:
+    """
+    Correlated subquery counting likes, meant to be annotated as likes_total.
+    Hot posts sum their counter shards instead of counting their likes, the
+    likes of soft-deleted users drop out of them on the next resync.
+    """
+    shards = (
+        LikeCounterShard.objects.filter(post_id=OuterRef("pk"))
+        .order_by()
+        .values("post_id")
+        .annotate(total=Sum("count"))
+        .values("total")
+    )
+    likes = (
+        Post.likes.through.objects.filter(
+            post_id=OuterRef("pk"), user__is_deleted=False
+        )
+        .order_by()
+        .values("post_id")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(shards), Subquery(likes), 0)
+
+
+class ArchivedPartition(models.Model):
+    """Monthly partition moved out of the database into compressed storage"""
+
+    table = models.CharField(max_length=63)
+    month = models.DateField()
+    path = models.CharField(max_length=255)
+    row_count = models.PositiveIntegerField(default=0)
+    min_id = models.BigIntegerField(null=True)
+    max_id = models.BigIntegerField(null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("table", "month")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("table", "month"), name="archived_partition_unique_month"
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=("table", "min_id", "max_id"),
+                name="archived_partition_ids_idx",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.table} {self.month:%Y-%m}"
+
+
+class ArchivedChunk(models.Model):
+    """
+    Gzip member of an archived partition, holding a run of its rows ordered
+    by id, so a row is read back without decompressing the whole month
+    """
+
+    # the index on (partition, min_id) covers the lookups by partition
+    partition = models.ForeignKey(
+        ArchivedPartition,
+        on_delete=models.CASCADE,
+        related_name="chunks",
+        db_index=False,
+    )
+    min_id = models.BigIntegerField()
+    max_id = models.BigIntegerField()
+    # byte range of the member in the archive file
+    offset = models.BigIntegerField()
+    size = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ("partition", "min_id")
+        indexes = (
+            models.Index(
+                fields=("partition", "min_id"), name="archived_chunk_min_id_idx"
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.partition} ids {self.min_id}-{self.max_id}"
@@ -0,0 +1,522 @@
+"""
+Monthly range partitioning of post_post and post_comment by created_at.
+
+Converting a table keeps its existing rows in place: the old table becomes a
+"legacy" partition holding everything created before the next month, so no
+data is copied. PostgreSQL requires the partition key in every unique index
+of a partitioned table, hence the primary key becomes (id, created_at) and
+foreign keys pointing at the converted tables can't reference id alone.
+They are replaced by deferred constraint triggers doing the same checks,
+and Django emulates ON DELETE CASCADE itself, so deletes keep cascading.
+"""
+
+import gzip
+import json
+import re
+import tempfile
+from datetime import date, datetime
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from post.models import ArchivedChunk, ArchivedPartition, Comment, Post
+
+PARTITIONED_MODELS = (Post, Comment)
+
+_BOUND_RE = re.compile(r"TO \('([^']+)'\)")
+
+# how long the boundaries read from the catalog are cached, the commands
+# changing them drop the cached values right away
+BOUNDARY_CACHE_SECONDS = 10 * 60
+
+# rows per gzip member of an archive, the most read back to find one row
+ARCHIVE_CHUNK_ROWS = 1000
+
+
+class PartitioningNotSupported(Exception):
+    pass
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def _ensure_postgresql() -> None:
+    if connection.vendor != "postgresql":
+        raise PartitioningNotSupported("Partitioning requires PostgreSQL")
+
+
+def is_partitioned(table: str) -> bool:
+    _ensure_postgresql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table: str) -> list:
+    """Returns (name, upper bound) of the partitions, ordered by range"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [table],
+        )
+        partitions = []
+        for name, bound in cursor.fetchall():
+            match = _BOUND_RE.search(bound)
+            upper = date.fromisoformat(match.group(1)[:10]) if match else None
+            partitions.append((name, upper))
+    return sorted(partitions, key=lambda partition: partition[1] or date.max)
+
+
+def _boundary_cache_keys(table: str) -> tuple:
+    return (
+        f"partitioning:{table}:legacy_boundary",
+        f"partitioning:{table}:archived_max_id",
+    )
+
+
+def invalidate_boundaries(table: str) -> None:
+    cache.delete_many(_boundary_cache_keys(table))
+
+
+def _find_legacy_boundary(table: str):
+    if connection.vendor != "postgresql" or not is_partitioned(table):
+        return None
+    for name, upper in list_partitions(table):
+        if name == f"{table}_legacy":
+            return datetime.combine(upper, datetime.min.time())
+    return datetime.min
+
+
+def legacy_boundary(table: str):
+    """
+    Returns the datetime from which rows live in monthly partitions. Rows
+    created before it come from the time created_at changed on every save,
+    so their timestamps can't be used to bound other queries.
+    """
+    key, _ = _boundary_cache_keys(table)
+    # cached wrapped in a tuple, as None means the table is not partitioned
+    cached = cache.get(key)
+    if cached is None:
+        cached = (_find_legacy_boundary(table),)
+        cache.set(key, cached, BOUNDARY_CACHE_SECONDS)
+    return cached[0]
+
+
+def archived_max_id(table: str) -> int:
+    """Returns the highest id moved to the archive, 0 when nothing was"""
+    _, key = _boundary_cache_keys(table)
+    max_id = cache.get(key)
+    if max_id is None:
+        max_id = (
+            ArchivedPartition.objects.filter(table=table).aggregate(
+                max_id=Max("max_id")
+            )["max_id"]
+            or 0
+        )
+        cache.set(key, max_id, BOUNDARY_CACHE_SECONDS)
+    return max_id
+
+
+def _quote(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def _referencing_foreign_keys(cursor, table: str) -> list:
+    """Returns (table, constraint, column) of the foreign keys to the table"""
+    cursor.execute(
+        "SELECT c.conrelid::regclass::text, c.conname, a.attname "
+        "FROM pg_constraint c JOIN pg_attribute a "
+        "ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1] "
+        "WHERE c.contype = 'f' AND c.confrelid = %s::regclass",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _constraint_triggers(cursor, table: str) -> list:
+    """Returns (name, definition) of the constraint triggers on the table"""
+    cursor.execute(
+        "SELECT tgname, pg_get_triggerdef(oid) FROM pg_trigger "
+        "WHERE tgrelid = %s::regclass AND tgconstraint <> 0 "
+        "AND NOT tgisinternal AND tgparentid = 0",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def foreign_key_trigger_sql(
+    table: str, referencing: str, constraint: str, column: str
+) -> list:
+    """
+    Statements replacing the foreign key from referencing.column to table.id
+    by deferred constraint triggers: one rejects rows which reference a
+    missing id, the other deletes which leave referencing rows behind.
+    """
+    # identifiers are capped at 63 characters
+    check = _quote(f"{constraint[:56]}_check")
+    restrict = _quote(f"{constraint[:56]}_restr")
+    trigger = _quote(constraint)
+    missing = f"{referencing}.{column}=% is not present in {table}"
+    referenced = f"{table}.id=% is still referenced from {referencing}"
+    table, referencing, column = _quote(table), _quote(referencing), _quote(column)
+    raise_error = "RAISE EXCEPTION USING ERRCODE = 'foreign_key_violation', MESSAGE ="
+    return [
+        f"CREATE OR REPLACE FUNCTION {check}() RETURNS trigger "
+        f"LANGUAGE plpgsql AS $$ BEGIN "
+        f"IF NEW.{column} IS NOT NULL AND NOT EXISTS "
+        f"(SELECT 1 FROM {table} WHERE id = NEW.{column}) "
+        # like the foreign key checks, skip rows deleted before the commit
+        f"AND EXISTS (SELECT 1 FROM {referencing} WHERE id = NEW.id) THEN "
+        f"{raise_error} replace('{missing}', '%', NEW.{column}::text); "
+        f"END IF; RETURN NULL; END $$",
+        f"CREATE OR REPLACE FUNCTION {restrict}() RETURNS trigger "
+        f"LANGUAGE plpgsql AS $$ BEGIN "
+        f"IF EXISTS (SELECT 1 FROM {referencing} WHERE {column} = OLD.id) "
+        f"AND NOT EXISTS (SELECT 1 FROM {table} WHERE id = OLD.id) THEN "
+        f"{raise_error} replace('{referenced}', '%', OLD.id::text); "
+        f"END IF; RETURN NULL; END $$",
+        f"CREATE CONSTRAINT TRIGGER {trigger} "
+        f"AFTER INSERT OR UPDATE OF {column} ON {referencing} "
+        f"DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION {check}()",
+        f"CREATE CONSTRAINT TRIGGER {trigger} AFTER DELETE ON {table} "
+        f"DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION {restrict}()",
+    ]
+
+
+def _secondary_indexes(cursor, table: str) -> list:
+    cursor.execute(
+        "SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisunique "
+        "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE i.indrelid = %s::regclass AND NOT i.indisprimary",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def convert_table(model, log=print) -> None:
+    """Turns the model table into a partitioned table with a legacy partition"""
+    _ensure_postgresql()
+    table = model._meta.db_table
+    legacy = f"{table}_legacy"
+    boundary = add_months(month_start(timezone.now().date()), 1)
+
+    if is_partitioned(table):
+        log(f"{table} is already partitioned")
+        return
+
+    with connection.cursor() as cursor:
+        # A validated CHECK lets ATTACH PARTITION skip the full table scan,
+        # and VALIDATE only takes a lock which does not block writes.
+        check = f"{table}_legacy_range"
+        cursor.execute(
+            f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(check)} "
+            f"CHECK (created_at < %s) NOT VALID",
+            [boundary],
+        )
+        cursor.execute(f"ALTER TABLE {_quote(table)} VALIDATE CONSTRAINT {_quote(check)}")
+        cursor.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "
+            f"{_quote(table + '_id_created_uniq')} ON {_quote(table)} (id, created_at)"
+        )
+        indexes = _secondary_indexes(cursor, table)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE")
+        foreign_keys = _referencing_foreign_keys(cursor, table)
+        for referencing, constraint, _ in foreign_keys:
+            log(f"Replacing foreign key {constraint} on {referencing} by triggers")
+            cursor.execute(
+                f"ALTER TABLE {_quote(referencing)} "
+                f"DROP CONSTRAINT {_quote(constraint)}"
+            )
+        # triggers standing in for foreign keys of this table move to the parent
+        triggers = _constraint_triggers(cursor, table)
+        for name, _ in triggers:
+            cursor.execute(f"DROP TRIGGER {_quote(name)} ON {_quote(table)}")
+        cursor.execute(f"ALTER TABLE {_quote(table)} RENAME TO {_quote(legacy)}")
+        cursor.execute(
+            f"ALTER TABLE {_quote(legacy)} ALTER COLUMN id DROP IDENTITY IF EXISTS"
+        )
+        cursor.execute(
+            "SELECT conname FROM pg_constraint "
+            "WHERE contype = 'p' AND conrelid = %s::regclass",
+            [legacy],
+        )
+        (primary_key,) = cursor.fetchone()
+        cursor.execute(
+            f"ALTER TABLE {_quote(legacy)} DROP CONSTRAINT {_quote(primary_key)}"
+        )
+
+        cursor.execute(
+            f"CREATE TABLE {_quote(table)} (LIKE {_quote(legacy)} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+        sequence = f"{table}_id_seq"
+        cursor.execute(f"CREATE SEQUENCE {_quote(sequence)} OWNED BY {_quote(table)}.id")
+        cursor.execute(
+            f"SELECT setval(%s, (SELECT COALESCE(MAX(id), 0) + 1 FROM {_quote(legacy)}), false)",
+            [sequence],
+        )
+        cursor.execute(
+            f"ALTER TABLE {_quote(table)} ALTER COLUMN id SET DEFAULT nextval(%s)",
+            [sequence],
+        )
+        cursor.execute(
+            f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(table + '_pkey')} "
+            f"PRIMARY KEY (id, created_at)"
+        )
+
+        # Keep Django's index names on the parent, the legacy ones get attached
+        for name, definition, unique in indexes:
+            if name == f"{table}_id_created_uniq":
+                continue
+            if unique:
+                log(f"Skipping unique index {name}, it lacks the partition key")
+                continue
+            columns = definition.split(" USING ", 1)[1]
+            cursor.execute(f"ALTER INDEX {_quote(name)} RENAME TO {_quote(name + '_legacy')}")
+            cursor.execute(f"CREATE INDEX {_quote(name)} ON {_quote(table)} USING {columns}")
+
+        cursor.execute(
+            f"ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(legacy)} "
+            f"FOR VALUES FROM (MINVALUE) TO (%s)",
+            [boundary],
+        )
+        for _, definition in triggers:
+            cursor.execute(definition)
+        for referencing, constraint, column in foreign_keys:
+            for statement in foreign_key_trigger_sql(
+                table, referencing, constraint, column
+            ):
+                cursor.execute(statement)
+    invalidate_boundaries(table)
+    log(f"{table} partitioned, rows before {boundary} stay in {legacy}")
+
+
+def create_partitions(model, months_ahead: int = None, log=print) -> list:
+    """Creates the monthly partitions up to `months_ahead` months from now"""
+    _ensure_postgresql()
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+    table = model._meta.db_table
+    if not is_partitioned(table):
+        log(f"{table} is not partitioned, run partition_tables --convert first")
+        return []
+
+    bounds = [upper for _, upper in list_partitions(table) if upper]
+    current = month_start(timezone.now().date())
+    month = max([current, *bounds])
+    last = add_months(current, months_ahead)
+    created = []
+
+    with connection.cursor() as cursor:
+        while month <= last:
+            name = partition_name(table, month)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {_quote(name)} PARTITION OF {_quote(table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)],
+            )
+            created.append(name)
+            log(f"Partition {name} ready")
+            month = add_months(month, 1)
+    return created
+
+
+def _export_query(model, partition: str) -> str:
+    if model is Post:
+        return (
+            f"SELECT (row_to_json(p)::jsonb || jsonb_build_object("
+            f"'tags', ARRAY(SELECT tag_id FROM post_post_tags WHERE post_id = p.id), "
+            f"'likes', ARRAY(SELECT user_id FROM post_post_likes WHERE post_id = p.id)"
+            f"))::text FROM {_quote(partition)} p ORDER BY p.id"
+        )
+    return f"SELECT row_to_json(p)::text FROM {_quote(partition)} p ORDER BY p.id"
+
+
+def _write_chunks(rows) -> tuple:
+    """
+    Writes JSON rows ordered by id gzipped into a temporary file, a gzip
+    member per ARCHIVE_CHUNK_ROWS rows; the members read back as one gzip
+    stream. Returns the file, the row count and the (min_id, max_id,
+    offset, size) of each member.
+    """
+    archive_file = tempfile.TemporaryFile()
+    row_count = 0
+    chunks = []
+    rows = iter(rows)
+    while batch := list(islice(rows, ARCHIVE_CHUNK_ROWS)):
+        ids = [json.loads(row)["id"] for row in batch]
+        offset = archive_file.tell()
+        archive_file.write(gzip.compress("".join(f"{row}\n" for row in batch).encode()))
+        chunks.append((min(ids), max(ids), offset, archive_file.tell() - offset))
+        row_count += len(batch)
+
+    archive_file.seek(0)
+    return archive_file, row_count, chunks
+
+
+def _export_partition(model, name: str) -> tuple:
+    """Writes the partition rows in gzipped chunks into a temporary file"""
+    with transaction.atomic(), connection.chunked_cursor() as cursor:
+        cursor.execute(_export_query(model, name))
+        return _write_chunks(row for (row,) in cursor)
+
+
+def _create_chunks(archived: ArchivedPartition, chunks: list) -> None:
+    ArchivedChunk.objects.bulk_create(
+        ArchivedChunk(
+            partition=archived, min_id=min_id, max_id=max_id, offset=offset, size=size
+        )
+        for min_id, max_id, offset, size in chunks
+    )
+
+
+def archive_partition(model, name: str, month: date, log=print):
+    """Detaches a monthly partition, writes it gzipped to storage and drops it"""
+    table = model._meta.db_table
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {_quote(table)} DETACH PARTITION {_quote(name)}")
+
+    try:
+        archive_file, row_count, chunks = _export_partition(model, name)
+        with archive_file:
+            path = default_storage.save(
+                f"archive/{table}/{month:%Y-%m}.ndjson.gz", File(archive_file)
+            )
+    except Exception:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(name)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)],
+            )
+        raise
+
+    with transaction.atomic():
+        archived = ArchivedPartition.objects.create(
+            table=table,
+            month=month,
+            path=path,
+            row_count=row_count,
+            min_id=min(chunk[0] for chunk in chunks) if chunks else None,
+            max_id=max(chunk[1] for chunk in chunks) if chunks else None,
+        )
+        _create_chunks(archived, chunks)
+        with connection.cursor() as cursor:
+            if model is Post:
+                for through in ("post_post_tags", "post_post_likes"):
+                    cursor.execute(
+                        f"DELETE FROM {through} WHERE post_id IN "
+                        f"(SELECT id FROM {_quote(name)})"
+                    )
+            cursor.execute(f"DROP TABLE {_quote(name)}")
+    invalidate_boundaries(table)
+
+    log(f"Archived {row_count} rows of {name} to {path}")
+    return archived
+
+
+def archive_partitions(model, older_than_months: int = None, log=print) -> list:
+    """Archives the monthly partitions which ended more than N months ago"""
+    _ensure_postgresql()
+    if older_than_months is None:
+        older_than_months = settings.PARTITION_ARCHIVE_AFTER_MONTHS
+    table = model._meta.db_table
+    if not is_partitioned(table):
+        return []
+
+    for archived in ArchivedPartition.objects.filter(
+        table=table, row_count__gt=0, chunks__isnull=True
+    ):
+        index_archive(archived, log=log)
+
+    cutoff = add_months(month_start(timezone.now().date()), -older_than_months)
+    archived = []
+    for name, upper in list_partitions(table):
+        # only the monthly partitions, the legacy one spans an open range
+        if not name.startswith(f"{table}_p") or upper is None or upper > cutoff:
+            continue
+        month = add_months(upper, -1)
+        archived.append(archive_partition(model, name, month, log=log))
+    return archived
+
+
+def archived_rows(archived: ArchivedPartition):
+    """Streams the rows of an archived partition back from storage"""
+    with default_storage.open(archived.path, "rb") as raw:
+        with gzip.open(raw, "rt") as archive:
+            for line in archive:
+                yield json.loads(line)
+
+
+def index_archive(archived: ArchivedPartition, log=print) -> None:
+    """Rewrites an archive written as a single gzip member in indexed chunks"""
+    rows = (json.dumps(row) for row in archived_rows(archived))
+    archive_file, _, chunks = _write_chunks(rows)
+    with archive_file:
+        path = default_storage.save(archived.path, File(archive_file))
+
+    previous = archived.path
+    with transaction.atomic():
+        ArchivedPartition.objects.filter(pk=archived.pk).update(path=path)
+        _create_chunks(archived, chunks)
+        transaction.on_commit(lambda: default_storage.delete(previous))
+    archived.path = path
+    log(f"Indexed {len(chunks)} chunks of {path}")
+
+
+def _read_chunk(archived: ArchivedPartition, chunk: ArchivedChunk):
+    with default_storage.open(archived.path, "rb") as raw:
+        raw.seek(chunk.offset)
+        data = gzip.decompress(raw.read(chunk.size))
+    return (json.loads(line) for line in data.decode().splitlines())
+
+
+def find_archived_row(model, pk: int):
+    """
+    Returns the archived row of the model with specified id, if any. Reads
+    the single chunk whose id range may hold it, an id falling between two
+    chunks is known to be missing without reading the archive.
+    """
+    candidates = ArchivedPartition.objects.filter(
+        table=model._meta.db_table, min_id__lte=pk, max_id__gte=pk
+    )
+    for archived in candidates:
+        chunk = archived.chunks.filter(min_id__lte=pk).order_by("-min_id").first()
+        if chunk is None:
+            # written before chunks, until archive_partitions indexes it
+            rows = archived_rows(archived)
+        elif chunk.max_id >= pk:
+            rows = _read_chunk(archived, chunk)
+        else:
+            continue
+        for row in rows:
+            if row["id"] == pk:
+                return row
+    return None
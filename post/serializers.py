@@ -1,6 +1,11 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
 from rest_framework import serializers
 
-from post.models import Tag, Comment, Post
+from post.models import Tag, Comment, Post, ScheduledPost
+from post.staging import discard_staged, stage_upload
+from social_media_api.images import RenditionsField
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -51,6 +56,7 @@ class PostSerializer(serializers.ModelSerializer):
 
 
 class PostListSerializer(PostSerializer):
+    image_renditions = RenditionsField()
     tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field="name")
     count_likes = serializers.IntegerField(read_only=True)
     creator = serializers.HyperlinkedRelatedField(
@@ -65,6 +71,9 @@ class PostListSerializer(PostSerializer):
         fields = (
             "id",
             "image",
+            "image_width",
+            "image_height",
+            "image_renditions",
             "title",
             "content",
             "creator",
@@ -76,6 +85,7 @@ class PostListSerializer(PostSerializer):
 
 
 class PostDetailSerializer(serializers.ModelSerializer):
+    image_renditions = RenditionsField()
     comments = CommentSerializer(many=True, read_only=True)
     tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field="name")
     count_likes = serializers.IntegerField(read_only=True)
@@ -90,6 +100,9 @@ class PostDetailSerializer(serializers.ModelSerializer):
         fields = (
             "id",
             "image",
+            "image_width",
+            "image_height",
+            "image_renditions",
             "title",
             "content",
             "creator",
@@ -107,15 +120,111 @@ class PostLikeSerializer(serializers.ModelSerializer):
 
 
 class PostScheduleSerializer(serializers.ModelSerializer):
-    scheduled_time = serializers.DateTimeField()
+    scheduled_time = serializers.DateTimeField(
+        source="publish_at",
+        input_formats=["%Y-%m-%dT%H:%M", "iso-8601"],
+    )
+    image = serializers.ImageField(write_only=True, required=False)
+    has_image = serializers.SerializerMethodField()
 
     class Meta:
-        model = Post
+        model = ScheduledPost
         fields = (
             "id",
             "scheduled_time",
             "image",
+            "has_image",
             "title",
             "content",
             "tags",
+            "status",
+            "created_at",
+        )
+        read_only_fields = ("status",)
+
+    def get_has_image(self, scheduled) -> bool:
+        return bool(scheduled.image_path)
+
+    def _stage_image(self, validated_data, publish_at) -> None:
+        image = validated_data.pop("image", None)
+        if image is not None:
+            validated_data["image_path"] = stage_upload(image, publish_at)
+            validated_data["image_content_type"] = image.content_type or ""
+
+    def create(self, validated_data):
+        self._stage_image(validated_data, validated_data["publish_at"])
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        self._stage_image(
+            validated_data, validated_data.get("publish_at", instance.publish_at)
+        )
+        tags = validated_data.pop("tags", None)
+        with transaction.atomic():
+            # publish_scheduled_posts claims due posts under the same lock
+            current = (
+                ScheduledPost.objects.select_for_update()
+                .filter(pk=instance.pk)
+                .values("status", "image_path")
+                .first()
+            )
+            if current is None or current["status"] != ScheduledPost.Status.PENDING:
+                discard_staged(validated_data.get("image_path"))
+                raise serializers.ValidationError(
+                    "The post is no longer waiting to be published."
+                )
+            for field, value in validated_data.items():
+                setattr(instance, field, value)
+            instance.save(update_fields=list(validated_data))
+            if tags is not None:
+                instance.tags.set(tags)
+
+        previous_image = current["image_path"]
+        if "image_path" in validated_data and previous_image:
+            transaction.on_commit(lambda: discard_staged(previous_image))
+        return instance
+
+
+class ArchivedPostSerializer(serializers.Serializer):
+    """Renders a post row read back from partition archive storage"""
+
+    id = serializers.IntegerField()
+    image = serializers.SerializerMethodField()
+    image_renditions = RenditionsField()
+    title = serializers.CharField()
+    content = serializers.CharField()
+    creator = serializers.SerializerMethodField()
+    tags = serializers.SerializerMethodField()
+    created_at = serializers.DateTimeField()
+    count_likes = serializers.SerializerMethodField()
+    comments = serializers.SerializerMethodField()
+    archived = serializers.SerializerMethodField()
+
+    def _absolute_url(self, url: str) -> str:
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def get_image(self, row):
+        if not row.get("image"):
+            return None
+        return self._absolute_url(default_storage.url(row["image"]))
+
+    def get_creator(self, row):
+        return self._absolute_url(reverse("user:manage", args=[row["creator_id"]]))
+
+    def get_tags(self, row):
+        return list(
+            Tag.objects.filter(id__in=row.get("tags", [])).values_list(
+                "name", flat=True
+            )
         )
+
+    def get_count_likes(self, row):
+        return len(row.get("likes", []))
+
+    def get_comments(self, row):
+        comments = Comment.objects.filter(post_id=row["id"])
+        return CommentSerializer(comments, many=True).data
+
+    def get_archived(self, row):
+        return True
@@ -0,0 +1,63 @@
+"""
+Uploads of scheduled posts wait in media storage until they are published,
+so only their path travels through the Celery broker. The due time is part
+of the name, which lets stale files be found without a database.
+"""
+
+import mimetypes
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from post.models import ScheduledPost
+
+STAGING_DIR = "uploads/staged"
+
+
+def stage_upload(upload, publish_at: datetime) -> str:
+    """Streams the upload into storage and returns its path"""
+    _, extension = os.path.splitext(upload.name)
+    if not extension:
+        extension = mimetypes.guess_extension(upload.content_type or "") or ""
+    name = f"{int(publish_at.timestamp())}-{uuid.uuid4()}{extension.lower()}"
+    return default_storage.save(f"{STAGING_DIR}/{name}", upload)
+
+
+def discard_staged(path) -> None:
+    if path and default_storage.exists(path):
+        default_storage.delete(path)
+
+
+def staged_due_timestamp(path: str):
+    timestamp = os.path.basename(path).split("-", 1)[0]
+    return int(timestamp) if timestamp.isdigit() else None
+
+
+def clean_staged_uploads() -> int:
+    """Deletes staged files whose post should have been published long ago"""
+    if not default_storage.exists(STAGING_DIR):
+        return 0
+    deadline = timezone.now() - timedelta(
+        seconds=settings.STAGED_UPLOAD_GRACE_SECONDS
+    )
+    overdue = []
+    for name in default_storage.listdir(STAGING_DIR)[1]:
+        due = staged_due_timestamp(name)
+        if due is not None and due < deadline.timestamp():
+            overdue.append(f"{STAGING_DIR}/{name}")
+    # a schedule moved to a later time still holds its upload
+    pending = set(
+        ScheduledPost.objects.filter(image_path__in=overdue).values_list(
+            "image_path", flat=True
+        )
+    )
+    removed = 0
+    for path in overdue:
+        if path not in pending:
+            default_storage.delete(path)
+            removed += 1
+    return removed
@@ -0,0 +1,110 @@
+"""
+Live feed of new posts.
+
+Every post created through the API or the create_post task is published to
+a single Redis pub/sub channel. Each ASGI process holds one subscription to
+it and hands the events to the SSE connections that follow the post's
+creator, so an idle stream costs an asyncio queue rather than a query.
+"""
+
+import asyncio
+import json
+import logging
+from functools import lru_cache
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+POST_CHANNEL = "post:created"
+
+
+def post_summary(post) -> dict:
+    return {
+        "id": post.id,
+        "creator": post.creator_id,
+        "title": post.title,
+        "created_at": post.created_at.isoformat(),
+    }
+
+
+@lru_cache
+def _publisher():
+    return redis.Redis.from_url(settings.POST_STREAM_REDIS_URL)
+
+
+def publish_post(post) -> None:
+    """Announces a new post, a no-op without POST_STREAM_REDIS_URL"""
+    publish_posts([post])
+
+
+def publish_posts(posts) -> None:
+    """Announces a batch of new posts in one round trip"""
+    if not settings.POST_STREAM_REDIS_URL or not posts:
+        return
+    try:
+        pipeline = _publisher().pipeline(transaction=False)
+        for post in posts:
+            pipeline.publish(POST_CHANNEL, json.dumps(post_summary(post)))
+        pipeline.execute()
+    except redis.RedisError:
+        logger.exception("Could not publish %d posts", len(posts))
+
+
+class PostStreamHub:
+    """Fans the events of one Redis subscription out to local listeners"""
+
+    queue_size = 100
+
+    def __init__(self):
+        self.listeners = {}
+        self.reader = None
+
+    def subscribe(self, creator_ids) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        for creator_id in creator_ids:
+            self.listeners.setdefault(creator_id, set()).add(queue)
+        if settings.POST_STREAM_REDIS_URL and (
+            self.reader is None or self.reader.done()
+        ):
+            self.reader = asyncio.create_task(self.listen())
+        return queue
+
+    def unsubscribe(self, queue, creator_ids) -> None:
+        for creator_id in creator_ids:
+            queues = self.listeners.get(creator_id)
+            if queues is None:
+                continue
+            queues.discard(queue)
+            if not queues:
+                del self.listeners[creator_id]
+
+    def dispatch(self, event: dict) -> None:
+        for queue in self.listeners.get(event["creator"], ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # a stalled client misses events, it catches up on reconnect
+                pass
+
+    async def listen(self) -> None:
+        client = redis.asyncio.Redis.from_url(settings.POST_STREAM_REDIS_URL)
+        while self.listeners:
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(POST_CHANNEL)
+                    while self.listeners:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=1.0
+                        )
+                        if message is not None:
+                            self.dispatch(json.loads(message["data"]))
+            except redis.RedisError:
+                logger.exception("Post stream subscription lost, reconnecting")
+                await asyncio.sleep(1)
+        await client.aclose()
+
+
+hub = PostStreamHub()
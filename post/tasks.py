@@ -1,22 +1,372 @@
+import base64
+import logging
+import mimetypes
+import os
+from datetime import timedelta
+from functools import partial
+
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files import File
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from post import counters
+from post.models import Post, ScheduledPost, Tag
+from post.staging import (
+    STAGING_DIR,
+    clean_staged_uploads,
+    discard_staged,
+    stage_upload,
+)
+from post.streams import publish_posts
+from social_media_api.images import generate_renditions
+
+logger = logging.getLogger(__name__)
+
+
+POST_ENTRY_KEYS = ("creator_id", "tag_ids", "image_path", "image_content_type")
+
+
+def build_posts(entries: list) -> list:
+    """Unsaved posts of the entries, see bulk_create_posts"""
+    return [
+        Post(
+            creator_id=entry["creator_id"],
+            **{
+                key: value
+                for key, value in entry.items()
+                if key not in POST_ENTRY_KEYS
+            },
+        )
+        for entry in entries
+    ]
+
 
-from post.models import Post, Tag
+def copy_staged_images(posts: list, entries: list) -> None:
+    """
+    Copies the staged images of the entries into their posts' image fields.
+    Slow on remote storage, so best done while no row is locked.
+    """
+    try:
+        for post, entry in zip(posts, entries):
+            if entry.get("image_path"):
+                _copy_staged_image(
+                    post, entry["image_path"], entry.get("image_content_type")
+                )
+    except Exception:
+        delete_images(posts)
+        raise
+
+
+def delete_images(posts) -> None:
+    for post in posts:
+        if post.image:
+            post.image.delete(save=False)
+
+
+def insert_posts(posts: list, entries: list) -> list:
+    """
+    Inserts the posts built for the entries, with their tags, in a fixed
+    number of queries whatever the batch size. Posts of deleted creators
+    are skipped and their copied images deleted, unknown tags are ignored.
+    Returns the inserted posts.
+    """
+    creator_ids = set(
+        get_user_model()
+        .objects.filter(id__in={entry["creator_id"] for entry in entries})
+        .order_by()
+        .values_list("id", flat=True)
+    )
+    tag_ids = set(
+        Tag.objects.filter(
+            id__in={tag_id for entry in entries for tag_id in entry["tag_ids"]}
+        ).values_list("id", flat=True)
+    )
+
+    kept = [
+        (post, entry)
+        for post, entry in zip(posts, entries)
+        if entry["creator_id"] in creator_ids
+    ]
+    delete_images(
+        post
+        for post, entry in zip(posts, entries)
+        if entry["creator_id"] not in creator_ids
+    )
+    Post.objects.bulk_create(
+        [post for post, _ in kept], batch_size=settings.POST_BULK_BATCH_SIZE
+    )
+    Post.tags.through.objects.bulk_create(
+        (
+            Post.tags.through(post_id=post.id, tag_id=tag_id)
+            for post, entry in kept
+            for tag_id in entry["tag_ids"]
+            if tag_id in tag_ids
+        ),
+        batch_size=settings.POST_BULK_BATCH_SIZE,
+    )
+    return [post for post, _ in kept]
+
+
+def bulk_create_posts(entries: list) -> list:
+    """
+    Creates the posts described by the entries, each one a dict of post
+    fields plus creator_id, tag_ids and optionally a staged image_path and
+    image_content_type. Runs a fixed number of queries whatever the batch
+    size; meant to be called inside a transaction. Entries of deleted
+    creators are skipped (their staged images are left to the caller),
+    unknown tags are ignored.
+    """
+    posts = build_posts(entries)
+    copy_staged_images(posts, entries)
+    try:
+        return insert_posts(posts, entries)
+    except Exception:
+        delete_images(posts)
+        raise
+
+
+@shared_task
+def create_posts(entries: list) -> list:
+    """Creates a batch of posts atomically, see bulk_create_posts"""
+    staged = [entry.get("image_path") for entry in entries]
+    try:
+        with transaction.atomic():
+            posts = bulk_create_posts(entries)
+            transaction.on_commit(partial(_after_publish, posts, staged))
+    except Exception:
+        # a failed batch doesn't keep its uploads either
+        for image_path in staged:
+            discard_staged(image_path)
+        raise
+    return [post.id for post in posts]
 
 
 @shared_task
-def create_post(validated_data, creator_id, tag_ids, image_data) -> None:
-    creator = get_user_model().objects.get(id=creator_id)
-    post = Post.objects.create(
-        creator=creator,
-        **validated_data,
+def create_post(
+    validated_data, creator_id, tag_ids, image_path=None, content_type=None
+) -> None:
+    """
+    Creates a single post, see create_posts. Tasks queued before uploads
+    were staged carry the base64 encoded image instead of a staged path.
+    """
+    if image_path and (
+        isinstance(image_path, bytes) or not image_path.startswith(STAGING_DIR)
+    ):
+        legacy = ContentFile(base64.b64decode(image_path), name="image.png")
+        image_path = stage_upload(legacy, timezone.now())
+        content_type = content_type or "image/png"
+    create_posts(
+        [
+            {
+                **validated_data,
+                "creator_id": creator_id,
+                "tag_ids": tag_ids,
+                "image_path": image_path,
+                "image_content_type": content_type,
+            }
+        ]
+    )
+
+
+@shared_task
+def publish_scheduled_posts() -> int:
+    """
+    Publishes every due scheduled post, a batch at a time. A batch is first
+    claimed, so its images are copied while none of its rows stays locked,
+    then inserted in one transaction. When that fails each post is retried
+    in a savepoint of its own; a post which fails counts an attempt and is
+    left for the next run, or marked failed after
+    SCHEDULED_POST_MAX_ATTEMPTS attempts.
+    """
+    published = 0
+    failed = set()
+    while True:
+        due, claimed_at = _claim_due_posts(exclude=failed)
+        if not due:
+            return published
+        posts, batch_failed = _publish_claimed(due, claimed_at)
+        published += len(posts)
+        failed.update(batch_failed)
+
+
+def _claim_due_posts(exclude) -> tuple:
+    """
+    Marks a batch of due scheduled posts as being published, taking over
+    the claims of publishers which died on theirs
+    """
+    Status = ScheduledPost.Status
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.SCHEDULED_POST_CLAIM_SECONDS)
+    with transaction.atomic():
+        due = list(
+            ScheduledPost.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Status.PENDING, publish_at__lte=now)
+                | Q(status=Status.PUBLISHING, claimed_at__lte=stale)
+            )
+            .exclude(id__in=exclude)
+            .order_by("publish_at", "id")
+            .prefetch_related("tags")[: settings.SCHEDULED_POST_BATCH_SIZE]
+        )
+        ScheduledPost.objects.filter(
+            id__in=[scheduled.id for scheduled in due]
+        ).update(status=Status.PUBLISHING, claimed_at=now)
+    return due, now
+
+
+def _publish_claimed(due: list, claimed_at) -> tuple:
+    """Publishes the claimed posts, returns them and the ids which failed"""
+    entries = [
+        {
+            "creator_id": scheduled.creator_id,
+            "title": scheduled.title,
+            "content": scheduled.content,
+            "tag_ids": [tag.id for tag in scheduled.tags.all()],
+            "image_path": scheduled.image_path,
+            "image_content_type": scheduled.image_content_type,
+        }
+        for scheduled in due
+    ]
+    posts = build_posts(entries)
+    failed = set()
+    for scheduled, post, entry in zip(due, posts, entries):
+        try:
+            copy_staged_images([post], [entry])
+        except Exception:
+            logger.exception(
+                "Could not copy the image of scheduled post %d", scheduled.id
+            )
+            failed.add(scheduled.id)
+
+    with transaction.atomic():
+        # cancelled meanwhile, or taken over after the claim went stale
+        owned = set(
+            ScheduledPost.objects.select_for_update()
+            .filter(
+                id__in=[scheduled.id for scheduled in due],
+                status=ScheduledPost.Status.PUBLISHING,
+                claimed_at=claimed_at,
+            )
+            .values_list("id", flat=True)
+        )
+        failed &= owned
+        batch = [
+            item
+            for item in zip(due, posts, entries)
+            if item[0].id in owned and item[0].id not in failed
+        ]
+        try:
+            with transaction.atomic():
+                published = insert_posts(
+                    [post for _, post, _ in batch], [entry for _, _, entry in batch]
+                )
+        except Exception:
+            published = []
+            for scheduled, post, entry in batch:
+                # the batch's inserts were rolled back along with their ids
+                post.pk = None
+                try:
+                    with transaction.atomic():
+                        published += insert_posts([post], [entry])
+                except Exception:
+                    logger.exception(
+                        "Could not publish scheduled post %d", scheduled.id
+                    )
+                    failed.add(scheduled.id)
+
+        done = [scheduled for scheduled, _, _ in batch if scheduled.id not in failed]
+        ScheduledPost.objects.filter(
+            id__in=[scheduled.id for scheduled in done]
+        ).delete()
+        _count_failed_attempts(failed)
+
+        staged = [scheduled.image_path for scheduled in done]
+        transaction.on_commit(partial(_after_publish, published, staged))
+
+    delete_images(
+        post
+        for scheduled, post in zip(due, posts)
+        if scheduled.id not in owned or scheduled.id in failed
     )
-    if image_data:
-        image = ContentFile(image_data, name="image.png")
-        post.image = image
+    return published, failed
 
-    for tag_id in tag_ids:
-        tag = Tag.objects.get(id=tag_id)
-        post.tags.add(tag)
-    post.save()
+
+def _count_failed_attempts(ids) -> None:
+    """Puts the posts back in the due set, or marks them failed at last"""
+    Status = ScheduledPost.Status
+    ScheduledPost.objects.filter(id__in=ids).update(
+        attempts=F("attempts") + 1,
+        status=Case(
+            When(
+                attempts__gte=settings.SCHEDULED_POST_MAX_ATTEMPTS - 1,
+                then=Value(Status.FAILED),
+            ),
+            default=Value(Status.PENDING),
+        ),
+        claimed_at=None,
+    )
+
+
+def _copy_staged_image(post, image_path, content_type) -> None:
+    _, extension = os.path.splitext(image_path)
+    if not extension:
+        extension = mimetypes.guess_extension(content_type or "") or ""
+    with default_storage.open(image_path) as staged:
+        # copied chunk by chunk by the storage, never read whole
+        post.image.save(f"image{extension}", File(staged), save=False)
+
+
+def _after_publish(posts, staged) -> None:
+    for image_path in staged:
+        discard_staged(image_path)
+    publish_posts(posts)
+    for post in posts:
+        if post.image:
+            generate_post_renditions.delay(post.id)
+
+
+@shared_task
+def generate_post_renditions(post_id) -> None:
+    post = Post.objects.filter(id=post_id).first()
+    if post is not None:
+        generate_renditions(post, "image")
+
+
+@shared_task
+def create_future_partitions() -> None:
+    from post import partitioning
+
+    if connection.vendor != "postgresql":
+        return
+    for model in partitioning.PARTITIONED_MODELS:
+        partitioning.create_partitions(model, log=logger.info)
+
+
+@shared_task
+def archive_old_partitions() -> None:
+    from post import partitioning
+
+    if connection.vendor != "postgresql":
+        return
+    for model in partitioning.PARTITIONED_MODELS:
+        partitioning.archive_partitions(model, log=logger.info)
+
+
+@shared_task
+def remove_stale_staged_uploads() -> None:
+    removed = clean_staged_uploads()
+    if removed:
+        logger.info("Removed %d stale staged uploads", removed)
+
+
+@shared_task
+def rebalance_like_counters() -> None:
+    hot, demoted = counters.rebalance()
+    if demoted:
+        logger.info("Demoted the like counters of posts %s", demoted)
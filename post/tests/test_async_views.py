@@ -0,0 +1,138 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from post.models import Comment, Post, Tag
+from social_media_api.async_api import token_cache_key
+
+ASYNC_POST_URL = reverse("post-async:post-list")
+
+
+class AsyncPostApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.author = get_user_model().objects.create_user(
+            "author@test.com", "testpass"
+        )
+        self.user.follows.add(self.author)
+        self.token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {self.token.key}"}
+
+        tag = Tag.objects.create(name="django")
+        for i in range(12):
+            post = Post.objects.create(
+                title=f"Post {i}", content="Some text...", creator=self.author
+            )
+            post.tags.add(tag)
+            post.likes.add(self.user)
+        self.post = post
+        Comment.objects.create(
+            content="Test Comment", writer=self.user, post=self.post
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    async def test_auth_required(self):
+        res = await self.async_client.get(ASYNC_POST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_only_get_allowed(self):
+        res = await self.async_client.post(ASYNC_POST_URL, headers=self.headers)
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_list_matches_sync_endpoint(self):
+        res = await self.async_client.get(
+            ASYNC_POST_URL, {"page": 2, "title": "post"}, headers=self.headers
+        )
+        expected = await sync_to_async(self.client.get)(
+            reverse("post:post-list"), {"page": 2, "title": "post"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["count"], expected.json()["count"])
+        self.assertEqual(res.json()["results"], expected.json()["results"])
+        self.assertIsNotNone(res.json()["previous"])
+
+    async def test_invalid_pages_not_found(self):
+        for page in (3, 0, "abc"):
+            with self.subTest(page=page):
+                res = await self.async_client.get(
+                    ASYNC_POST_URL, {"page": page}, headers=self.headers
+                )
+                expected = await sync_to_async(self.client.get)(
+                    reverse("post:post-list"), {"page": page}
+                )
+
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+                self.assertEqual(res.json(), expected.json())
+
+    async def test_last_page(self):
+        res = await self.async_client.get(
+            ASYNC_POST_URL, {"page": "last"}, headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()["results"]), 2)
+
+    async def test_token_cache_holds_user_id_only(self):
+        await self.async_client.get(ASYNC_POST_URL, headers=self.headers)
+
+        self.assertEqual(
+            await cache.aget(token_cache_key(self.token.key)), self.user.id
+        )
+
+    async def test_detail_matches_sync_endpoint(self):
+        res = await self.async_client.get(
+            reverse("post-async:post-detail", args=[self.post.id]),
+            headers=self.headers,
+        )
+        expected = await sync_to_async(self.client.get)(
+            reverse("post:post-detail", args=[self.post.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), expected.json())
+
+    async def test_detail_not_found(self):
+        res = await self.async_client.get(
+            reverse("post-async:post-detail", args=[0]), headers=self.headers
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_followings_matches_sync_endpoint(self):
+        res = await self.async_client.get(
+            reverse("post-async:post-followings-posts"), headers=self.headers
+        )
+        expected = await sync_to_async(self.client.get)(reverse("post:post-followings-posts"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), expected.json())
+
+    async def test_followings_invalid_since(self):
+        res = await self.async_client.get(
+            reverse("post-async:post-followings-posts"),
+            {"since": "yesterday"},
+            headers=self.headers,
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_comments_match_sync_endpoint(self):
+        res = await self.async_client.get(
+            reverse("post-async:post-comments", args=[self.post.id]),
+            headers=self.headers,
+        )
+        expected = await sync_to_async(self.client.get)(
+            reverse("post:post-comments", args=[self.post.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), expected.json())
@@ -0,0 +1,60 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.test import TestCase
+
+from post.models import Post, Tag
+from post.tasks import create_posts
+
+
+class CreatePostsTaskTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.tags = [Tag.objects.create(name=f"Tag {index}") for index in range(3)]
+
+    def entries(self, count: int) -> list:
+        return [
+            {
+                "title": f"Post {index}",
+                "content": "...",
+                "creator_id": self.user.id,
+                "tag_ids": [tag.id for tag in self.tags],
+            }
+            for index in range(count)
+        ]
+
+    def test_query_count_independent_of_batch_size(self):
+        # savepoint, creators, tags, posts, tag rows, release
+        with self.assertNumQueries(6) as small:
+            create_posts(self.entries(2))
+        with self.assertNumQueries(len(small)):
+            post_ids = create_posts(self.entries(50))
+
+        self.assertEqual(Post.objects.count(), 52)
+        self.assertEqual(
+            Post.tags.through.objects.filter(post_id__in=post_ids).count(), 150
+        )
+
+    def test_unknown_tags_and_creators_are_skipped(self):
+        entries = self.entries(2)
+        entries[0]["tag_ids"].append(0)
+        entries[1]["creator_id"] = 0
+
+        post_ids = create_posts(entries)
+
+        self.assertEqual(len(post_ids), 1)
+        self.assertEqual(
+            list(Post.objects.get(id=post_ids[0]).tags.all()), self.tags
+        )
+
+    def test_failure_leaves_no_partial_posts(self):
+        with patch.object(
+            Post.tags.through.objects, "bulk_create", side_effect=IntegrityError
+        ):
+            with self.assertRaises(IntegrityError):
+                create_posts(self.entries(3))
+
+        self.assertFalse(Post.objects.exists())
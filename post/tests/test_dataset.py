@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+
+from post.dataset import PASSWORD, DatasetGenerator
+from post.models import Comment, Post, Tag
+
+
+def generate(**options):
+    options = {"users": 200, "tags": 20, "log": lambda message: None, **options}
+    generator = DatasetGenerator(**options)
+    return generator, generator.generate()
+
+
+class DatasetGeneratorTests(TestCase):
+    def follow_graph(self, first_user_id):
+        follows = get_user_model().follows.through.objects.values_list(
+            "from_user_id", "to_user_id"
+        )
+        return {
+            (follower - first_user_id, followed - first_user_id)
+            for follower, followed in follows
+        }
+
+    def test_rows_written(self):
+        generator, counts = generate()
+
+        self.assertEqual(get_user_model().objects.count(), 200)
+        self.assertEqual(Tag.objects.count(), 20)
+        self.assertEqual(Post.objects.count(), counts["posts"])
+        self.assertEqual(Comment.objects.count(), counts["comments"])
+        self.assertEqual(Post.likes.through.objects.count(), counts["likes"])
+        self.assertEqual(Post.tags.through.objects.count(), counts["post tags"])
+        self.assertGreater(counts["follows"], 0)
+        self.assertFalse(
+            get_user_model()
+            .follows.through.objects.filter(from_user_id=F("to_user_id"))
+            .exists()
+        )
+        self.assertTrue(get_user_model().objects.first().check_password(PASSWORD))
+
+    def test_comments_follow_their_post(self):
+        generate()
+
+        self.assertFalse(
+            Comment.objects.filter(created_at__lt=F("post__created_at")).exists()
+        )
+
+    def test_follow_graph_is_skewed(self):
+        generate(users=500)
+
+        followers = sorted(
+            get_user_model()
+            .objects.annotate(total=Count("followers"))
+            .values_list("total", flat=True),
+            reverse=True,
+        )
+        # the top 5% of accounts gather a large share of the follows
+        self.assertGreater(sum(followers[:25]), sum(followers) * 0.3)
+
+    def test_deterministic_for_seed(self):
+        first, _ = generate(seed=7)
+        graph = self.follow_graph(first.user_ids[0])
+        titles = list(Post.objects.order_by("id").values_list("title", flat=True))
+
+        second, _ = generate(seed=7)
+
+        self.assertEqual(
+            {edge for edge in self.follow_graph(second.user_ids[0]) if min(edge) >= 0},
+            graph,
+        )
+        self.assertEqual(
+            list(
+                Post.objects.filter(id__gte=second.first_post_id)
+                .order_by("id")
+                .values_list("title", flat=True)
+            ),
+            titles,
+        )
+
+    def test_new_rows_can_be_created_afterwards(self):
+        generate()
+
+        user = get_user_model().objects.create_user("new@test.com", "testpass")
+        tag = Tag.objects.create(name="new")
+
+        self.assertEqual(user.id, get_user_model().objects.latest("id").id)
+        self.assertEqual(tag.id, Tag.objects.latest("id").id)
+
+    def test_command(self):
+        out = StringIO()
+
+        call_command("generate_dataset", users=20, tags=5, stdout=out)
+
+        self.assertEqual(get_user_model().objects.count(), 20)
+        self.assertIn("20 users", out.getvalue())
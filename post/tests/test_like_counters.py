@@ -0,0 +1,122 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from post import counters
+from post.models import LikeCounterShard, Post
+
+
+def sample_user(index: int):
+    return get_user_model().objects.create_user(
+        f"user{index}@test.com", "testpass", username=f"user{index}"
+    )
+
+
+def shard_total(post) -> int:
+    return post.like_counter_shards.aggregate(total=Sum("count"))["total"]
+
+
+@override_settings(
+    LIKE_COUNTER_SHARDS=4,
+    LIKE_COUNTER_PROMOTE_RATE=3,
+    LIKE_COUNTER_DEMOTE_RATE=2,
+)
+class LikeCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for target in ("notification.inbox.push_event", "analytics.events.push_event"):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.post = Post.objects.create(title="Hot", creator=sample_user(0))
+        self.like_url = reverse("post:post-like-post", args=[self.post.id])
+
+    def like_as(self, *users) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in users:
+                self.client.force_authenticate(user)
+                res = self.client.post(self.like_url)
+                self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def count_likes(self) -> int:
+        res = self.client.get(reverse("post:post-detail", args=[self.post.id]))
+        return res.data["count_likes"]
+
+    def test_post_promoted_at_like_rate(self):
+        users = [sample_user(index) for index in range(1, 5)]
+
+        self.like_as(*users[:2])
+        self.assertFalse(LikeCounterShard.objects.exists())
+
+        self.like_as(users[2])
+        self.assertEqual(self.post.like_counter_shards.count(), 4)
+        self.assertEqual(shard_total(self.post), 3)
+
+        self.like_as(users[3])
+        self.assertEqual(shard_total(self.post), 4)
+        self.like_as(users[3])
+        self.assertEqual(shard_total(self.post), 3)
+        self.assertEqual(self.count_likes(), 3)
+
+    def test_reads_sum_shards_of_hot_posts(self):
+        LikeCounterShard.objects.bulk_create(
+            LikeCounterShard(post=self.post, shard=shard, count=250)
+            for shard in range(4)
+        )
+        self.client.force_authenticate(self.post.creator)
+
+        self.assertEqual(self.count_likes(), 1000)
+        self.assertEqual(Post.objects.get(id=self.post.id).count_likes, 1000)
+
+    def test_rebalance_demotes_cooled_down_posts(self):
+        counters.promote(self.post.id)
+        cache.set(counters.hot_key(self.post.id), True)
+
+        hot, demoted = counters.rebalance()
+
+        self.assertEqual((hot, demoted), ([], [self.post.id]))
+        self.assertFalse(LikeCounterShard.objects.exists())
+        self.assertIsNone(cache.get(counters.hot_key(self.post.id)))
+
+    def test_rebalance_resyncs_hot_posts(self):
+        users = [sample_user(index) for index in range(1, 4)]
+        self.like_as(*users)
+        # a like the shards missed, as when racing the promotion
+        self.post.likes.add(sample_user(4))
+        cache.delete(counters.hot_key(self.post.id))
+
+        hot, demoted = counters.rebalance()
+
+        self.assertEqual((hot, demoted), ([self.post.id], []))
+        self.assertEqual(shard_total(self.post), 4)
+        self.assertTrue(cache.get(counters.hot_key(self.post.id)))
+
+    def test_like_added_concurrently_not_counted_twice(self):
+        users = [sample_user(index) for index in range(1, 4)]
+        self.like_as(*users)
+        # the same user's other request inserts the like after our delete
+        with patch("django.db.models.QuerySet.delete", return_value=(0, {})):
+            self.post.likes.add(users[0])
+            change = counters.toggle_like(self.post.id, users[0].id)
+
+        self.assertEqual(change, 0)
+        self.assertEqual(shard_total(self.post), 3)
+
+    def test_like_rolled_back_with_its_count(self):
+        user = sample_user(1)
+
+        with patch.object(counters, "count_like", side_effect=RuntimeError):
+            # the request's transaction, which the toggle joins
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                counters.toggle_like(self.post.id, user.id)
+
+        self.assertFalse(self.post.likes.exists())
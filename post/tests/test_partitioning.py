@@ -0,0 +1,288 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from post.models import ArchivedPartition, Comment, Post, Tag
+from post.partitioning import (
+    _create_chunks,
+    _write_chunks,
+    add_months,
+    archived_max_id,
+    archived_rows,
+    find_archived_row,
+    foreign_key_trigger_sql,
+    index_archive,
+    invalidate_boundaries,
+    partition_name,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class PartitionNamingTests(TestCase):
+    def test_add_months(self):
+        self.assertEqual(add_months(date(2024, 11, 1), 1), date(2024, 12, 1))
+        self.assertEqual(add_months(date(2024, 12, 1), 1), date(2025, 1, 1))
+        self.assertEqual(add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+        self.assertEqual(add_months(date(2024, 5, 1), -17), date(2022, 12, 1))
+
+    def test_partition_name(self):
+        self.assertEqual(
+            partition_name("post_post", date(2024, 3, 1)), "post_post_p2024_03"
+        )
+
+    @unittest.skipIf(connection.vendor == "postgresql", "converts the test tables")
+    def test_commands_require_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command("partition_tables")
+        with self.assertRaises(CommandError):
+            call_command("archive_partitions")
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "uses PostgreSQL triggers")
+class ForeignKeyTriggerTests(TestCase):
+    def setUp(self):
+        # as convert_table does, the test sees the triggers only
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT conname FROM pg_constraint WHERE contype = 'f' "
+                "AND conrelid = 'post_comment'::regclass "
+                "AND confrelid = 'post_post'::regclass"
+            )
+            (constraint,) = cursor.fetchone()
+            cursor.execute(f"ALTER TABLE post_comment DROP CONSTRAINT {constraint}")
+            for statement in foreign_key_trigger_sql(
+                "post_post", "post_comment", constraint, "post_id"
+            ):
+                cursor.execute(statement)
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.post = Post.objects.create(title="Post", creator=self.user)
+
+    def check_constraints(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+    def test_missing_post_rejected(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Comment.objects.create(post_id=self.post.id + 1, writer=self.user)
+            self.check_constraints()
+
+    def test_delete_of_referenced_post_rejected(self):
+        Comment.objects.create(post=self.post, writer=self.user)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Post._base_manager.filter(id=self.post.id)._raw_delete(connection.alias)
+            self.check_constraints()
+
+    def test_cascading_delete_allowed(self):
+        Comment.objects.create(post=self.post, writer=self.user)
+
+        with transaction.atomic():
+            Post._base_manager.filter(id=self.post.id).delete()
+            self.check_constraints()
+
+        self.assertFalse(Comment.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ArchivedPostReadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(name="Archived Tag")
+        self.row = {
+            "id": 9001,
+            "title": "Archived post",
+            "content": "Old content",
+            "image": "",
+            "creator_id": self.user.id,
+            "created_at": "2022-01-10T10:00:00",
+            "tags": [self.tag.id],
+            "likes": [self.user.id, 12],
+        }
+        self.write_archive([{"id": 9000, "title": "Other"}, self.row])
+
+    def write_archive(self, rows, month=date(2022, 1, 1), chunked=True):
+        path = f"archive/post_post/{month:%Y-%m}.ndjson.gz"
+        full_path = f"{MEDIA_ROOT}/{path}"
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        chunks = []
+        if chunked:
+            with patch("post.partitioning.ARCHIVE_CHUNK_ROWS", 1):
+                archive_file, _, chunks = _write_chunks(
+                    json.dumps(row) for row in rows
+                )
+            with archive_file, open(full_path, "wb") as archive:
+                shutil.copyfileobj(archive_file, archive)
+        else:
+            with gzip.open(full_path, "wt") as archive:
+                for row in rows:
+                    archive.write(json.dumps(row) + "\n")
+        archived = ArchivedPartition.objects.create(
+            table="post_post",
+            month=month,
+            path=path,
+            row_count=len(rows),
+            min_id=rows[0]["id"],
+            max_id=rows[-1]["id"],
+        )
+        _create_chunks(archived, chunks)
+        return archived
+
+    def test_find_archived_row(self):
+        self.assertEqual(find_archived_row(Post, 9001), self.row)
+        self.assertIsNone(find_archived_row(Post, 9002))
+
+    def test_find_archived_row_reads_one_chunk(self):
+        archived = self.write_archive(
+            [{"id": 9500}, {"id": 9502}, {"id": 9504}], month=date(2022, 2, 1)
+        )
+
+        self.assertEqual(archived.chunks.count(), 3)
+        # the chunks still read back as one gzip stream
+        self.assertEqual(
+            [row["id"] for row in archived_rows(archived)], [9500, 9502, 9504]
+        )
+        with patch("gzip.decompress", wraps=gzip.decompress) as decompress:
+            self.assertEqual(find_archived_row(Post, 9502), {"id": 9502})
+        decompress.assert_called_once()
+        with patch("post.partitioning.default_storage.open") as storage_open:
+            self.assertIsNone(find_archived_row(Post, 9503))
+        storage_open.assert_not_called()
+
+    def test_unindexed_archive_is_indexed(self):
+        archived = self.write_archive(
+            [{"id": 9500}, {"id": 9502}], month=date(2022, 2, 1), chunked=False
+        )
+        self.assertEqual(find_archived_row(Post, 9502), {"id": 9502})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            index_archive(archived, log=lambda message: None)
+
+        self.assertEqual(archived.chunks.count(), 1)
+        self.assertEqual(find_archived_row(Post, 9502), {"id": 9502})
+        self.assertIsNone(find_archived_row(Post, 9501))
+
+    def test_archived_max_id_cached_until_invalidated(self):
+        self.assertEqual(archived_max_id("post_post"), 9001)
+        ArchivedPartition.objects.create(
+            table="post_post",
+            month=date(2022, 2, 1),
+            path="archive/post_post/2022-02.ndjson.gz",
+            row_count=1,
+            min_id=9500,
+            max_id=9500,
+        )
+
+        self.assertEqual(archived_max_id("post_post"), 9001)
+        invalidate_boundaries("post_post")
+        self.assertEqual(archived_max_id("post_post"), 9500)
+
+    def test_retrieve_falls_back_to_archive(self):
+        res = self.client.get(reverse("post:post-detail", args=[9001]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["archived"])
+        self.assertEqual(res.data["title"], "Archived post")
+        self.assertEqual(res.data["tags"], ["Archived Tag"])
+        self.assertEqual(res.data["count_likes"], 2)
+
+    async def test_async_retrieve_falls_back_to_archive(self):
+        token = await Token.objects.acreate(user=self.user)
+
+        res = await self.async_client.get(
+            reverse("post-async:post-detail", args=[9001]),
+            headers={"Authorization": f"Token {token.key}"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.json()["archived"])
+        self.assertEqual(res.json()["tags"], ["Archived Tag"])
+
+    def test_retrieve_archived_post_of_deleted_user(self):
+        get_user_model().objects.filter(id=self.user.id).update(is_deleted=True)
+        reader = get_user_model().objects.create_user("reader@test.com", "pass")
+        self.client.force_authenticate(reader)
+
+        res = self.client.get(reverse("post:post-detail", args=[9001]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_archived_soft_deleted_post(self):
+        self.write_archive(
+            [{**self.row, "id": 9500, "is_deleted": True}], month=date(2022, 2, 1)
+        )
+        invalidate_boundaries("post_post")
+
+        res = self.client.get(reverse("post:post-detail", args=[9500]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_missing_post(self):
+        with patch("post.partitioning.find_archived_row") as find_archived_row:
+            res = self.client.get(reverse("post:post-detail", args=[9002]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        # ids above the archived ones are never looked up in the archive
+        find_archived_row.assert_not_called()
+
+    def test_archive_misses_are_cached(self):
+        url = reverse("post:post-detail", args=[8999])
+        with patch(
+            "post.partitioning.find_archived_row", wraps=find_archived_row
+        ) as lookup:
+            for _ in range(2):
+                res = self.client.get(url)
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        lookup.assert_called_once_with(Post, 8999)
+
+    def test_retrieve_non_numeric_pk(self):
+        res = self.client.get(reverse("post:post-detail", args=["abc"]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SinceFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+
+    def test_filter_posts_since(self):
+        old = Post.objects.create(title="Old", creator=self.user)
+        Post.objects.filter(id=old.id).update(created_at=datetime(2020, 1, 1))
+        new = Post.objects.create(title="New", creator=self.user)
+
+        res = self.client.get(reverse("post:post-list"), {"since": "2021-01-01"})
+
+        ids = [post["id"] for post in res.data["results"]]
+        self.assertEqual(ids, [new.id])
+
+    def test_invalid_since(self):
+        res = self.client.get(reverse("post:post-list"), {"since": "yesterday"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
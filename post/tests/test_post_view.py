@@ -1,14 +1,16 @@
-from unittest.mock import patch, MagicMock
-
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework import status
 
-from post.models import Tag, Comment, Post
+from monitoring.testing import QueryBudgetTestMixin
+from post.models import Tag, Comment, Post, ScheduledPost
 from post.serializers import PostListSerializer, CommentListSerializer, CommentSerializer
+from post.views import PostDefaultPagination, PostViewSet
 
 POST_URL = reverse("post:post-list")
 
@@ -139,6 +141,18 @@ class AuthenticatedMovieApiTests(TestCase):
         count_likes = Post.objects.get(id=post.id).likes.count()
         self.assertEqual(count_likes, 0)
 
+    def test_post_like_keeps_created_at(self):
+        post = sample_post(creator=self.user)
+        url = reverse("post:post-like-post", args=[post.id])
+
+        self.client.post(url)
+        post.title = "Edited"
+        post.save()
+
+        refreshed = Post.objects.get(id=post.id)
+        self.assertEqual(refreshed.created_at, post.created_at)
+        self.assertGreaterEqual(refreshed.updated_at, refreshed.created_at)
+
     def test_list_posts_comments(self):
         post = sample_post(creator=self.user)
         sample_comment_for_post(
@@ -174,7 +188,7 @@ class AuthenticatedMovieApiTests(TestCase):
         request = self.factory.get(url)
         res = self.client.post(url, payload)
 
-        serializer = CommentSerializer(Comment.objects.get(id=1), many=False)
+        serializer = CommentSerializer(Comment.objects.get(id=res.data["id"]), many=False)
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertEqual(res.data, serializer.data)
@@ -257,13 +271,7 @@ class AuthenticatedMovieApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(serializer.data, res.data)
 
-    @patch("post.tasks.create_post.apply_async")
-    @patch("post.serializers.PostSerializer")
-    def test_schedule_creation_post(self, MockPostSerializer, mock_create_post):
-        mock_serializer_instance = MagicMock()
-        mock_serializer_instance.is_valid.return_value = True
-        MockPostSerializer.return_value = mock_serializer_instance
-
+    def test_schedule_creation_post(self):
         tag = sample_tag()
         data = {
             "title": "Some title",
@@ -275,6 +283,98 @@ class AuthenticatedMovieApiTests(TestCase):
         url = reverse("post:post-schedule")
         res = self.client.post(url, data, format="json")
 
+        scheduled = ScheduledPost.objects.get()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            res.data, {"message": "Post scheduled successfully", "id": scheduled.id}
+        )
+        self.assertEqual(list(scheduled.tags.all()), [tag])
+        self.assertFalse(Post.objects.exists())
+
+
+class PostQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.author = get_user_model().objects.create_user(
+            "author@test.com",
+            "testpass",
+        )
+        self.user.follows.add(self.author)
+        self.client.force_authenticate(self.user)
+
+        tags = [sample_tag(name="Tag 1"), sample_tag(name="Tag 2")]
+        # More posts than fit on a page, so per-row queries would show up
+        for index in range(PostDefaultPagination.page_size + 2):
+            post = sample_post(title=f"Post {index}", creator=self.author)
+            post.tags.add(*tags)
+            post.likes.add(self.user, self.author)
+            sample_comment_for_post(post=post, writer=self.user)
+            sample_comment_for_post(post=post, writer=self.author)
+        self.post = post
+
+    def test_list_within_budget(self):
+        with self.assertWithinQueryBudget(
+            PostViewSet, "list", allow_duplicates=False
+        ):
+            res = self.client.get(POST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["count_likes"], 2)
+
+    def test_retrieve_within_budget(self):
+        url = reverse("post:post-detail", args=[self.post.id])
+        with self.assertWithinQueryBudget(
+            PostViewSet, "retrieve", allow_duplicates=False
+        ):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count_likes"], 2)
+        self.assertEqual(len(res.data["comments"]), 2)
+
+    def test_feeds_within_budget(self):
+        for action, url_name in (
+            ("liked_posts", "post:post-liked-posts"),
+            ("user_posts", "post:post-user-posts"),
+            ("followings_posts", "post:post-followings-posts"),
+        ):
+            with self.subTest(action=action):
+                with self.assertWithinQueryBudget(
+                    PostViewSet, action, allow_duplicates=False
+                ):
+                    res = self.client.get(reverse(url_name))
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_comments_within_budget(self):
+        url = reverse("post:post-comments", args=[self.post.id])
+        with self.assertWithinQueryBudget(
+            PostViewSet, "comments", allow_duplicates=False
+        ):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertWithinQueryBudget(PostViewSet, "comments"):
+            res = self.client.post(url, {"content": "New comment"})
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(res.data, {"message": "Post scheduled successfully"})
-        mock_create_post.assert_called_once()
+
+    def test_list_query_count_independent_of_rows(self):
+        with CaptureQueriesContext(connection) as full_page:
+            self.client.get(POST_URL)
+        with CaptureQueriesContext(connection) as last_page:
+            self.client.get(POST_URL, {"page": 2})
+
+        self.assertEqual(len(full_page), len(last_page))
+
+    def test_like_within_budget(self):
+        url = reverse("post:post-like-post", args=[self.post.id])
+        # liked in setUp, so unliked first
+        for liked in (False, True):
+            with self.subTest(liked=liked):
+                with self.assertWithinQueryBudget(PostViewSet, "like_post"):
+                    res = self.client.post(url)
+                self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+                self.assertEqual(
+                    self.post.likes.filter(id=self.user.id).exists(), liked
+                )
@@ -0,0 +1,243 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from monitoring.testing import QueryBudgetTestMixin
+from post.models import Post, ScheduledPost, Tag
+from post.staging import stage_upload
+from post import tasks
+from post.tasks import publish_scheduled_posts
+from post.views import ScheduledPostViewSet
+
+MEDIA_ROOT = tempfile.mkdtemp()
+SCHEDULED_URL = reverse("post:scheduled-post-list")
+
+
+def detail_url(scheduled_id: int) -> str:
+    return reverse("post:scheduled-post-detail", args=[scheduled_id])
+
+
+def sample_upload() -> SimpleUploadedFile:
+    buffer = BytesIO()
+    Image.new("RGB", (10, 10)).save(buffer, "PNG")
+    return SimpleUploadedFile("photo.png", buffer.getvalue(), "image/png")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ScheduledPostApiTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.other = get_user_model().objects.create_user(
+            "other@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.tags = [Tag.objects.create(name=f"Tag {index}") for index in range(2)]
+        self.publish_at = timezone.now() + timedelta(days=1)
+
+        for index in range(3):
+            scheduled = ScheduledPost.objects.create(
+                creator=self.user, title=f"Later {index}", publish_at=self.publish_at
+            )
+            scheduled.tags.set(self.tags)
+        self.scheduled = scheduled
+        ScheduledPost.objects.create(
+            creator=self.other, title="Not mine", publish_at=self.publish_at
+        )
+
+    def test_list_own_schedules_within_budget(self):
+        with self.assertWithinQueryBudget(
+            ScheduledPostViewSet, "list", allow_duplicates=False
+        ):
+            res = self.client.get(SCHEDULED_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 3)
+        self.assertEqual(res.data["results"][0]["tags"], [tag.id for tag in self.tags])
+
+    def test_edit_schedule(self):
+        res = self.client.patch(
+            detail_url(self.scheduled.id),
+            {"title": "Edited", "scheduled_time": "2031-05-01T09:30"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.scheduled.refresh_from_db()
+        self.assertEqual(self.scheduled.title, "Edited")
+        self.assertEqual(self.scheduled.publish_at.year, 2031)
+
+    def test_schedule_being_published_cannot_be_edited(self):
+        ScheduledPost.objects.filter(id=self.scheduled.id).update(
+            status=ScheduledPost.Status.PUBLISHING
+        )
+
+        res = self.client.patch(detail_url(self.scheduled.id), {"title": "Late edit"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.scheduled.refresh_from_db()
+        self.assertEqual(self.scheduled.title, "Later 2")
+
+    def test_replacing_image_discards_previous_upload(self):
+        previous = stage_upload(sample_upload(), self.publish_at)
+        ScheduledPost.objects.filter(id=self.scheduled.id).update(image_path=previous)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(
+                detail_url(self.scheduled.id),
+                {"image": sample_upload()},
+                format="multipart",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["has_image"])
+        self.assertFalse(default_storage.exists(previous))
+
+    def test_cancel_schedule_discards_upload(self):
+        image_path = stage_upload(sample_upload(), self.publish_at)
+        ScheduledPost.objects.filter(id=self.scheduled.id).update(
+            image_path=image_path
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.delete(detail_url(self.scheduled.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(ScheduledPost.objects.filter(id=self.scheduled.id).exists())
+        self.assertFalse(default_storage.exists(image_path))
+
+    def test_other_users_schedules_are_hidden(self):
+        other = ScheduledPost.objects.get(creator=self.other)
+        res = self.client.delete(detail_url(other.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, SCHEDULED_POST_BATCH_SIZE=2)
+class PublishScheduledPostsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.tags = [Tag.objects.create(name=f"Tag {index}") for index in range(2)]
+
+    def schedule(self, title, publish_at, **extra) -> ScheduledPost:
+        scheduled = ScheduledPost.objects.create(
+            creator=self.user, title=title, publish_at=publish_at, **extra
+        )
+        scheduled.tags.set(self.tags)
+        return scheduled
+
+    def test_due_posts_are_published_in_batches(self):
+        past = timezone.now() - timedelta(minutes=1)
+        for index in range(5):
+            self.schedule(f"Due {index}", past)
+        self.schedule("Later", timezone.now() + timedelta(hours=1))
+
+        with patch("post.tasks.publish_posts") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                published = publish_scheduled_posts()
+
+        self.assertEqual(published, 5)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(
+            sum(len(call.args[0]) for call in publish.call_args_list), 5
+        )
+        self.assertEqual(
+            list(ScheduledPost.objects.values_list("title", flat=True)), ["Later"]
+        )
+        for post in Post.objects.prefetch_related("tags"):
+            self.assertEqual(list(post.tags.all()), self.tags)
+
+    def test_staged_image_is_moved_to_post(self):
+        image_path = stage_upload(sample_upload(), timezone.now())
+        self.schedule(
+            "Photo",
+            timezone.now(),
+            image_path=image_path,
+            image_content_type="image/png",
+        )
+
+        with patch("post.tasks.generate_post_renditions.delay") as renditions:
+            with self.captureOnCommitCallbacks(execute=True):
+                publish_scheduled_posts()
+
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.endswith(".png"))
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertFalse(default_storage.exists(image_path))
+        renditions.assert_called_once_with(post.id)
+
+    def test_failing_post_does_not_hold_back_the_batch(self):
+        past = timezone.now() - timedelta(minutes=1)
+        for title in ("Due 0", "Broken", "Due 1"):
+            self.schedule(title, past)
+        insert_posts = tasks.insert_posts
+
+        def failing_insert(posts, entries):
+            if any(post.title == "Broken" for post in posts):
+                raise DatabaseError("broken")
+            return insert_posts(posts, entries)
+
+        with patch("post.tasks.insert_posts", side_effect=failing_insert):
+            for attempt in range(1, 4):
+                with self.assertLogs("post.tasks", "ERROR"):
+                    publish_scheduled_posts()
+                broken = ScheduledPost.objects.get()
+                self.assertEqual(broken.attempts, attempt)
+            self.assertEqual(broken.status, ScheduledPost.Status.FAILED)
+            self.assertEqual(publish_scheduled_posts(), 0)
+
+        self.assertEqual(
+            sorted(Post.objects.values_list("title", flat=True)), ["Due 0", "Due 1"]
+        )
+
+    def test_missing_staged_image_counts_an_attempt(self):
+        scheduled = self.schedule(
+            "Photo", timezone.now(), image_path="staged/gone.png"
+        )
+
+        with self.assertLogs("post.tasks", "ERROR"):
+            self.assertEqual(publish_scheduled_posts(), 0)
+
+        scheduled.refresh_from_db()
+        self.assertEqual(scheduled.status, ScheduledPost.Status.PENDING)
+        self.assertEqual(scheduled.attempts, 1)
+        self.assertFalse(Post.objects.exists())
+
+    def test_stale_claims_are_taken_over(self):
+        self.schedule(
+            "Stale",
+            timezone.now() - timedelta(hours=1),
+            status=ScheduledPost.Status.PUBLISHING,
+            claimed_at=timezone.now() - timedelta(hours=1),
+        )
+        self.schedule(
+            "Claimed",
+            timezone.now() - timedelta(hours=1),
+            status=ScheduledPost.Status.PUBLISHING,
+            claimed_at=timezone.now(),
+        )
+
+        with patch("post.tasks.publish_posts"):
+            self.assertEqual(publish_scheduled_posts(), 1)
+
+        self.assertEqual(Post.objects.get().title, "Stale")
@@ -0,0 +1,130 @@
+import base64
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from post.models import Post, ScheduledPost, Tag
+from post.staging import STAGING_DIR, clean_staged_uploads, stage_upload
+from post.tasks import create_post
+
+MEDIA_ROOT = tempfile.mkdtemp()
+SCHEDULE_URL = reverse("post:post-schedule")
+
+
+def sample_upload(name="photo.jpg") -> SimpleUploadedFile:
+    buffer = BytesIO()
+    Image.new("RGB", (10, 10)).save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, STAGED_UPLOAD_GRACE_SECONDS=60)
+class ScheduleStagingTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(name="django")
+
+    def schedule(self, **extra):
+        payload = {
+            "title": "Later",
+            "content": "...",
+            "tags": [self.tag.id],
+            "scheduled_time": "2030-01-01T12:00",
+            "image": sample_upload(),
+        }
+        payload.update(extra)
+        return self.client.post(SCHEDULE_URL, payload, format="multipart")
+
+    def test_schedule_stages_upload(self):
+        res = self.schedule()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        scheduled = ScheduledPost.objects.get()
+        self.assertTrue(scheduled.image_path.startswith(f"{STAGING_DIR}/"))
+        self.assertTrue(scheduled.image_path.endswith(".jpg"))
+        self.assertTrue(default_storage.exists(scheduled.image_path))
+        self.assertEqual(scheduled.image_content_type, "image/jpeg")
+
+    def test_create_post_moves_staged_upload(self):
+        image_path = stage_upload(sample_upload(), timezone.now())
+
+        with patch("post.tasks.generate_post_renditions.delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                create_post(
+                    {"title": "Later", "content": "..."},
+                    self.user.id,
+                    [self.tag.id],
+                    image_path,
+                    "image/jpeg",
+                )
+
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.endswith(".jpg"))
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertFalse(default_storage.exists(image_path))
+        self.assertEqual(list(post.tags.all()), [self.tag])
+
+    def test_create_post_decodes_legacy_payload(self):
+        buffer = BytesIO()
+        Image.new("RGB", (10, 10)).save(buffer, "PNG")
+        payload = base64.b64encode(buffer.getvalue())
+
+        # bytes or str, depending on the broker serializer that carried it
+        for image_data in (payload, payload.decode()):
+            with self.subTest(type=type(image_data).__name__):
+                with patch("post.tasks.generate_post_renditions.delay"):
+                    with self.captureOnCommitCallbacks(execute=True):
+                        create_post(
+                            {"title": "Queued"}, self.user.id, [], image_data
+                        )
+
+                post = Post.objects.latest("id")
+                self.assertTrue(post.image.name.endswith(".png"))
+                with post.image.open() as image:
+                    self.assertEqual(image.read(), buffer.getvalue())
+                staged = default_storage.listdir(STAGING_DIR)[1]
+                self.assertFalse([name for name in staged if name.endswith(".png")])
+
+    def test_create_post_of_deleted_user_discards_upload(self):
+        image_path = stage_upload(sample_upload(), timezone.now())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_post({"title": "Later"}, 0, [], image_path, "image/jpeg")
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(default_storage.exists(image_path))
+
+    def test_clean_removes_overdue_uploads_only(self):
+        overdue = stage_upload(sample_upload(), timezone.now() - timedelta(hours=1))
+        pending = stage_upload(sample_upload(), timezone.now() + timedelta(days=1))
+        postponed = stage_upload(sample_upload(), timezone.now() - timedelta(hours=1))
+        ScheduledPost.objects.create(
+            creator=self.user,
+            title="Postponed",
+            image_path=postponed,
+            publish_at=timezone.now() + timedelta(days=1),
+        )
+
+        self.assertEqual(clean_staged_uploads(), 1)
+        self.assertFalse(default_storage.exists(overdue))
+        self.assertTrue(default_storage.exists(pending))
+        self.assertTrue(default_storage.exists(postponed))
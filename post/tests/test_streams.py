@@ -0,0 +1,142 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from post.models import Post, Tag
+from post.streams import POST_CHANNEL, PostStreamHub, hub, publish_post
+
+STREAM_URL = reverse("post-async:post-followings-stream")
+
+
+class PublishPostTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+
+    @override_settings(POST_STREAM_REDIS_URL=None)
+    def test_publish_without_redis_is_noop(self):
+        post = Post.objects.create(title="Post", content="...", creator=self.user)
+        with patch("post.streams._publisher") as publisher:
+            publish_post(post)
+        publisher.assert_not_called()
+
+    @override_settings(POST_STREAM_REDIS_URL="redis://localhost:6379/0")
+    def test_publish_summary(self):
+        post = Post.objects.create(title="Post", content="...", creator=self.user)
+        with patch("post.streams._publisher") as publisher:
+            publish_post(post)
+
+        pipeline = publisher.return_value.pipeline.return_value
+        channel, data = pipeline.publish.call_args.args
+        pipeline.execute.assert_called_once()
+        self.assertEqual(channel, POST_CHANNEL)
+        self.assertEqual(json.loads(data)["id"], post.id)
+        self.assertEqual(json.loads(data)["creator"], self.user.id)
+
+    def test_create_publishes_after_commit(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        tag = Tag.objects.create(name="django")
+
+        with patch("post.views.publish_post") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = client.post(
+                    reverse("post:post-list"),
+                    {"title": "New", "content": "...", "tags": [tag.id]},
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(publish.call_args.args[0].id, res.data["id"])
+
+
+class PostStreamHubTests(TestCase):
+    def test_dispatch_to_followers_only(self):
+        async def scenario():
+            stream_hub = PostStreamHub()
+            follower = stream_hub.subscribe([1, 2])
+            other = stream_hub.subscribe([3])
+            stream_hub.dispatch({"id": 10, "creator": 2})
+            stream_hub.unsubscribe(follower, [1, 2])
+            stream_hub.dispatch({"id": 11, "creator": 2})
+            return follower, other, stream_hub
+
+        follower, other, stream_hub = asyncio.run(scenario())
+
+        self.assertEqual(follower.get_nowait(), {"id": 10, "creator": 2})
+        self.assertTrue(follower.empty())
+        self.assertTrue(other.empty())
+        self.assertEqual(set(stream_hub.listeners), {3})
+
+    def test_full_queue_drops_events(self):
+        async def scenario():
+            stream_hub = PostStreamHub()
+            stream_hub.queue_size = 1
+            queue = stream_hub.subscribe([1])
+            stream_hub.dispatch({"id": 10, "creator": 1})
+            stream_hub.dispatch({"id": 11, "creator": 1})
+            return queue
+
+        queue = asyncio.run(scenario())
+        self.assertEqual(queue.qsize(), 1)
+
+
+@override_settings(POST_STREAM_REDIS_URL=None)
+class FollowingsStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.author = get_user_model().objects.create_user(
+            "author@test.com", "testpass"
+        )
+        self.user.follows.add(self.author)
+        self.token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {self.token.key}"}
+
+    async def test_auth_required(self):
+        res = await self.async_client.get(STREAM_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_stream_pushes_followed_posts(self):
+        res = await self.async_client.get(STREAM_URL, headers=self.headers)
+        content = aiter(res.streaming_content)
+
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        self.assertEqual(await anext(content), b"retry: 3000\n\n")
+
+        next_chunk = asyncio.ensure_future(anext(content))
+        await asyncio.sleep(0)
+        hub.dispatch({"id": 1, "creator": self.user.id})
+        hub.dispatch({"id": 2, "creator": self.author.id})
+        chunk = await asyncio.wait_for(next_chunk, 1)
+
+        self.assertTrue(chunk.startswith(b"id: 2\nevent: post\n"))
+        await content.aclose()
+
+    async def test_last_event_id_replays_missed_posts(self):
+        first, second = await sync_to_async(
+            lambda: [
+                Post.objects.create(title=title, content="...", creator=self.author)
+                for title in ("First", "Second")
+            ]
+        )()
+        res = await self.async_client.get(
+            STREAM_URL, headers={**self.headers, "Last-Event-ID": str(first.id)}
+        )
+        content = aiter(res.streaming_content)
+
+        await anext(content)
+        chunk = await anext(content)
+        self.assertTrue(chunk.startswith(f"id: {second.id}\n".encode()))
+        await content.aclose()
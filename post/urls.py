@@ -1,11 +1,17 @@
 from django.urls import path, include
 from rest_framework import routers
 
-from post.views import TagViewSet, PostViewSet, CommentManageViewSet
+from post.views import (
+    TagViewSet,
+    PostViewSet,
+    CommentManageViewSet,
+    ScheduledPostViewSet,
+)
 
 router = routers.DefaultRouter()
 router.register("tags", TagViewSet)
 router.register("comment", CommentManageViewSet)
+router.register("scheduled", ScheduledPostViewSet, basename="scheduled-post")
 router.register("", PostViewSet)
 
 urlpatterns = [
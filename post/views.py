@@ -1,17 +1,27 @@
 from datetime import datetime
-import base64
 
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import QuerySet
+from django.http import Http404
+from django.utils.dateparse import parse_date, parse_datetime
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import mixins, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework.permissions import IsAuthenticated
 
-from post.models import Tag, Comment, Post
+from analytics.events import track
+from analytics.models import EngagementEvent
+from notification.inbox import notify
+from notification.models import Notification
+from post import counters, partitioning
+from post.models import Tag, Comment, Post, likes_count
 from post.serializers import (
+    ArchivedPostSerializer,
     TagSerializer,
     CommentSerializer,
     CommentListSerializer,
@@ -21,15 +31,21 @@ from post.serializers import (
     PostLikeSerializer,
     PostScheduleSerializer,
 )
+from post.staging import discard_staged
+from post.streams import publish_post
 from post.permissions import (
     IsAdminOrIfAuthenticatedReadOnly,
     IsPostCreatorOrReadOnly,
     IsCommentWriterOrReadOnly,
 )
-from post.tasks import create_post
+from post.tasks import generate_post_renditions
+from user.purge import soft_delete_post
+from social_media_api.idempotency import IDEMPOTENCY_KEY_PARAMETER, idempotent
+from social_media_api.pagination import EstimatedCountPagination
+from social_media_api.query_plans import QueryPlan, QueryPlanMixin
 
 
-class PostDefaultPagination(PageNumberPagination):
+class PostDefaultPagination(EstimatedCountPagination):
     page_size = 10
     max_page_size = 100
 
@@ -55,10 +71,59 @@ class CommentManageViewSet(
     permission_classes = (IsAuthenticated, IsCommentWriterOrReadOnly)
 
 
-class PostViewSet(ModelViewSet):
+POST_LIST_PLAN = QueryPlan(
+    prefetch_related=("tags",),
+    annotations={"likes_total": likes_count()},
+)
+
+
+class ScheduledPostViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    """Posts of the user waiting to be published"""
+
+    serializer_class = PostScheduleSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = PostDefaultPagination
+    query_budgets = {"list": 3, "retrieve": 2}
+
+    def get_queryset(self):
+        return self.request.user.scheduled_posts.prefetch_related("tags")
+
+    def perform_destroy(self, instance) -> None:
+        image_path = instance.image_path
+        instance.delete()
+        transaction.on_commit(lambda: discard_staged(image_path))
+
+
+class PostViewSet(QueryPlanMixin, ModelViewSet):
     queryset = Post.objects.all()
     permission_classes = (IsAuthenticated, IsPostCreatorOrReadOnly)
     pagination_class = PostDefaultPagination
+    query_plans = {
+        "list": POST_LIST_PLAN,
+        "retrieve": QueryPlan(
+            prefetch_related=("tags", "comments"),
+            annotations={"likes_total": likes_count()},
+        ),
+        "liked_posts": POST_LIST_PLAN,
+        "user_posts": POST_LIST_PLAN,
+        "followings_posts": POST_LIST_PLAN,
+    }
+    query_budgets = {
+        "list": 3,
+        "retrieve": 3,
+        "create": 5,
+        "comments": 3,
+        "like_post": 4,
+        "liked_posts": 2,
+        "user_posts": 2,
+        "followings_posts": 2,
+    }
 
     def get_serializer_class(self):
         if self.action in (
@@ -85,12 +150,29 @@ class PostViewSet(ModelViewSet):
         """Converts a list of string IDs to a list of integers"""
         return [int(str_id) for str_id in qs.split(",")]
 
+    @staticmethod
+    def _param_to_datetime(value: str) -> datetime:
+        """Converts an ISO date or date and time to a datetime"""
+        parsed = parse_datetime(value)
+        if parsed is None and parse_date(value) is not None:
+            parsed = datetime.combine(parse_date(value), datetime.min.time())
+        if parsed is None:
+            raise ValidationError({"since": "Expected an ISO date or date and time."})
+        return parsed
+
+    def _filter_since(self, queryset: QuerySet) -> QuerySet:
+        """Bounds created_at, which lets PostgreSQL skip older partitions"""
+        since = self.request.query_params.get("since")
+        if since:
+            queryset = queryset.filter(created_at__gte=self._param_to_datetime(since))
+        return queryset
+
     def get_queryset(self) -> QuerySet:
         """Retrieve the posts with filters"""
         title = self.request.query_params.get("title")
         tags = self.request.query_params.get("tags")
 
-        queryset = self.queryset
+        queryset = self._filter_since(self.queryset)
 
         if title:
             queryset = queryset.filter(title__icontains=title)
@@ -99,10 +181,72 @@ class PostViewSet(ModelViewSet):
             tags_ids = self._params_to_ints(tags)
             queryset = queryset.filter(tags__id__in=tags_ids)
 
-        return queryset
+        return self.plan_queryset(queryset)
+
+    def get_object(self):
+        post = super().get_object()
+        if self.action == "retrieve":
+            track(EngagementEvent.Kind.VIEW, post)
+        return post
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a post, falling back to the partition archive"""
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            row = self._get_archived_post(kwargs["pk"])
+            if row is None:
+                raise
+            serializer = ArchivedPostSerializer(row, context={"request": request})
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _get_archived_post(pk):
+        # only ids up to the last archived one can be in the archive, which
+        # spares the lookup to live and soft-deleted posts which are missing
+        if not str(pk).isdigit():
+            return None
+        pk = int(pk)
+        if pk > partitioning.archived_max_id(Post._meta.db_table):
+            return None
+        key = f"post:archived:{pk}"
+        row = cache.get(key)
+        if row is None:
+            # misses are cached as False, repeating one costs no lookup
+            row = partitioning.find_archived_row(Post, pk) or False
+            cache.set(key, row, 60 * 60)
+        # not cached with the row, deleted users' posts disappear at once
+        if (
+            not row
+            or row.get("is_deleted")
+            or not get_user_model().objects.filter(id=row["creator_id"]).exists()
+        ):
+            return None
+        return row
+
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """Create a post, retries with the same Idempotency-Key are replayed"""
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer) -> None:
-        serializer.save(creator=self.request.user)
+        post = serializer.save(creator=self.request.user)
+        transaction.on_commit(lambda: publish_post(post))
+        self._schedule_renditions(post)
+
+    def perform_update(self, serializer) -> None:
+        post = serializer.save()
+        if "image" in serializer.validated_data:
+            self._schedule_renditions(post)
+
+    def perform_destroy(self, instance) -> None:
+        soft_delete_post(instance)
+
+    @staticmethod
+    def _schedule_renditions(post) -> None:
+        if post.image:
+            transaction.on_commit(lambda: generate_post_renditions.delay(post.id))
 
     @action(
         methods=["POST"],
@@ -114,21 +258,25 @@ class PostViewSet(ModelViewSet):
         item = self.get_object()
         user = request.user
 
-        if user in item.likes.all():
-            item.likes.remove(user)
+        change = counters.toggle_like(item.id, user.id)
+        if change < 0:
+            track(EngagementEvent.Kind.UNLIKE, item)
             message = {"message": "You successfully unliked this post."}
         else:
-            item.likes.add(user)
+            if change:
+                notify(Notification.Verb.LIKE, user.id, item.creator_id, item.id)
+                track(EngagementEvent.Kind.LIKE, item)
             message = {"message": "You successfully liked this post."}
-        item.save()
 
         return Response(message, status=status.HTTP_201_CREATED)
 
+    @extend_schema(methods=["POST"], parameters=[IDEMPOTENCY_KEY_PARAMETER])
     @action(
         methods=["GET", "POST"],
         detail=True,
         url_path="comments",
     )
+    @idempotent
     def comments(self, request, pk=None) -> Response:
         """Get a list of comments or create new comment for specified post"""
         item = self.get_object()
@@ -136,6 +284,10 @@ class PostViewSet(ModelViewSet):
 
         if request.method == "GET":
             queryset = Comment.objects.filter(post=item)
+            boundary = partitioning.legacy_boundary(Post._meta.db_table)
+            if boundary and item.created_at >= boundary:
+                # comments never predate their post, older partitions are skipped
+                queryset = queryset.filter(created_at__gte=item.created_at)
             serializer = CommentListSerializer(
                 queryset, many=True, context={"request": request}
             )
@@ -146,6 +298,8 @@ class PostViewSet(ModelViewSet):
 
             if serializer.is_valid():
                 serializer.save(writer=user, post=item)
+                notify(Notification.Verb.COMMENT, user.id, item.creator_id, item.id)
+                track(EngagementEvent.Kind.COMMENT, item)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -161,7 +315,7 @@ class PostViewSet(ModelViewSet):
     )
     def liked_posts(self, request) -> Response:
         """The user receives all the posts which he has liked"""
-        queryset = request.user.liked_posts
+        queryset = self.plan_queryset(request.user.liked_posts.all())
         serializer = PostListSerializer(
             queryset, many=True, context={"request": request}
         )
@@ -175,13 +329,23 @@ class PostViewSet(ModelViewSet):
     )
     def user_posts(self, request) -> Response:
         """The user receives all his/her posts"""
-        queryset = request.user.created_posts
+        queryset = self.plan_queryset(request.user.created_posts.all())
         serializer = PostListSerializer(
             queryset, many=True, context={"request": request}
         )
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="since",
+                description="Only posts created at or after this ISO date or date and time",
+                required=False,
+                type=str,
+            ),
+        ]
+    )
     @action(
         methods=["GET"],
         detail=False,
@@ -190,41 +354,30 @@ class PostViewSet(ModelViewSet):
     def followings_posts(self, request) -> Response:
         """The user receives all the posts of the users he/she follows"""
         following_users = request.user.follows.all()
-        queryset = self.queryset.filter(creator__in=following_users)
+        queryset = self.plan_queryset(
+            self._filter_since(self.queryset.filter(creator__in=following_users))
+        )
         serializer = PostListSerializer(
             queryset, many=True, context={"request": request}
         )
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
     @action(
         methods=["POST"],
         detail=False,
         url_path="schedule",
     )
+    @idempotent
     def schedule(self, request) -> Response:
         """The user creating a scheduled post with specified date and time"""
-        serializer = PostSerializer(data=request.data)
-        creator_id = request.user.id
+        serializer = PostScheduleSerializer(data=request.data)
 
         if serializer.is_valid():
-            # Schedule post creation task
-            tag_ids = [tag.id for tag in serializer.validated_data.pop("tags", [])]
-            if "image" in serializer.validated_data:
-                image = base64.b64encode(serializer.validated_data.pop("image").read())
-            else:
-                image = None
-            scheduled_time = datetime.strptime(
-                request.data["scheduled_time"], "%Y-%m-%dT%H:%M"
-            ).astimezone()
-
-            create_post.apply_async(
-                args=[serializer.validated_data, creator_id, tag_ids, image],
-                eta=scheduled_time,
-            )
-
+            scheduled = serializer.save(creator=request.user)
             return Response(
-                {"message": "Post scheduled successfully"},
+                {"message": "Post scheduled successfully", "id": scheduled.id},
                 status=status.HTTP_201_CREATED,
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -243,6 +396,12 @@ class PostViewSet(ModelViewSet):
                 description="Filter by tag ids (ex. ?tags=4,7)",
                 required=False,
             ),
+            OpenApiParameter(
+                name="since",
+                description="Only posts created at or after this ISO date or date and time",
+                required=False,
+                type=str,
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -0,0 +1,163 @@
+"""
+Helpers for the async read endpoints served through asgi.py.
+
+DRF views are synchronous, so under ASGI every request to them holds a
+thread. These helpers provide token authentication, user throttling,
+pagination and JSON rendering compatible with the DRF endpoints, built on
+the async ORM and async cache calls only.
+"""
+
+import math
+import time
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.authtoken.models import Token
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.throttling import UserRateThrottle
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from social_media_api.pagination import acount_rows
+
+TOKEN_CACHE_SECONDS = 60
+
+
+def token_cache_key(key: str) -> str:
+    return f"auth:token:{key}"
+
+
+async def aauthenticate(request):
+    """
+    Returns the user of the request's Token header, None if it's invalid.
+    Only the user's id is cached, the user comes back with every other
+    field deferred, so nothing like the password hash sits in the cache.
+    """
+    header = request.headers.get("Authorization", "").split()
+    if len(header) != 2 or header[0].lower() != "token":
+        return None
+
+    key = header[1]
+    user_id = await cache.aget(token_cache_key(key))
+    if user_id is None:
+        try:
+            token = await Token.objects.aget(key=key, user__is_active=True)
+        except Token.DoesNotExist:
+            return None
+        user_id = token.user_id
+        await cache.aset(token_cache_key(key), user_id, TOKEN_CACHE_SECONDS)
+
+    return get_user_model().from_db(None, ["id"], [user_id])
+
+
+async def athrottle(user) -> bool:
+    """Applies the user rate limit, sharing history with UserRateThrottle"""
+    throttle = UserRateThrottle()
+    if throttle.rate is None:
+        return True
+
+    key = throttle.cache_format % {"scope": throttle.scope, "ident": user.pk}
+    now = time.time()
+    history = [
+        timestamp
+        for timestamp in await cache.aget(key, [])
+        if timestamp > now - throttle.duration
+    ]
+    if len(history) >= throttle.num_requests:
+        return False
+
+    history.insert(0, now)
+    await cache.aset(key, history, throttle.duration)
+    return True
+
+
+def render(data, status_code=status.HTTP_200_OK) -> HttpResponse:
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status_code,
+        content_type="application/json",
+    )
+
+
+def async_api_view(view):
+    """Authenticates and throttles an async GET endpoint"""
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return render(
+                {"detail": f'Method "{request.method}" not allowed.'},
+                status.HTTP_405_METHOD_NOT_ALLOWED,
+            )
+
+        user = await aauthenticate(request)
+        if user is None:
+            return render(
+                {"detail": "Authentication credentials were not provided."},
+                status.HTTP_401_UNAUTHORIZED,
+            )
+        if not await athrottle(user):
+            return render(
+                {"detail": "Request was throttled."},
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+
+        request.user = user
+        try:
+            return await view(request, *args, **kwargs)
+        except ValidationError as exc:
+            return render(exc.detail, status.HTTP_400_BAD_REQUEST)
+        except NotFound as exc:
+            return render({"detail": exc.detail}, status.HTTP_404_NOT_FOUND)
+        except Http404:
+            return render({"detail": "Not found."}, status.HTTP_404_NOT_FOUND)
+
+    return wrapper
+
+
+async def apaginate(request, queryset, page_size: int) -> dict:
+    """
+    Returns a page of the queryset shaped like PageNumberPagination, which
+    also answers 404 to a page number that is invalid or out of range
+    """
+    count, approximate = await acount_rows(queryset)
+    last_page = max(math.ceil(count / page_size), 1)
+    number = request.GET.get("page", 1)
+    if number in PageNumberPagination.last_page_strings and not approximate:
+        number = last_page
+    try:
+        page = int(number)
+    except ValueError:
+        page = 0
+    # an exact count tells the last page, past an estimate the rows do
+    if page < 1 or (page > last_page and not approximate):
+        raise NotFound(PageNumberPagination.invalid_page_message)
+
+    offset = (page - 1) * page_size
+    # one row more than the page holds tells whether there's a next page
+    results = [item async for item in queryset[offset : offset + page_size + 1]]
+    if page > 1 and not results:
+        raise NotFound(PageNumberPagination.invalid_page_message)
+    url = request.build_absolute_uri()
+
+    next_url = None
+    if len(results) > page_size:
+        next_url = replace_query_param(url, "page", page + 1)
+        del results[page_size:]
+    previous_url = None
+    if page == 2:
+        previous_url = remove_query_param(url, "page")
+    elif page > 2:
+        previous_url = replace_query_param(url, "page", page - 1)
+
+    return {
+        "count": count,
+        "count_is_approximate": approximate,
+        "next": next_url,
+        "previous": previous_url,
+        "results": results,
+    }
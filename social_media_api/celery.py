@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.signals import worker_process_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "social_media_api.settings")
@@ -20,3 +21,11 @@ app.autodiscover_tasks()
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f"Request: {self.request!r}")
+
+
+@worker_process_init.connect
+def close_inherited_pools(**kwargs):
+    """Every prefork child must open its own connection pool"""
+    from social_media_api.db_pool import close_pools
+
+    close_pools()
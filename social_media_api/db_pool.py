@@ -0,0 +1,60 @@
+from django.db import connections
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+
+def pool_stats(alias: str):
+    """Returns psycopg pool statistics of the database alias, None without a pool"""
+    pool = getattr(connections[alias], "pool", None)
+    if pool is None:
+        return None
+    return pool.get_stats()
+
+
+def close_pools() -> None:
+    """Closes connection pools, e.g. the ones inherited by a forked worker"""
+    for connection in connections.all():
+        if getattr(connection, "pool", None) is not None:
+            connection.close_pool()
+
+
+class PoolStatsCollector:
+    """Prometheus collector exposing psycopg pool size and wait time"""
+
+    def collect(self):
+        size = GaugeMetricFamily(
+            "db_pool_connections",
+            "Connections held by the pool",
+            labels=["database", "state"],
+        )
+        waiting = GaugeMetricFamily(
+            "db_pool_requests_waiting",
+            "Requests currently waiting for a connection",
+            labels=["database"],
+        )
+        wait_time = CounterMetricFamily(
+            "db_pool_wait_seconds",
+            "Total time spent waiting for a pooled connection",
+            labels=["database"],
+        )
+        requests = CounterMetricFamily(
+            "db_pool_requests",
+            "Connection requests served by the pool",
+            labels=["database", "outcome"],
+        )
+
+        for alias in connections:
+            stats = pool_stats(alias)
+            if stats is None:
+                continue
+            size.add_metric([alias, "total"], stats.get("pool_size", 0))
+            size.add_metric([alias, "available"], stats.get("pool_available", 0))
+            waiting.add_metric([alias], stats.get("requests_waiting", 0))
+            wait_time.add_metric([alias], stats.get("requests_wait_ms", 0) / 1000)
+            requests.add_metric([alias, "served"], stats.get("requests_num", 0))
+            requests.add_metric([alias, "queued"], stats.get("requests_queued", 0))
+            requests.add_metric([alias, "error"], stats.get("requests_errors", 0))
+
+        yield size
+        yield waiting
+        yield wait_time
+        yield requests
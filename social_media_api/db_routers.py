@@ -0,0 +1,51 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Replica alias chosen for the current request, None routes reads to primary
+_read_replica = ContextVar("read_replica", default=None)
+
+
+def get_replicas() -> list:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def choose_replica():
+    replicas = get_replicas()
+    return random.choice(replicas) if replicas else None
+
+
+def use_replica(alias):
+    """Routes reads of the current context to specified replica alias"""
+    return _read_replica.set(alias)
+
+
+def reset_replica(token) -> None:
+    _read_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads of the post and user apps to a replica while a request has
+    opted in, everything else (writes, auth tokens, Celery) uses the primary.
+    """
+
+    route_app_labels = {"post", "user"}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in self.route_app_labels:
+            return _read_replica.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -0,0 +1,128 @@
+"""
+Idempotency-Key support for POST endpoints that create things.
+
+A client retrying a request sends the same key again. The first response
+with a status below 500 is kept in the cache (Redis in production) for
+IDEMPOTENCY_TTL_SECONDS and replayed to the retries, flagged by an
+Idempotent-Replayed header. A retry arriving while the first request is
+still running waits up to IDEMPOTENCY_WAIT_SECONDS for its response rather
+than doing the work a second time, then gets 409. Keys are scoped to the
+user, and reusing one for a different request is rejected with 422.
+"""
+
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL_SECONDS = 0.1
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    name=IDEMPOTENCY_HEADER,
+    location=OpenApiParameter.HEADER,
+    description="Unique key of the request, retries with the same key get "
+    "the first response instead of repeating the request",
+    required=False,
+    type=str,
+)
+
+
+def idempotency_cache_keys(user_id: int, key: str) -> tuple:
+    """Cache keys of the stored response and of the in-flight lock"""
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    prefix = f"idempotency:{user_id}:{digest}"
+    return f"{prefix}:response", f"{prefix}:lock"
+
+
+def _describe_upload(value) -> list:
+    return [getattr(value, "name", None), getattr(value, "size", None)]
+
+
+def request_fingerprint(request) -> str:
+    """Hash of the method, path and data, uploaded files by name and size"""
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    payload = json.dumps(
+        [request.method, request.path, data],
+        sort_keys=True,
+        default=_describe_upload,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(stored: dict, fingerprint: str) -> Response:
+    if stored["fingerprint"] != fingerprint:
+        return Response(
+            {"detail": f"{IDEMPOTENCY_HEADER} was used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(stored["data"], status=stored["status"])
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def idempotent(view_method):
+    """
+    Makes POST requests to the view method idempotent when they carry an
+    Idempotency-Key header. Requests without the header run as usual.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if request.method != "POST" or key is None:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {
+                    "detail": f"{IDEMPOTENCY_HEADER} must have 1 to "
+                    f"{MAX_KEY_LENGTH} characters."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        response_key, lock_key = idempotency_cache_keys(request.user.id, key)
+        fingerprint = request_fingerprint(request)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            stored = cache.get(response_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+            if cache.add(lock_key, fingerprint, settings.IDEMPOTENCY_LOCK_SECONDS):
+                break
+            if time.monotonic() >= deadline:
+                detail = f"A request with this {IDEMPOTENCY_HEADER} is in progress."
+                return Response(
+                    {"detail": detail},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={"Retry-After": "1"},
+                )
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code < 500:
+                cache.set(
+                    response_key,
+                    {
+                        "fingerprint": fingerprint,
+                        "status": response.status_code,
+                        "data": response.data,
+                    },
+                    settings.IDEMPOTENCY_TTL_SECONDS,
+                )
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
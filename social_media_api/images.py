@@ -0,0 +1,119 @@
+"""
+Sized WebP renditions of uploaded images.
+
+An image field ``<name>`` is paired with ``<name>_width``, ``<name>_height``
+and ``<name>_renditions`` (rendition name -> storage path) on its model.
+Renditions are generated by Celery after the upload is committed, the
+original is re-saved without EXIF/XMP metadata at the same time.
+"""
+
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "comment")
+
+
+def rendition_path(name: str, rendition: str) -> str:
+    return f"{os.path.splitext(name)[0]}-{rendition}.webp"
+
+
+def _encode(image: Image.Image, image_format: str, **options) -> ContentFile:
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _strip_metadata(image: Image.Image, image_format: str, name: str):
+    """Saves a copy of the original without metadata, returns its name"""
+    if not any(key in image.info for key in METADATA_KEYS):
+        return None
+    options = {"icc_profile": image.info.get("icc_profile")}
+    if image_format in ("JPEG", "WEBP"):
+        options["quality"] = 95
+    if image.mode not in ("RGB", "RGBA", "L") and image_format == "JPEG":
+        image = image.convert("RGB")
+    return default_storage.save(name, _encode(image, image_format, **options))
+
+
+def _render(image: Image.Image, size: tuple, name: str) -> str:
+    rendition = image.copy()
+    rendition.thumbnail(size, Image.Resampling.LANCZOS)
+    if rendition.mode not in ("RGB", "RGBA"):
+        rendition = rendition.convert(
+            "RGBA" if "transparency" in rendition.info else "RGB"
+        )
+    content = _encode(
+        rendition,
+        "WEBP",
+        quality=settings.IMAGE_RENDITION_QUALITY,
+        method=4,
+        icc_profile=image.info.get("icc_profile"),
+    )
+    return default_storage.save(name, content)
+
+
+def generate_renditions(instance, field_name: str) -> bool:
+    """
+    Renders the configured sizes of the instance's image and records them.
+    Returns False when there is no image or it was replaced meanwhile.
+    """
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return False
+
+    name = field_file.name
+    with field_file.open("rb"):
+        with Image.open(field_file) as original:
+            image_format = original.format
+            # the orientation tag goes away with the metadata, apply it first
+            image = ImageOps.exif_transpose(original)
+            stripped = _strip_metadata(image, image_format, name)
+
+    created = [stripped] if stripped else []
+    renditions = {}
+    for rendition, size in settings.IMAGE_RENDITIONS.items():
+        path = _render(image, size, rendition_path(stripped or name, rendition))
+        renditions[rendition] = path
+        created.append(path)
+
+    updated = (
+        type(instance)
+        .objects.filter(pk=instance.pk, **{field_name: name})
+        .update(
+            **{
+                field_name: stripped or name,
+                f"{field_name}_width": image.width,
+                f"{field_name}_height": image.height,
+                f"{field_name}_renditions": renditions,
+            }
+        )
+    )
+    if not updated:
+        for path in created:
+            default_storage.delete(path)
+        return False
+
+    stale = list(getattr(instance, f"{field_name}_renditions").values())
+    if stripped:
+        stale.append(name)
+    for path in stale:
+        default_storage.delete(path)
+    return True
+
+
+class RenditionsField(serializers.ReadOnlyField):
+    """Absolute URLs of the renditions, empty until they are generated"""
+
+    def to_representation(self, value) -> dict:
+        request = self.context.get("request")
+        urls = {}
+        for rendition, path in (value or {}).items():
+            url = default_storage.url(path)
+            urls[rendition] = request.build_absolute_uri(url) if request else url
+        return urls
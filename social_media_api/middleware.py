@@ -0,0 +1,83 @@
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+from social_media_api.db_routers import choose_replica, reset_replica, use_replica
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadReplicaMiddleware:
+    """
+    Serves safe requests from a read replica. After a client writes, its
+    reads stick to the primary for REPLICA_PIN_SECONDS so it always sees
+    its own changes despite replication lag.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        client = self.client_key(request)
+
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if client:
+                cache.set(
+                    self.pin_key(client), True, settings.REPLICA_PIN_SECONDS
+                )
+            return response
+
+        if client and cache.get(self.pin_key(client)):
+            return self.get_response(request)
+
+        token = use_replica(choose_replica())
+        try:
+            return self.get_response(request)
+        finally:
+            reset_replica(token)
+
+    async def __acall__(self, request):
+        client = self.client_key(request)
+
+        if request.method not in SAFE_METHODS:
+            response = await self.get_response(request)
+            if client:
+                await cache.aset(
+                    self.pin_key(client), True, settings.REPLICA_PIN_SECONDS
+                )
+            return response
+
+        if client and await cache.aget(self.pin_key(client)):
+            return await self.get_response(request)
+
+        token = use_replica(choose_replica())
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_replica(token)
+
+    @staticmethod
+    def client_key(request):
+        """Identifies the client without touching the database"""
+        authorization = request.headers.get("Authorization", "")
+        if authorization:
+            return hashlib.sha256(authorization.encode()).hexdigest()
+        session = getattr(request, "session", None)
+        if session is not None and session.session_key:
+            return session.session_key
+        return None
+
+    @staticmethod
+    def pin_key(client) -> str:
+        return f"db:primary-pin:{client}"
@@ -0,0 +1,129 @@
+"""
+Migration operations for changing large tables without blocking writes.
+
+Indexes are built with CREATE INDEX CONCURRENTLY on PostgreSQL, so the
+migrations using them must set ``atomic = False``. Other backends fall back
+to a regular index build, which keeps SQLite test databases working.
+"""
+
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import models
+from django.db.migrations.operations import AddIndex, RemoveIndex
+from django.db.migrations.operations.base import Operation
+
+
+def _is_postgresql(schema_editor) -> bool:
+    return schema_editor.connection.vendor == "postgresql"
+
+
+class AddIndexConcurrentlyIfSupported(AddIndexConcurrently):
+    """AddIndex which builds the index concurrently on PostgreSQL"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        return AddIndex.database_forwards(
+            self, app_label, schema_editor, from_state, to_state
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        return AddIndex.database_backwards(
+            self, app_label, schema_editor, from_state, to_state
+        )
+
+
+class RemoveIndexConcurrentlyIfSupported(RemoveIndexConcurrently):
+    """RemoveIndex which drops the index concurrently on PostgreSQL"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        return RemoveIndex.database_forwards(
+            self, app_label, schema_editor, from_state, to_state
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        return RemoveIndex.database_backwards(
+            self, app_label, schema_editor, from_state, to_state
+        )
+
+
+class AddThroughIndex(Operation):
+    """
+    Adds an index to the auto-created through table of a ManyToManyField.
+
+    Auto-created through models have no migration state of their own, so the
+    index only exists in the database and the autodetector never sees it.
+    """
+
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, model_name, field_name, fields, name):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.fields = fields
+        self.name = name
+
+    def deconstruct(self):
+        return (
+            self.__class__.__name__,
+            [],
+            {
+                "model_name": self.model_name,
+                "field_name": self.field_name,
+                "fields": self.fields,
+                "name": self.name,
+            },
+        )
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def _through(self, app_label, state):
+        model = state.apps.get_model(app_label, self.model_name)
+        return model._meta.get_field(self.field_name).remote_field.through
+
+    def _index(self):
+        return models.Index(fields=self.fields, name=self.name)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        through = self._through(app_label, to_state)
+        if self.allow_migrate_model(schema_editor.connection.alias, through):
+            if _is_postgresql(schema_editor):
+                schema_editor.add_index(through, self._index(), concurrently=True)
+            else:
+                schema_editor.add_index(through, self._index())
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        through = self._through(app_label, from_state)
+        if self.allow_migrate_model(schema_editor.connection.alias, through):
+            if _is_postgresql(schema_editor):
+                schema_editor.remove_index(through, self._index(), concurrently=True)
+            else:
+                schema_editor.remove_index(through, self._index())
+
+    def describe(self):
+        return (
+            f"Create index {self.name} on {self.model_name}.{self.field_name} "
+            f"through table"
+        )
+
+    @property
+    def migration_name_fragment(self):
+        return self.name.lower()
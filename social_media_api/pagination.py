@@ -0,0 +1,156 @@
+"""
+Pagination for tables too big to count.
+
+COUNT(*) reads every matching row. The paginators here count at most
+PAGINATION_EXACT_COUNT_LIMIT rows; when there are more, the total comes
+from the planner's statistics instead, pg_class.reltuples for a whole
+table and the row estimate of EXPLAIN for a filtered queryset, and is
+flagged as approximate. The filters of a model's default manager, like
+leaving out soft-deleted rows, don't count as filtering: the few rows they
+leave out are within the estimate's error. Below the limit, counts are
+exact and cost the same single query as a plain COUNT(*).
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+
+def is_unfiltered(queryset: QuerySet) -> bool:
+    """Whether the queryset has no filters but its default manager's"""
+    query = queryset.query
+    if query.distinct or query.combinator:
+        return False
+    return query.where == queryset.model._default_manager.all().query.where
+
+
+def planner_estimate(queryset: QuerySet):
+    """Rows the PostgreSQL planner expects the queryset to return, or None"""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    if is_unfiltered(queryset):
+        # partitions hold the rows of a partitioned table, the parent none
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT SUM(GREATEST(reltuples, 0))::bigint FROM pg_class "
+                "WHERE oid = %s::regclass OR oid IN ("
+                "SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+                [table, table],
+            )
+            return cursor.fetchone()[0] or 0
+
+    plan = json.loads(queryset.order_by().values("pk").explain(format="json"))
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+def count_rows(queryset: QuerySet, limit: int = None) -> tuple:
+    """
+    Returns (count, approximate). The count is exact below `limit` rows,
+    past it the planner's estimate where the database has one.
+    """
+    if limit is None:
+        limit = settings.PAGINATION_EXACT_COUNT_LIMIT
+    if not limit:
+        return queryset.count(), False
+
+    count = queryset.order_by().values("pk")[:limit].count()
+    if count < limit:
+        return count, False
+
+    estimate = planner_estimate(queryset)
+    if estimate is None:
+        return queryset.count(), False
+    # the statistics may be stale, but there are at least `limit` rows
+    return max(estimate, limit), True
+
+
+async def acount_rows(queryset: QuerySet, limit: int = None) -> tuple:
+    """count_rows() for the async views"""
+    if limit is None:
+        limit = settings.PAGINATION_EXACT_COUNT_LIMIT
+    if not limit:
+        return await queryset.acount(), False
+
+    count = await queryset.order_by().values("pk")[:limit].acount()
+    if count < limit:
+        return count, False
+
+    estimate = await sync_to_async(planner_estimate)(queryset)
+    if estimate is None:
+        return await queryset.acount(), False
+    return max(estimate, limit), True
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator counting huge querysets by estimate. Past an estimated
+    count, pages are served until they run out of rows, whether there is
+    a next page is decided by fetching one row more than the page holds.
+    A page past the last row is invalid, as it is with an exact count.
+    """
+
+    count_is_approximate = False
+
+    @cached_property
+    def count(self) -> int:
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+        count, self.count_is_approximate = count_rows(self.object_list)
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # the estimate may fall short of the actual number of pages
+            if self.count_is_approximate and int(number) > 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_approximate:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        page = self._get_page(rows[: self.per_page], number, self)
+        page.has_next = lambda: len(rows) > self.per_page
+        return page
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """PageNumberPagination telling whether its count is an estimate"""
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.page.paginator.count,
+                "count_is_approximate": self.page.paginator.count_is_approximate,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_approximate"] = {
+            "type": "boolean",
+            "example": False,
+        }
+        return response_schema
@@ -0,0 +1,40 @@
+from dataclasses import dataclass, field
+
+from django.db.models import QuerySet
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """Declares the relations and annotations a view action needs up front"""
+
+    select_related: tuple = ()
+    prefetch_related: tuple = ()
+    annotations: dict = field(default_factory=dict)
+    only: tuple = ()
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        if self.only:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+
+class QueryPlanMixin:
+    """Applies the query plan declared for the current view action"""
+
+    query_plans = {}
+
+    def get_query_plan(self):
+        action = getattr(self, "action", None) or self.request.method.lower()
+        return self.query_plans.get(action)
+
+    def plan_queryset(self, queryset: QuerySet) -> QuerySet:
+        plan = self.get_query_plan()
+        if plan is None:
+            return queryset
+        return plan.apply(queryset)
@@ -54,16 +54,23 @@ INSTALLED_APPS = [
     "django_probes",
     "post",
     "user",
+    "monitoring",
+    "notification",
+    "analytics",
 ]
 
 MIDDLEWARE = [
+    "monitoring.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "social_media_api.middleware.ReadReplicaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "monitoring.middleware.ProfilingMiddleware",
+    "monitoring.middleware.QueryInspectorMiddleware",
 ]
 
 ROOT_URLCONF = "social_media_api.urls"
@@ -101,6 +108,61 @@ DATABASES = {
     }
 }
 
+# Connection handling: "persistent" keeps a health-checked connection per
+# thread between requests, "pool" shares a psycopg 3 pool per process. Size
+# the pool to the threads of one process, e.g. 1-2 for a prefork Celery child.
+DB_CONNECTION_MODE = os.environ.get("DB_CONNECTION_MODE", "persistent")
+
+if DB_CONNECTION_MODE == "pool":
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 4)),
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Read replicas, e.g. POSTGRES_REPLICA_HOSTS=replica1:5432,replica2:5432
+DATABASE_REPLICAS = []
+for index, address in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(","))
+):
+    host, _, port = address.strip().partition(":")
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["social_media_api.db_routers.PrimaryReplicaRouter"]
+
+# Seconds a client's reads stay on the primary after it wrote something
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+if os.environ.get("REDIS_CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "monitoring.cache.InstrumentedRedisCache",
+            "LOCATION": os.environ.get("REDIS_CACHE_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "monitoring.cache.InstrumentedLocMemCache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -142,6 +204,28 @@ STATIC_URL = "static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/vol/web/media"
 
+# Data exports hold personal data, so they are kept out of the publicly
+# served MEDIA_ROOT and only handed out by user.views.ExportDownloadView
+EXPORTS_ROOT = os.environ.get("EXPORTS_ROOT", "/vol/web/exports")
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+    },
+    "exports": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": EXPORTS_ROOT},
+    },
+}
+
+# WebP renditions generated for post images and avatars, see images.py
+IMAGE_RENDITIONS = {
+    "thumbnail": (320, 320),
+    "medium": (1080, 1080),
+}
+IMAGE_RENDITION_QUALITY = 80
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -152,7 +236,10 @@ REST_FRAMEWORK = {
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "1000/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.environ.get("THROTTLE_ANON_RATE", "100/day"),
+        "user": os.environ.get("THROTTLE_USER_RATE", "1000/day"),
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.TokenAuthentication",
     ],
@@ -177,3 +264,167 @@ CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND")
 CELERY_TIMEZONE = "Europe/Kiev"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+CELERY_BEAT_SCHEDULE = {
+    "create-future-partitions": {
+        "task": "post.tasks.create_future_partitions",
+        "schedule": crontab(minute=0, hour=3),
+    },
+    "archive-old-partitions": {
+        "task": "post.tasks.archive_old_partitions",
+        "schedule": crontab(minute=30, hour=3, day_of_month=1),
+    },
+    "publish-scheduled-posts": {
+        "task": "post.tasks.publish_scheduled_posts",
+        "schedule": 30.0,
+    },
+    "remove-stale-staged-uploads": {
+        "task": "post.tasks.remove_stale_staged_uploads",
+        "schedule": crontab(minute=15),
+    },
+    "rebalance-like-counters": {
+        "task": "post.tasks.rebalance_like_counters",
+        "schedule": 60.0,
+    },
+    "resume-purges": {
+        "task": "user.tasks.resume_purges",
+        "schedule": 60.0,
+    },
+    "flush-notifications": {
+        "task": "notification.tasks.flush_notifications",
+        "schedule": 5.0,
+    },
+    "remove-old-request-profiles": {
+        "task": "monitoring.tasks.remove_old_request_profiles",
+        "schedule": crontab(minute=45, hour=3),
+    },
+    "flush-engagement-events": {
+        "task": "analytics.tasks.flush_engagement_events",
+        "schedule": 5.0,
+    },
+    "rollup-engagement": {
+        "task": "analytics.tasks.rollup_engagement",
+        "schedule": 60.0,
+    },
+    "remove-expired-exports": {
+        "task": "user.tasks.remove_expired_exports",
+        "schedule": crontab(minute=50),
+    },
+    "remove-old-hourly-rollups": {
+        "task": "analytics.tasks.remove_old_hourly_rollups",
+        "schedule": crontab(minute=0, hour=4),
+    },
+}
+
+# Monthly partitions of posts and comments, see post/partitioning.py
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", 3))
+PARTITION_ARCHIVE_AFTER_MONTHS = int(
+    os.environ.get("PARTITION_ARCHIVE_AFTER_MONTHS", 12)
+)
+
+# Scheduled posts published per transaction by publish_scheduled_posts
+SCHEDULED_POST_BATCH_SIZE = int(os.environ.get("SCHEDULED_POST_BATCH_SIZE", 500))
+# Failed attempts after which a scheduled post is marked failed
+SCHEDULED_POST_MAX_ATTEMPTS = 3
+# A claim older than this is taken over, its publisher is assumed dead
+SCHEDULED_POST_CLAIM_SECONDS = 15 * 60
+
+# Rows per INSERT when posts and their tags are created in bulk
+POST_BULK_BATCH_SIZE = 1000
+
+# Staged uploads of scheduled posts are removed this long after their due time
+STAGED_UPLOAD_GRACE_SECONDS = 24 * 60 * 60
+
+# Posts liked this many times a minute get sharded like counters, dropped
+# again below the demote rate, see post/counters.py
+LIKE_COUNTER_SHARDS = int(os.environ.get("LIKE_COUNTER_SHARDS", 16))
+LIKE_COUNTER_PROMOTE_RATE = int(os.environ.get("LIKE_COUNTER_PROMOTE_RATE", 600))
+LIKE_COUNTER_DEMOTE_RATE = int(os.environ.get("LIKE_COUNTER_DEMOTE_RATE", 60))
+
+# Redis pub/sub feeding the SSE stream of new posts, see post/streams.py
+POST_STREAM_REDIS_URL = os.environ.get(
+    "POST_STREAM_REDIS_URL", os.environ.get("REDIS_CACHE_URL")
+)
+POST_STREAM_KEEPALIVE_SECONDS = int(
+    os.environ.get("POST_STREAM_KEEPALIVE_SECONDS", 15)
+)
+
+# Notification events are queued in Redis and written in batches by beat
+NOTIFICATION_REDIS_URL = os.environ.get(
+    "NOTIFICATION_REDIS_URL", os.environ.get("REDIS_CACHE_URL")
+)
+NOTIFICATION_BATCH_SIZE = int(os.environ.get("NOTIFICATION_BATCH_SIZE", 500))
+NOTIFICATION_MAX_BATCHES = 20
+NOTIFICATION_UNREAD_CACHE_SECONDS = 60 * 60
+
+# Engagement events queue in Redis like notification events, see
+# analytics/events.py, and are rolled up per hour and day
+ANALYTICS_REDIS_URL = os.environ.get(
+    "ANALYTICS_REDIS_URL", os.environ.get("REDIS_CACHE_URL")
+)
+ANALYTICS_BATCH_SIZE = int(os.environ.get("ANALYTICS_BATCH_SIZE", 1000))
+ANALYTICS_MAX_BATCHES = 20
+ANALYTICS_HOURLY_RETENTION_DAYS = 90
+
+# SQL instrumentation: per request query counts, N+1 detection and budgets,
+# on the given share of requests; every request while debugging, none else
+QUERY_INSPECTOR_SAMPLE_RATE = float(
+    os.environ.get("QUERY_INSPECTOR_SAMPLE_RATE", 1 if DEBUG else 0)
+)
+QUERY_INSPECTOR_HEADERS = DEBUG
+QUERY_INSPECTOR_DUPLICATE_THRESHOLD = int(
+    os.environ.get("QUERY_INSPECTOR_DUPLICATE_THRESHOLD", 3)
+)
+
+# Statements slower than this are fingerprinted and explained, see
+# monitoring/slow_queries.py, 0 disables the recorder
+SLOW_QUERY_THRESHOLD_MS = (
+    int(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 500)) or None
+)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 5000
+
+# Paginated lists count exactly up to this many rows and report the
+# planner's estimate past it, see social_media_api/pagination.py,
+# 0 always counts exactly
+PAGINATION_EXACT_COUNT_LIMIT = int(
+    os.environ.get("PAGINATION_EXACT_COUNT_LIMIT", 100000)
+)
+
+# Deleted users and posts are purged this many rows per transaction, see
+# user/purge.py; a purge task stops after PURGE_MAX_BATCHES and beat resumes it
+PURGE_BATCH_SIZE = int(os.environ.get("PURGE_BATCH_SIZE", 1000))
+PURGE_MAX_BATCHES = 100
+
+# POST responses replayed to retries carrying the same Idempotency-Key, see
+# social_media_api/idempotency.py
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", 24 * 60 * 60))
+IDEMPOTENCY_LOCK_SECONDS = 60
+IDEMPOTENCY_WAIT_SECONDS = 10
+
+# Rows fetched per round trip by the server-side cursors of data exports
+EXPORT_CHUNK_SIZE = 2000
+# Background exports can be downloaded for this long, then they are deleted
+EXPORT_MAX_AGE_SECONDS = int(os.environ.get("EXPORT_MAX_AGE_SECONDS", 24 * 60 * 60))
+
+# Prometheus: bearer token required by /metrics, port of the worker exporter
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+CELERY_METRICS_PORT = int(os.environ.get("CELERY_METRICS_PORT", 0)) or None
+
+# Request profiling: fraction of requests sampled, header staff can send to
+# profile a request, days the profiles are kept
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0))
+PROFILING_HEADER = "X-Profile-Request"
+PROFILING_RETENTION_DAYS = 7
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "monitoring": {
+            "handlers": ["console"],
+            "level": os.environ.get("MONITORING_LOG_LEVEL", "WARNING"),
+        },
+    },
+}
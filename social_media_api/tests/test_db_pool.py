@@ -0,0 +1,41 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from social_media_api.db_pool import PoolStatsCollector, pool_stats
+
+
+class PoolStatsCollectorTests(SimpleTestCase):
+    def test_no_metrics_without_pool(self):
+        self.assertIsNone(pool_stats("default"))
+
+        samples = [
+            sample
+            for family in PoolStatsCollector().collect()
+            for sample in family.samples
+        ]
+        self.assertEqual(samples, [])
+
+    def test_wait_time_exported_in_seconds(self):
+        pool = MagicMock()
+        pool.get_stats.return_value = {
+            "pool_size": 4,
+            "pool_available": 1,
+            "requests_waiting": 2,
+            "requests_num": 10,
+            "requests_wait_ms": 1500,
+        }
+        connection = MagicMock(pool=pool)
+
+        with patch("social_media_api.db_pool.connections") as connections:
+            connections.__iter__.return_value = iter(["default"])
+            connections.__getitem__.return_value = connection
+            families = {
+                family.name: family for family in PoolStatsCollector().collect()
+            }
+
+        wait = families["db_pool_wait_seconds"].samples[0]
+        self.assertEqual(wait.value, 1.5)
+        self.assertEqual(wait.labels, {"database": "default"})
+        waiting = families["db_pool_requests_waiting"].samples[0]
+        self.assertEqual(waiting.value, 2)
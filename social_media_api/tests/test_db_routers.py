@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from post.models import Post
+from social_media_api.db_routers import PrimaryReplicaRouter
+from social_media_api.middleware import ReadReplicaMiddleware
+
+router = PrimaryReplicaRouter()
+
+
+def read_database_view(request):
+    return HttpResponse(router.db_for_read(Post) or "default")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], REPLICA_PIN_SECONDS=5)
+class ReadReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = ReadReplicaMiddleware(read_database_view)
+        self.auth = {"HTTP_AUTHORIZATION": "Token abc"}
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertIsNone(router.db_for_read(Post))
+        self.assertEqual(router.db_for_write(Post), "default")
+
+    def test_safe_request_reads_from_replica(self):
+        res = self.middleware(self.factory.get("/api/post/", **self.auth))
+
+        self.assertEqual(res.content, b"replica_0")
+        self.assertIsNone(router.db_for_read(Post))
+
+    def test_write_request_uses_primary(self):
+        res = self.middleware(self.factory.post("/api/post/", **self.auth))
+
+        self.assertEqual(res.content, b"default")
+
+    def test_reads_after_write_stick_to_primary(self):
+        self.middleware(self.factory.post("/api/post/1/like/", **self.auth))
+
+        res = self.middleware(self.factory.get("/api/post/", **self.auth))
+        self.assertEqual(res.content, b"default")
+
+        other = {"HTTP_AUTHORIZATION": "Token other"}
+        res = self.middleware(self.factory.get("/api/post/", **other))
+        self.assertEqual(res.content, b"replica_0")
+
+    def test_auth_tokens_read_from_primary(self):
+        res = ReadReplicaMiddleware(
+            lambda request: HttpResponse(router.db_for_read(Token) or "default")
+        )(self.factory.get("/api/post/", **self.auth))
+
+        self.assertEqual(res.content, b"default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_reads_use_primary(self):
+        res = self.middleware(self.factory.get("/api/post/", **self.auth))
+
+        self.assertEqual(res.content, b"default")
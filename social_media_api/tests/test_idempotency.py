@@ -0,0 +1,110 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from post.models import Comment, Post, ScheduledPost, Tag
+from social_media_api.idempotency import REPLAYED_HEADER, idempotency_cache_keys
+
+POST_URL = reverse("post:post-list")
+
+
+def sample_user(index: int):
+    return get_user_model().objects.create_user(
+        f"user{index}@test.com", "testpass", username=f"user{index}"
+    )
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for target in ("notification.inbox.push_event", "analytics.events.push_event"):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.user = sample_user(0)
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(name="django")
+        self.payload = {"title": "Retried", "content": "...", "tags": [self.tag.id]}
+
+    def test_retry_replays_first_response(self):
+        first = self.client.post(POST_URL, self.payload, HTTP_IDEMPOTENCY_KEY="a1")
+        retry = self.client.post(POST_URL, self.payload, HTTP_IDEMPOTENCY_KEY="a1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry[REPLAYED_HEADER], "true")
+        self.assertNotIn(REPLAYED_HEADER, first)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        self.client.post(POST_URL, self.payload)
+        self.client.post(POST_URL, self.payload)
+
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_keys_scoped_to_user(self):
+        self.client.post(POST_URL, self.payload, HTTP_IDEMPOTENCY_KEY="a1")
+        self.client.force_authenticate(sample_user(1))
+
+        res = self.client.post(POST_URL, self.payload, HTTP_IDEMPOTENCY_KEY="a1")
+
+        self.assertNotIn(REPLAYED_HEADER, res)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_key_reused_for_other_request_rejected(self):
+        self.client.post(POST_URL, self.payload, HTTP_IDEMPOTENCY_KEY="a1")
+
+        res = self.client.post(
+            POST_URL, {**self.payload, "title": "Other"}, HTTP_IDEMPOTENCY_KEY="a1"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_comment_and_schedule_retries_replayed(self):
+        post = Post.objects.create(title="Post", creator=self.user)
+        comments_url = reverse("post:post-comments", args=[post.id])
+        schedule_url = reverse("post:post-schedule")
+        schedule = {**self.payload, "scheduled_time": "2030-01-01T10:00"}
+
+        for _ in range(2):
+            self.client.post(comments_url, {"content": "Hi"}, HTTP_IDEMPOTENCY_KEY="c")
+            self.client.post(schedule_url, schedule, HTTP_IDEMPOTENCY_KEY="s")
+
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(ScheduledPost.objects.count(), 1)
+
+    def test_concurrent_duplicate_waits_for_response(self):
+        response_key, lock_key = idempotency_cache_keys(self.user.id, "a1")
+        self.client.post(POST_URL, self.payload, HTTP_IDEMPOTENCY_KEY="a1")
+        stored = cache.get(response_key)
+        # as if the first request was still running, it finishes while we wait
+        cache.delete(response_key)
+        cache.add(lock_key, "running")
+
+        def finish_first_request(_):
+            cache.set(response_key, stored)
+            cache.delete(lock_key)
+
+        with patch("social_media_api.idempotency.time.sleep") as sleep:
+            sleep.side_effect = finish_first_request
+            res = self.client.post(POST_URL, self.payload, HTTP_IDEMPOTENCY_KEY="a1")
+
+        self.assertEqual(res[REPLAYED_HEADER], "true")
+        self.assertEqual(Post.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_in_flight_duplicate_conflicts_after_wait(self):
+        with patch("social_media_api.idempotency.cache.add", return_value=False):
+            res = self.client.post(POST_URL, self.payload, HTTP_IDEMPOTENCY_KEY="a1")
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,137 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from post.models import Post, Tag
+from post.serializers import PostListSerializer
+from social_media_api.images import generate_renditions
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def sample_jpeg(size=(2000, 1000), orientation=None) -> bytes:
+    image = Image.new("RGB", size, "red")
+    exif = image.getexif()
+    exif[0x010F] = "Camera maker"
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_RENDITIONS={"thumbnail": (320, 320), "medium": (1080, 1080)},
+)
+class GenerateRenditionsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def sample_post(self, content: bytes) -> Post:
+        post = Post(title="Photo", content="...", creator=self.user)
+        post.image.save("photo.jpg", ContentFile(content))
+        return post
+
+    def test_renditions_are_webp_within_size(self):
+        post = self.sample_post(sample_jpeg())
+        self.assertTrue(generate_renditions(post, "image"))
+
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (2000, 1000))
+        for name, size in (("thumbnail", (320, 160)), ("medium", (1080, 540))):
+            with default_storage.open(post.image_renditions[name]) as file:
+                with Image.open(file) as rendition:
+                    self.assertEqual(rendition.format, "WEBP")
+                    self.assertEqual(rendition.size, size)
+
+    def test_metadata_is_stripped_and_orientation_applied(self):
+        post = self.sample_post(sample_jpeg(orientation=6))
+        original = post.image.name
+        generate_renditions(post, "image")
+
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, original)
+        self.assertFalse(default_storage.exists(original))
+        self.assertEqual((post.image_width, post.image_height), (1000, 2000))
+        with default_storage.open(post.image.name) as file:
+            with Image.open(file) as image:
+                self.assertNotIn("exif", image.info)
+                self.assertEqual(image.size, (1000, 2000))
+
+    def test_replaced_image_is_left_alone(self):
+        post = self.sample_post(sample_jpeg())
+        files = set(default_storage.listdir("uploads/users/")[1])
+        Post.objects.filter(id=post.id).update(image="uploads/users/other.jpg")
+
+        self.assertFalse(generate_renditions(post, "image"))
+        post.refresh_from_db()
+        self.assertEqual(post.image_renditions, {})
+        self.assertEqual(set(default_storage.listdir("uploads/users/")[1]), files)
+
+    def test_serializer_exposes_rendition_urls(self):
+        post = self.sample_post(sample_jpeg())
+        generate_renditions(post, "image")
+        post.refresh_from_db()
+        post.likes_total = 0
+
+        data = PostListSerializer(post, context={"request": None}).data
+        self.assertEqual(set(data["image_renditions"]), {"thumbnail", "medium"})
+        self.assertTrue(data["image_renditions"]["thumbnail"].endswith(".webp"))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ScheduleRenditionsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_upload_schedules_renditions_after_commit(self):
+        tag = Tag.objects.create(name="django")
+        image = SimpleUploadedFile("photo.jpg", sample_jpeg(), "image/jpeg")
+
+        with patch("post.views.generate_post_renditions.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    reverse("post:post-list"),
+                    {"title": "Photo", "tags": [tag.id], "image": image},
+                    format="multipart",
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        delay.assert_called_once_with(res.data["id"])
+
+    def test_avatar_update_schedules_renditions(self):
+        avatar = SimpleUploadedFile("me.jpg", sample_jpeg(), "image/jpeg")
+
+        with patch("user.views.generate_avatar_renditions.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.patch(
+                    reverse("user:manage", args=[self.user.id]),
+                    {"avatar": avatar},
+                    format="multipart",
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        delay.assert_called_once_with(self.user.id)
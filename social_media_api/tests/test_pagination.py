@@ -0,0 +1,106 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from post.models import Post
+from social_media_api.pagination import (
+    EstimatedCountPaginator,
+    count_rows,
+    is_unfiltered,
+    planner_estimate,
+)
+
+POST_URL = reverse("post:post-list")
+
+
+class EstimatedCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpassword"
+        )
+        Post.objects.bulk_create(
+            Post(creator=cls.user, title=f"Post {index}") for index in range(25)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_counts_below_limit_are_exact(self):
+        self.assertEqual(count_rows(Post.objects.all(), limit=100), (25, False))
+
+    def test_limit_zero_always_counts_exactly(self):
+        self.assertEqual(count_rows(Post.objects.all(), limit=0), (25, False))
+
+    def test_counts_past_limit_use_estimate(self):
+        with mock.patch(
+            "social_media_api.pagination.planner_estimate", return_value=1000
+        ):
+            self.assertEqual(count_rows(Post.objects.all(), limit=10), (1000, True))
+
+    def test_stale_estimate_is_raised_to_limit(self):
+        with mock.patch(
+            "social_media_api.pagination.planner_estimate", return_value=0
+        ):
+            self.assertEqual(count_rows(Post.objects.all(), limit=10), (10, True))
+
+    def test_without_estimate_counts_exactly(self):
+        with mock.patch(
+            "social_media_api.pagination.planner_estimate", return_value=None
+        ):
+            self.assertEqual(count_rows(Post.objects.all(), limit=10), (25, False))
+
+    def test_default_manager_filters_count_as_unfiltered(self):
+        self.assertTrue(is_unfiltered(Post.objects.order_by("-id")))
+        self.assertFalse(is_unfiltered(Post.objects.filter(title="Post 1")))
+
+    @skipUnless(connection.vendor == "postgresql", "planner statistics")
+    def test_planner_estimate(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Post._meta.db_table}")
+
+        self.assertEqual(planner_estimate(Post.objects.all()), 25)
+        self.assertGreater(
+            planner_estimate(Post.objects.filter(title__startswith="Post 1")), 0
+        )
+
+    @override_settings(PAGINATION_EXACT_COUNT_LIMIT=10)
+    def test_paginator_serves_pages_past_underestimate(self):
+        with mock.patch(
+            "social_media_api.pagination.planner_estimate", return_value=0
+        ):
+            paginator = EstimatedCountPaginator(Post.objects.order_by("id"), 10)
+            page = paginator.page(3)
+
+        self.assertTrue(paginator.count_is_approximate)
+        self.assertEqual(paginator.num_pages, 1)
+        self.assertEqual(len(page), 5)
+        self.assertFalse(page.has_next())
+        self.assertTrue(paginator.page(2).has_next())
+        with self.assertRaises(EmptyPage):
+            paginator.page(4)
+
+    def test_list_reports_exact_count(self):
+        res = self.client.get(POST_URL)
+
+        self.assertEqual(res.data["count"], 25)
+        self.assertFalse(res.data["count_is_approximate"])
+
+    @override_settings(PAGINATION_EXACT_COUNT_LIMIT=10)
+    def test_list_reports_approximate_count(self):
+        with mock.patch(
+            "social_media_api.pagination.planner_estimate", return_value=12
+        ):
+            res = self.client.get(POST_URL, {"page": 3})
+
+        self.assertEqual(res.data["count"], 12)
+        self.assertTrue(res.data["count_is_approximate"])
+        self.assertEqual(len(res.data["results"]), 5)
+        self.assertIsNone(res.data["next"])
+        self.assertIsNotNone(res.data["previous"])
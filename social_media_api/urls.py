@@ -4,14 +4,35 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from monitoring.views import metrics
+
 urlpatterns = [
     path("api/admin/", admin.site.urls),
     path("api/user/", include("user.urls", namespace="user")),
     path("api/post/", include("post.urls", namespace="post")),
+    path(
+        "api/notification/",
+        include("notification.urls", namespace="notification"),
+    ),
+    path(
+        "api/analytics/",
+        include("analytics.urls", namespace="analytics"),
+    ),
+    path(
+        "api/monitoring/",
+        include("monitoring.urls", namespace="monitoring"),
+    ),
+    path(
+        "api/async/user/", include("user.async_urls", namespace="user-async")
+    ),
+    path(
+        "api/async/post/", include("post.async_urls", namespace="post-async")
+    ),
     path("api/doc/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/doc/swagger/",
         SpectacularSwaggerView.as_view(url_name="schema"),
         name="swagger",
     ),
+    path("metrics", metrics, name="metrics"),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -3,14 +3,58 @@ from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 from django.utils.translation import gettext as _
 from rest_framework.authtoken.models import Token
 
-from .models import User
+from user import purge
+from .models import PurgeJob, User
 
 
 admin.register(Token)
 
 
+class SoftDeleteAdminMixin:
+    """
+    Deletes by flagging and scheduling a purge, see user/purge.py. The
+    confirmation page lists the selected objects only, collecting all their
+    dependent rows is what the purge avoids.
+    """
+
+    soft_delete = None
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(self.model._meta.verbose_name)
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj) -> None:
+        self.soft_delete(obj)
+
+    def delete_queryset(self, request, queryset) -> None:
+        for obj in queryset:
+            self.soft_delete(obj)
+
+
+@admin.register(PurgeJob)
+class PurgeJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "target",
+        "object_id",
+        "step",
+        "processed_rows",
+        "created_at",
+        "updated_at",
+        "finished_at",
+    )
+    list_filter = ("target", "finished_at")
+    readonly_fields = list_display
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+
 @admin.register(User)
-class UserAdmin(DjangoUserAdmin):
+class UserAdmin(SoftDeleteAdminMixin, DjangoUserAdmin):
     """Define admin model for custom User model with no email field."""
 
     fieldsets = (
@@ -54,3 +98,4 @@ class UserAdmin(DjangoUserAdmin):
     list_display = ("email", "first_name", "last_name", "is_staff")
     search_fields = ("email", "first_name", "last_name")
     ordering = ("email",)
+    soft_delete = staticmethod(purge.soft_delete_user)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from user.async_views import user_list
+
+urlpatterns = [
+    path("list/", user_list, name="list"),
+]
+
+app_name = "user-async"
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+
+from social_media_api.async_api import apaginate, async_api_view, render
+from user.serializers import UserListSerializer
+from user.views import UserListPagination, UserListView
+
+
+@async_api_view
+async def user_list(request):
+    """List users with filter by username"""
+    queryset = get_user_model().objects.all()
+    username = request.GET.get("username")
+
+    if username:
+        queryset = queryset.filter(username__icontains=username)
+
+    queryset = UserListView.query_plans["get"].apply(queryset)
+    page = await apaginate(request, queryset, UserListPagination.page_size)
+    page["results"] = UserListSerializer(
+        page["results"], many=True, context={"request": request}
+    ).data
+    return render(page)
@@ -0,0 +1,175 @@
+"""
+Export of everything a user created or liked: posts, comments, likes and
+follows.
+
+Rows are read through server-side cursors EXPORT_CHUNK_SIZE at a time,
+encoded one by one as NDJSON or CSV and gzip-compressed as they go, so
+memory use stays flat however large the account is.
+
+Background exports are written to the private "exports" storage and
+downloaded through a signed link, valid for EXPORT_MAX_AGE_SECONDS. The
+creation time is part of the file name, which lets expired files be found
+without a database.
+"""
+
+import csv
+import io
+import json
+import time
+import uuid
+import zlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Prefetch
+from django.utils import timezone
+
+from post.models import Comment, Post, Tag
+
+EXPORT_FORMATS = ("ndjson", "csv")
+DOWNLOAD_SALT = "user.exports.download"
+CSV_COLUMNS = (
+    "type",
+    "id",
+    "created_at",
+    "post_id",
+    "user_id",
+    "username",
+    "title",
+    "content",
+    "image",
+    "tags",
+)
+
+
+def export_rows(user_id: int, chunk_size: int = None):
+    """Yields the user's content as dicts, one per record, by type"""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+
+    posts = (
+        Post.objects.filter(creator_id=user_id)
+        .only("id", "created_at", "title", "content", "image")
+        .prefetch_related(Prefetch("tags", queryset=Tag.objects.only("name")))
+        .order_by("id")
+    )
+    for post in posts.iterator(chunk_size=chunk_size):
+        yield {
+            "type": "post",
+            "id": post.id,
+            "created_at": post.created_at,
+            "title": post.title,
+            "content": post.content,
+            "image": post.image.name or "",
+            "tags": [tag.name for tag in post.tags.all()],
+        }
+
+    comments = (
+        Comment.objects.filter(writer_id=user_id)
+        .order_by("id")
+        .values("id", "created_at", "post_id", "content")
+    )
+    for comment in comments.iterator(chunk_size=chunk_size):
+        yield {"type": "comment", **comment}
+
+    likes = (
+        Post.likes.through.objects.filter(user_id=user_id)
+        .order_by("post_id")
+        .values("post_id", title=F("post__title"))
+    )
+    for like in likes.iterator(chunk_size=chunk_size):
+        yield {"type": "like", **like}
+
+    follows = (
+        get_user_model()
+        .follows.through.objects.filter(from_user_id=user_id)
+        .order_by("to_user_id")
+        .values(user_id=F("to_user_id"), username=F("to_user__username"))
+    )
+    for follow in follows.iterator(chunk_size=chunk_size):
+        yield {"type": "follow", **follow}
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def csv_lines(rows):
+    """CSV of all record types, columns a type doesn't have are left empty"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        if "tags" in row:
+            row = {**row, "tags": ";".join(row["tags"])}
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def gzip_chunks(lines, level: int = 6):
+    """Compresses the text lines into one gzip stream as they come"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for line in lines:
+        data = compressor.compress(line.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(user_id: int, export_format: str = "ndjson"):
+    """Gzip-compressed bytes of the user's export in the given format"""
+    encode = csv_lines if export_format == "csv" else ndjson_lines
+    return gzip_chunks(encode(export_rows(user_id)))
+
+
+def export_filename(user_id: int, export_format: str) -> str:
+    return f"user-{user_id}-{timezone.now():%Y%m%d%H%M%S}.{export_format}.gz"
+
+
+def export_storage():
+    return storages["exports"]
+
+
+def new_export_name(user_id: int, export_format: str) -> str:
+    filename = export_filename(user_id, export_format)
+    return f"{int(time.time())}-{uuid.uuid4().hex}-{filename}"
+
+
+def download_filename(name: str) -> str:
+    return name.split("-", 2)[-1]
+
+
+def sign_download(user_id: int, name: str) -> str:
+    return signing.dumps([user_id, name], salt=DOWNLOAD_SALT)
+
+
+def unsign_download(token: str) -> tuple:
+    """
+    Returns (user id, name) of a download token. Raises BadSignature for
+    tokens which were tampered with or are older than EXPORT_MAX_AGE_SECONDS.
+    """
+    user_id, name = signing.loads(
+        token, salt=DOWNLOAD_SALT, max_age=settings.EXPORT_MAX_AGE_SECONDS
+    )
+    return user_id, name
+
+
+def clean_exports() -> int:
+    """Deletes the exports whose download links have expired"""
+    storage = export_storage()
+    if not storage.exists(""):
+        return 0
+    deadline = time.time() - settings.EXPORT_MAX_AGE_SECONDS
+    removed = 0
+    for name in storage.listdir("")[1]:
+        created = name.split("-", 1)[0]
+        if created.isdigit() and int(created) < deadline:
+            storage.delete(name)
+            removed += 1
+    return removed
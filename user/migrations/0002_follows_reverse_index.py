@@ -0,0 +1,22 @@
+# Generated by Django 5.0.3 on 2026-10-19 12:00
+
+from django.db import migrations
+
+from social_media_api.migration_operations import AddThroughIndex
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("user", "0001_initial"),
+    ]
+
+    operations = [
+        AddThroughIndex(
+            model_name="user",
+            field_name="follows",
+            fields=["to_user", "from_user"],
+            name="user_follows_to_from_idx",
+        ),
+    ]
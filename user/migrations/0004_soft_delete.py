@@ -0,0 +1,67 @@
+# Generated by Django 5.0.3 on 2026-10-19 20:00
+
+from django.db import migrations, models
+
+from social_media_api.migration_operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("user", "0003_user_avatar_renditions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PurgeJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "target",
+                    models.CharField(
+                        choices=[("user", "User"), ("post", "Post")], max_length=4
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("step", models.CharField(blank=True, max_length=32)),
+                ("processed_rows", models.PositiveBigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ("created_at", "id"),
+            },
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="is_deleted",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_deleted", True)),
+                fields=["id"],
+                name="user_deleted_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purgejob",
+            index=models.Index(
+                condition=models.Q(("finished_at__isnull", True)),
+                fields=["created_at", "id"],
+                name="purge_job_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.3 on 2026-10-19 21:00
+
+from django.db import migrations
+
+from social_media_api.migration_operations import RemoveIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("user", "0004_soft_delete"),
+    ]
+
+    operations = [
+        RemoveIndexConcurrentlyIfSupported(
+            model_name="user",
+            name="user_deleted_idx",
+        ),
+    ]
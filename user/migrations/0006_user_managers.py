@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-19 23:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0005_remove_user_deleted_idx"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="user",
+            managers=[],
+        ),
+    ]
@@ -7,6 +7,8 @@ from django.contrib.auth.models import (
 )
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 from django.utils.translation import gettext as _
 
@@ -14,7 +16,12 @@ from django.utils.translation import gettext as _
 class UserManager(BaseUserManager):
     """Define a model manager for User model with no username field."""
 
-    use_in_migrations = True
+    # filtered, so data migrations keep Django's plain manager of every user
+    use_in_migrations = False
+
+    def get_queryset(self):
+        """Leaves out soft-deleted users waiting to be purged"""
+        return super().get_queryset().filter(is_deleted=False)
 
     def _create_user(self, email, password, **extra_fields):
         """Create and save a User with the given email and password."""
@@ -66,6 +73,9 @@ class User(AbstractUser):
         null=True,
         upload_to=user_image_file_path,
     )
+    avatar_width = models.PositiveIntegerField(null=True, editable=False)
+    avatar_height = models.PositiveIntegerField(null=True, editable=False)
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(_("biography"), max_length=255, null=True)
     birthday = models.DateField(_("birthday"), null=True)
     follows = models.ManyToManyField(
@@ -73,6 +83,7 @@ class User(AbstractUser):
         related_name="followers",
         blank=True,
     )
+    is_deleted = models.BooleanField(default=False, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
@@ -87,4 +98,50 @@ class User(AbstractUser):
     @property
     def followers_count(self) -> int:
         """Calculates and returns the number of users following the current user."""
+        if hasattr(self, "followers_total"):
+            return self.followers_total
         return self.followers.count()
+
+
+def followers_count() -> Coalesce:
+    """Correlated subquery counting followers, meant to be annotated as followers_total"""
+    followers = (
+        User.follows.through.objects.filter(
+            to_user_id=OuterRef("pk"), from_user__is_deleted=False
+        )
+        .order_by()
+        .values("to_user_id")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(followers), 0)
+
+
+class PurgeJob(models.Model):
+    """Batched deletion of a soft-deleted user or post, see user/purge.py"""
+
+    class Target(models.TextChoices):
+        USER = "user"
+        POST = "post"
+
+    target = models.CharField(max_length=4, choices=Target.choices)
+    object_id = models.BigIntegerField()
+    # step being worked on and rows deleted or hidden so far
+    step = models.CharField(max_length=32, blank=True)
+    processed_rows = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("created_at", "id")
+        indexes = (
+            models.Index(
+                fields=("created_at", "id"),
+                condition=Q(finished_at__isnull=True),
+                name="purge_job_pending_idx",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"purge of {self.target} {self.object_id}"
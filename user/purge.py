@@ -0,0 +1,159 @@
+"""
+Soft deletion of users and posts, purged in the background in batches.
+
+Deleting a prolific user in one go cascades through their posts, comments,
+likes and follows in one transaction holding locks on the busiest tables
+for seconds. Instead the user or post is flagged is_deleted, which the
+default managers and like counts filter out, so it disappears from every
+list at once along with the user's posts, comments and likes. A PurgeJob
+then deletes what depends on it PURGE_BATCH_SIZE rows at a time, one short
+transaction per batch. The job records the step it is on and the rows
+processed so far, so an interrupted purge resumes where it stopped.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from analytics.models import CreatorEngagement, PostEngagement
+from notification.models import Notification, NotificationActor
+from post.models import Comment, Post
+from social_media_api.async_api import token_cache_key
+from user.models import PurgeJob
+
+HIDE = {"is_deleted": True}
+
+
+def post_steps(post_id: int) -> tuple:
+    """(name, queryset, updates) of each step, updates None deletes the rows"""
+    return (
+        ("comments", Comment._base_manager.filter(post_id=post_id), None),
+        ("likes", Post.likes.through.objects.filter(post_id=post_id), None),
+        ("engagement", PostEngagement.objects.filter(post_id=post_id), None),
+        ("post", Post._base_manager.filter(id=post_id), None),
+    )
+
+
+def user_steps(user_id: int) -> tuple:
+    """(name, queryset, updates) of each step, updates None deletes the rows"""
+    User = get_user_model()
+    posts = Post._base_manager.filter(creator_id=user_id)
+    return (
+        ("hide posts", posts.filter(is_deleted=False), HIDE),
+        ("comments", Comment._base_manager.filter(writer_id=user_id), None),
+        ("likes", Post.likes.through.objects.filter(user_id=user_id), None),
+        ("follows", User.follows.through.objects.filter(from_user_id=user_id), None),
+        ("followers", User.follows.through.objects.filter(to_user_id=user_id), None),
+        ("notifications", Notification.objects.filter(recipient_id=user_id), None),
+        (
+            "notified",
+            NotificationActor.objects.filter(actor_id=user_id),
+            None,
+        ),
+        (
+            "post comments",
+            Comment._base_manager.filter(post__creator_id=user_id),
+            None,
+        ),
+        (
+            "post likes",
+            Post.likes.through.objects.filter(post__creator_id=user_id),
+            None,
+        ),
+        (
+            "post engagement",
+            PostEngagement.objects.filter(post__creator_id=user_id),
+            None,
+        ),
+        (
+            "engagement",
+            CreatorEngagement.objects.filter(creator_id=user_id),
+            None,
+        ),
+        ("posts", posts, None),
+        ("user", User._base_manager.filter(id=user_id), None),
+    )
+
+
+STEPS = {
+    PurgeJob.Target.USER: user_steps,
+    PurgeJob.Target.POST: post_steps,
+}
+
+
+def _schedule(job: PurgeJob) -> PurgeJob:
+    from user.tasks import purge_deleted
+
+    transaction.on_commit(lambda: purge_deleted.delay(job.id))
+    return job
+
+
+def soft_delete_post(post) -> PurgeJob:
+    """Hides the post and schedules the purge of it and its comments and likes"""
+    Post._base_manager.filter(id=post.id).update(is_deleted=True)
+    return _schedule(
+        PurgeJob.objects.create(target=PurgeJob.Target.POST, object_id=post.id)
+    )
+
+
+def soft_delete_user(user) -> PurgeJob:
+    """
+    Hides the user and schedules the purge of everything they created. The
+    account is deactivated, signed out and its email released at once.
+    """
+    get_user_model()._base_manager.filter(id=user.id).update(
+        is_deleted=True,
+        is_active=False,
+        email=f"deleted-{user.id}@deleted.invalid",
+    )
+    tokens = Token.objects.filter(user_id=user.id)
+    keys = [token_cache_key(key) for key in tokens.values_list("key", flat=True)]
+    tokens.delete()
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    return _schedule(
+        PurgeJob.objects.create(target=PurgeJob.Target.USER, object_id=user.id)
+    )
+
+
+def purge_batch(job_id: int) -> bool:
+    """
+    Processes the next batch of the job in its own transaction. Returns
+    False once the job is finished, or when another worker holds it.
+    """
+    with transaction.atomic():
+        job = (
+            PurgeJob.objects.select_for_update(skip_locked=True)
+            .filter(id=job_id, finished_at__isnull=True)
+            .first()
+        )
+        if job is None:
+            return False
+
+        steps = STEPS[job.target](job.object_id)
+        names = [name for name, _, _ in steps]
+        start = names.index(job.step) if job.step in names else 0
+        for name, queryset, updates in steps[start:]:
+            ids = list(
+                queryset.order_by().values_list("pk", flat=True)[
+                    : settings.PURGE_BATCH_SIZE
+                ]
+            )
+            if not ids:
+                continue
+            rows = queryset.model._base_manager.filter(pk__in=ids)
+            if updates:
+                count = rows.update(**updates)
+            else:
+                count, _ = rows.delete()
+            job.step = name
+            job.processed_rows += count
+            job.save(update_fields=("step", "processed_rows", "updated_at"))
+            return True
+
+        job.step = ""
+        job.finished_at = timezone.now()
+        job.save(update_fields=("step", "finished_at", "updated_at"))
+        return False
@@ -2,6 +2,8 @@ from django.contrib.auth import get_user_model, authenticate
 from rest_framework import serializers, exceptions
 from django.utils.translation import gettext as _
 
+from social_media_api.images import RenditionsField
+
 
 class AuthTokenSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -72,6 +74,7 @@ class UserListSerializer(serializers.ModelSerializer):
         many=True,
     )
     followers_count = serializers.IntegerField(read_only=True)
+    avatar_renditions = RenditionsField()
 
     class Meta:
         model = get_user_model()
@@ -80,6 +83,9 @@ class UserListSerializer(serializers.ModelSerializer):
             "email",
             "username",
             "avatar",
+            "avatar_width",
+            "avatar_height",
+            "avatar_renditions",
             "bio",
             "birthday",
             "follows",
@@ -0,0 +1,59 @@
+import logging
+import tempfile
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import File
+
+from social_media_api.images import generate_renditions
+from user import purge
+from user.exports import clean_exports, export_storage, stream_export
+from user.models import PurgeJob
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generate_avatar_renditions(user_id) -> None:
+    user = get_user_model().objects.filter(id=user_id).first()
+    if user is not None:
+        generate_renditions(user, "avatar")
+
+
+@shared_task
+def export_user_data(user_id, export_format, name) -> str:
+    """Writes the user's export to the private exports storage, returns its name"""
+    with tempfile.TemporaryFile() as file:
+        for chunk in stream_export(user_id, export_format):
+            file.write(chunk)
+        file.seek(0)
+        return export_storage().save(name, File(file))
+
+
+@shared_task
+def remove_expired_exports() -> None:
+    removed = clean_exports()
+    if removed:
+        logger.info("Removed %d expired data exports", removed)
+
+
+@shared_task
+def purge_deleted(job_id) -> bool:
+    """
+    Runs up to PURGE_MAX_BATCHES batches of the purge, returns whether it
+    finished. Unfinished purges are picked up again by resume_purges.
+    """
+    for _ in range(settings.PURGE_MAX_BATCHES):
+        if not purge.purge_batch(job_id):
+            return True
+    return False
+
+
+@shared_task
+def resume_purges() -> None:
+    """Queues the purges left unfinished, oldest first"""
+    for job_id in PurgeJob.objects.filter(finished_at__isnull=True).values_list(
+        "id", flat=True
+    ):
+        purge_deleted.delay(job_id)
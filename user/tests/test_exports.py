@@ -0,0 +1,204 @@
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import time
+from unittest.mock import ANY, patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from monitoring.testing import QueryBudgetTestMixin
+from post.models import Comment, Post, Tag
+from user.exports import export_rows, export_storage, gzip_chunks
+from user.tasks import export_user_data, remove_expired_exports
+from user.views import ExportDownloadView, ExportUserDataView
+
+EXPORTS_ROOT = tempfile.mkdtemp()
+
+
+def export_url(user_id):
+    return reverse("user:export", args=[user_id])
+
+
+def read_export(response) -> str:
+    return gzip.decompress(b"".join(response.streaming_content)).decode()
+
+
+@override_settings(
+    STORAGES={
+        **settings.STORAGES,
+        "exports": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": EXPORTS_ROOT},
+        },
+    }
+)
+class ExportUserDataTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user(
+            email="user@test.com", password="testpass", username="user"
+        )
+        cls.other = User.objects.create_user(
+            email="other@test.com", password="testpass", username="other"
+        )
+        cls.admin = User.objects.create_user(
+            email="admin@test.com", password="testpass", is_staff=True
+        )
+        tag = Tag.objects.create(name="django")
+        cls.post = Post.objects.create(
+            creator=cls.user, title="Own post", content="Text"
+        )
+        cls.post.tags.add(tag)
+        cls.other_post = Post.objects.create(creator=cls.other, title="Other post")
+        cls.other_post.likes.add(cls.user)
+        Comment.objects.create(
+            post=cls.other_post, writer=cls.user, content="Nice, really"
+        )
+        cls.user.follows.add(cls.other)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(EXPORTS_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rows_cover_posts_comments_likes_and_follows(self):
+        rows = list(export_rows(self.user.id, chunk_size=1))
+
+        self.assertEqual(
+            [row["type"] for row in rows], ["post", "comment", "like", "follow"]
+        )
+        self.assertEqual(rows[0]["tags"], ["django"])
+        self.assertEqual(rows[2]["title"], "Other post")
+        self.assertEqual(rows[3]["username"], "other")
+
+    def test_gzip_chunks_round_trip(self):
+        lines = [f"line {index}\n" for index in range(10000)]
+
+        data = b"".join(gzip_chunks(iter(lines)))
+
+        self.assertEqual(gzip.decompress(data).decode(), "".join(lines))
+
+    def test_ndjson_export(self):
+        with self.assertWithinQueryBudget(ExportUserDataView, "get"):
+            res = self.client.get(export_url(self.user.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/gzip")
+        self.assertIn(".ndjson.gz", res["Content-Disposition"])
+        rows = [json.loads(line) for line in read_export(res).splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["title"], "Own post")
+
+    def test_csv_export(self):
+        res = self.client.get(export_url(self.user.id), {"output": "csv"})
+
+        rows = list(csv.DictReader(io.StringIO(read_export(res))))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["tags"], "django")
+        self.assertEqual(rows[1]["content"], "Nice, really")
+
+    def test_unknown_format_rejected(self):
+        res = self.client.get(export_url(self.user.id), {"output": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_data_forbidden(self):
+        res = self.client.get(export_url(self.other.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_admin_exports_any_user(self):
+        self.client.force_authenticate(self.admin)
+
+        res = self.client.get(export_url(self.user.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(read_export(res).splitlines()), 4)
+
+    def test_background_export_admin_only(self):
+        with patch("user.views.export_user_data.delay") as delay:
+            res = self.client.post(export_url(self.user.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        delay.assert_not_called()
+
+    def schedule_export(self, export_format="ndjson"):
+        self.client.force_authenticate(self.admin)
+        with patch("user.views.export_user_data.delay") as delay:
+            delay.return_value.id = "task-id"
+            res = self.client.post(
+                f"{export_url(self.user.id)}?output={export_format}"
+            )
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        return res, delay
+
+    def test_background_export_scheduled(self):
+        res, delay = self.schedule_export("csv")
+
+        self.assertEqual(res.data["task_id"], "task-id")
+        delay.assert_called_once_with(self.user.id, "csv", ANY)
+        name = delay.call_args.args[2]
+        self.assertTrue(name.endswith(".csv.gz"))
+        self.assertNotIn(name, res.data["download"])
+
+    def test_background_export_downloaded(self):
+        res, delay = self.schedule_export()
+        download = res.data["download"]
+        self.client.force_authenticate(self.user)
+
+        not_ready = self.client.get(download)
+        export_user_data(*delay.call_args.args)
+        with self.assertWithinQueryBudget(ExportDownloadView, "get"):
+            ready = self.client.get(download)
+
+        self.assertEqual(not_ready.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(ready.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            f'filename="user-{self.user.id}-', ready["Content-Disposition"]
+        )
+        self.assertEqual(len(read_export(ready).splitlines()), 4)
+
+    def test_download_requires_owner_and_valid_link(self):
+        res, delay = self.schedule_export()
+        export_user_data(*delay.call_args.args)
+        download = res.data["download"]
+
+        self.client.force_authenticate(self.other)
+        other = self.client.get(download)
+        self.client.force_authenticate(self.user)
+        tampered = self.client.get(f"{download[:-2]}x/")
+        moved = self.client.get(
+            download.replace(f"/{self.user.id}/", f"/{self.other.id}/")
+        )
+        with override_settings(EXPORT_MAX_AGE_SECONDS=-1):
+            expired = self.client.get(download)
+
+        self.assertEqual(other.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(tampered.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(moved.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(expired.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_expired_exports_removed(self):
+        now = int(time.time())
+        fresh = export_user_data(self.user.id, "ndjson", f"{now}-fresh.ndjson.gz")
+        old = export_user_data(
+            self.user.id, "ndjson", f"{now - 2 * 24 * 60 * 60}-old.ndjson.gz"
+        )
+
+        remove_expired_exports()
+
+        self.assertTrue(export_storage().exists(fresh))
+        self.assertFalse(export_storage().exists(old))
@@ -0,0 +1,142 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from post.models import Comment, Post
+from user.models import PurgeJob
+from user.purge import purge_batch
+from user.tasks import purge_deleted, resume_purges
+
+
+def sample_user(index: int):
+    return get_user_model().objects.create_user(
+        f"user{index}@test.com", "testpass", username=f"user{index}"
+    )
+
+
+@override_settings(PURGE_BATCH_SIZE=2)
+class PurgeTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(0)
+        self.other = sample_user(1)
+        self.client.force_authenticate(self.user)
+        self.posts = [
+            Post.objects.create(title=f"Post {index}", creator=self.user)
+            for index in range(3)
+        ]
+        self.other_post = Post.objects.create(title="Other", creator=self.other)
+        for post in self.posts:
+            post.likes.add(self.other)
+            Comment.objects.create(post=post, writer=self.other, content="Hi")
+        self.other_post.likes.add(self.user)
+        Comment.objects.create(post=self.other_post, writer=self.user, content="Hey")
+        self.user.follows.add(self.other)
+        self.other.follows.add(self.user)
+
+    def test_deleted_post_hidden_then_purged(self):
+        post = self.posts[0]
+
+        res = self.client.delete(reverse("post:post-detail", args=[post.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        res = self.client.get(reverse("post:post-detail", args=[post.id]))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.get(reverse("post:post-list"))
+        self.assertNotIn(post.id, [row["id"] for row in res.data["results"]])
+
+        job = PurgeJob.objects.get(target=PurgeJob.Target.POST, object_id=post.id)
+        self.assertTrue(purge_deleted(job.id))
+
+        job.refresh_from_db()
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(job.processed_rows, 3)
+        self.assertFalse(Post._base_manager.filter(id=post.id).exists())
+        self.assertFalse(Comment.objects.filter(post_id=post.id).exists())
+        self.assertEqual(Post.objects.count(), 3)
+
+    def test_deleted_user_hidden_and_signed_out(self):
+        Token.objects.create(user=self.user)
+
+        res = self.client.delete(reverse("user:manage", args=[self.user.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(get_user_model().objects.filter(id=self.user.id).exists())
+        self.assertFalse(Token.objects.filter(user_id=self.user.id).exists())
+        deleted = get_user_model()._base_manager.get(id=self.user.id)
+        self.assertFalse(deleted.is_active)
+        self.assertNotEqual(deleted.email, self.user.email)
+
+        job = PurgeJob.objects.get(id=res.data["purge_id"])
+        self.assertEqual(job.object_id, self.user.id)
+
+    def test_user_purged_in_batches(self):
+        job = PurgeJob.objects.create(
+            target=PurgeJob.Target.USER, object_id=self.user.id
+        )
+
+        self.assertTrue(purge_batch(job.id))
+        job.refresh_from_db()
+        self.assertEqual((job.step, job.processed_rows), ("hide posts", 2))
+        self.assertEqual(self.user.created_posts.count(), 1)
+
+        while purge_batch(job.id):
+            pass
+
+        job.refresh_from_db()
+        self.assertIsNotNone(job.finished_at)
+        User = get_user_model()
+        self.assertFalse(User._base_manager.filter(id=self.user.id).exists())
+        self.assertFalse(Post._base_manager.filter(creator_id=self.user.id).exists())
+        self.assertEqual(list(Post.objects.all()), [self.other_post])
+        self.assertFalse(self.other_post.likes.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(self.other.follows.exists())
+
+    def test_deleted_user_content_hidden_at_once(self):
+        self.client.delete(reverse("user:manage", args=[self.user.id]))
+        self.client.force_authenticate(self.other)
+
+        res = self.client.get(reverse("post:post-list"))
+        ids = [row["id"] for row in res.data["results"]]
+        self.assertEqual(ids, [self.other_post.id])
+        res = self.client.get(reverse("post:post-detail", args=[self.other_post.id]))
+        self.assertEqual(res.data["count_likes"], 0)
+        self.assertEqual(res.data["comments"], [])
+        res = self.client.get(reverse("post:post-comments", args=[self.other_post.id]))
+        self.assertEqual(res.data, [])
+
+    def test_data_migrations_see_deleted_users(self):
+        get_user_model().objects.filter(id=self.user.id).update(is_deleted=True)
+        state = MigrationLoader(connection).project_state()
+        User = state.apps.get_model("user", "User")
+
+        self.assertTrue(User.objects.filter(id=self.user.id).exists())
+        self.assertTrue(User._default_manager.filter(id=self.user.id).exists())
+
+    @override_settings(PURGE_MAX_BATCHES=1)
+    def test_unfinished_purges_queued_again(self):
+        job = PurgeJob.objects.create(
+            target=PurgeJob.Target.POST, object_id=self.posts[0].id
+        )
+        self.assertFalse(purge_deleted(job.id))
+
+        with patch("user.tasks.purge_deleted.delay") as delay:
+            resume_purges()
+
+        delay.assert_called_once_with(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.processed_rows, 1)
+
+    def test_other_users_cannot_delete_account(self):
+        res = self.client.delete(reverse("user:manage", args=[self.other.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(PurgeJob.objects.exists())
@@ -1,11 +1,16 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework import status
 
+from monitoring.testing import QueryBudgetTestMixin
 from user.serializers import UserListSerializer
+from user.views import FollowUserView, ManageUserView, UserListView
 
 
 def sample_user(**params):
@@ -92,3 +97,85 @@ class AuthenticatedMovieApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn(serializer1.data, res.data["results"])
         self.assertNotIn(serializer2.data, res.data["results"])
+
+
+class UserQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user(username="test_user")
+        self.other = sample_user(email="other@test.com", username="other")
+        for index in range(5):
+            follower = sample_user(email=f"user{index}@test.com")
+            follower.follows.add(self.user, self.other)
+        self.user.follows.add(self.other)
+        self.client.force_authenticate(self.user)
+
+    def test_list_within_budget(self):
+        with self.assertWithinQueryBudget(
+            UserListView, "get", allow_duplicates=False
+        ):
+            res = self.client.get(reverse("user:list"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        other = next(
+            user for user in res.data["results"] if user["id"] == self.other.id
+        )
+        self.assertEqual(other["followers_count"], 6)
+        self.assertEqual(len(other["followers"]), 6)
+
+    def test_manage_within_budget(self):
+        with self.assertWithinQueryBudget(
+            ManageUserView, "get", allow_duplicates=False
+        ):
+            res = self.client.get(reverse("user:manage", args=[self.other.id]))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["followers_count"], 6)
+
+    def test_follow_within_budget(self):
+        url = reverse("user:follow", args=[self.other.id])
+        with self.assertWithinQueryBudget(FollowUserView, "delete"):
+            res = self.client.delete(url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        with self.assertWithinQueryBudget(FollowUserView, "post"):
+            res = self.client.post(url)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+
+class AsyncUserListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass", username="tester"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.other = get_user_model().objects.create_user(
+            "other@test.com", "testpass", username="other"
+        )
+        self.other.follows.add(self.user)
+
+    async def test_list_matches_sync_endpoint(self):
+        headers = {"Authorization": f"Token {self.token.key}"}
+        res = await self.async_client.get(
+            reverse("user-async:list"), {"username": "test"}, headers=headers
+        )
+        client = APIClient()
+        client.force_authenticate(self.user)
+        expected = await sync_to_async(client.get)(
+            reverse("user:list"), {"username": "test"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), expected.json())
+
+    async def test_logout_drops_cached_token(self):
+        headers = {"Authorization": f"Token {self.token.key}"}
+        res = await self.async_client.get(reverse("user-async:list"), headers=headers)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        await sync_to_async(client.delete)(reverse("user:logout"))
+
+        res = await self.async_client.get(reverse("user-async:list"), headers=headers)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
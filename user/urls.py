@@ -7,6 +7,8 @@ from user.views import (
     UserListView,
     LogoutUserView,
     FollowUserView,
+    ExportUserDataView,
+    ExportDownloadView,
 )
 
 urlpatterns = [
@@ -16,6 +18,12 @@ urlpatterns = [
     path("list/", UserListView.as_view(), name="list"),
     path("<int:pk>/", ManageUserView.as_view(), name="manage"),
     path("follow/<int:pk>/", FollowUserView.as_view(), name="follow"),
+    path("<int:pk>/export/", ExportUserDataView.as_view(), name="export"),
+    path(
+        "<int:pk>/export/<str:token>/",
+        ExportDownloadView.as_view(),
+        name="export-download",
+    ),
 ]
 
 app_name = "user"
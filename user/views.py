@@ -1,25 +1,50 @@
 from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import generics, status
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
-from user.permissions import IsOwnerOrReadOnly
+from notification.inbox import notify
+from notification.models import Notification
+from social_media_api.async_api import token_cache_key
+from social_media_api.pagination import EstimatedCountPagination
+from social_media_api.query_plans import QueryPlan, QueryPlanMixin
+from user.exports import (
+    EXPORT_FORMATS,
+    download_filename,
+    export_filename,
+    export_storage,
+    new_export_name,
+    sign_download,
+    stream_export,
+    unsign_download,
+)
+from user.models import followers_count
+from user.permissions import IsOwnerOrReadOnly, IsSelfOrAdmin
+from user.purge import soft_delete_user
 from user.serializers import (
     AuthTokenSerializer,
     UserSerializer,
     UserListSerializer,
 )
+from user.tasks import export_user_data, generate_avatar_renditions
 
 
 class FollowUserView(APIView):
     permission_classes = (IsAuthenticated,)
+    query_budgets = {"post": 4, "delete": 3}
 
     @extend_schema(
         request=None,
@@ -32,13 +57,17 @@ class FollowUserView(APIView):
     def post(self, request, pk=None):
         """The user follows another user"""
         user_to_follow = get_object_or_404(get_user_model(), pk=pk)
-        if request.user == user_to_follow or user_to_follow in request.user.follows.all():
+        if (
+            request.user == user_to_follow
+            or request.user.follows.filter(pk=user_to_follow.pk).exists()
+        ):
             return Response(
                 {"error": "You cannot follow this user."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         request.user.follows.add(user_to_follow)
+        notify(Notification.Verb.FOLLOW, request.user.id, user_to_follow.id)
         return Response(
             {"message": "User followed successfully."}, status=status.HTTP_201_CREATED
         )
@@ -51,7 +80,10 @@ class FollowUserView(APIView):
     def delete(self, request, pk=None):
         """The user unfollows another user"""
         user_to_unfollow = get_object_or_404(get_user_model(), pk=pk)
-        if request.user == user_to_unfollow or user_to_unfollow not in request.user.follows.all():
+        if (
+            request.user == user_to_unfollow
+            or not request.user.follows.filter(pk=user_to_unfollow.pk).exists()
+        ):
             return Response(
                 {"error": "You cannot unfollow this user."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -64,24 +96,43 @@ class FollowUserView(APIView):
         )
 
 
+def schedule_avatar_renditions(user) -> None:
+    if user.avatar:
+        transaction.on_commit(lambda: generate_avatar_renditions.delay(user.id))
+
+
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
 
+    def perform_create(self, serializer) -> None:
+        schedule_avatar_renditions(serializer.save())
+
 
 class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
     serializer_class = AuthTokenSerializer
 
 
-class UserListPagination(PageNumberPagination):
+class UserListPagination(EstimatedCountPagination):
     page_size = 10
     max_page_size = 100
 
 
-class UserListView(generics.ListAPIView):
+USER_LIST_PLAN = QueryPlan(
+    prefetch_related=(
+        Prefetch("follows", queryset=get_user_model().objects.only("id")),
+        Prefetch("followers", queryset=get_user_model().objects.only("id")),
+    ),
+    annotations={"followers_total": followers_count()},
+)
+
+
+class UserListView(QueryPlanMixin, generics.ListAPIView):
     serializer_class = UserListSerializer
     pagination_class = UserListPagination
     permission_classes = (IsAuthenticated,)
+    query_plans = {"get": USER_LIST_PLAN}
+    query_budgets = {"get": 4}
 
     def get_queryset(self):
         queryset = get_user_model().objects.all()
@@ -90,7 +141,7 @@ class UserListView(generics.ListAPIView):
         if username:
             queryset = queryset.filter(username__icontains=username)
 
-        return queryset
+        return self.plan_queryset(queryset)
 
     @extend_schema(
         parameters=[
@@ -107,13 +158,36 @@ class UserListView(generics.ListAPIView):
         return self.list(request, *args, **kwargs)
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = get_user_model().objects.all()
     serializer_class = UserListSerializer
     permission_classes = (
         IsAuthenticated,
         IsOwnerOrReadOnly,
     )
+    query_plans = {
+        "get": USER_LIST_PLAN,
+        "put": USER_LIST_PLAN,
+        "patch": USER_LIST_PLAN,
+    }
+    query_budgets = {"get": 3}
+
+    def get_queryset(self):
+        return self.plan_queryset(self.queryset)
+
+    def perform_update(self, serializer) -> None:
+        user = serializer.save()
+        if "avatar" in serializer.validated_data:
+            schedule_avatar_renditions(user)
+
+    @extend_schema(responses={status.HTTP_202_ACCEPTED: {"type": "object"}})
+    def delete(self, request, *args, **kwargs):
+        """
+        Delete the user's account: it is hidden and signed out at once, its
+        content is purged in the background
+        """
+        job = soft_delete_user(self.get_object())
+        return Response({"purge_id": job.id}, status=status.HTTP_202_ACCEPTED)
 
 
 class LogoutUserView(APIView):
@@ -127,5 +201,106 @@ class LogoutUserView(APIView):
     def delete(self, request):
         """Delete user's token"""
         token = Token.objects.get(user_id=request.user.id)
+        cache.delete(token_cache_key(token.key))
         token.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+EXPORT_FORMAT_PARAMETER = OpenApiParameter(
+    name="output",
+    description="Export format, ndjson (default) or csv",
+    required=False,
+    type=str,
+    enum=EXPORT_FORMATS,
+)
+
+
+class ExportUserDataView(APIView):
+    """Export of the posts, comments, likes and follows of a user"""
+
+    query_budgets = {"get": 1, "post": 1}
+
+    def get_permissions(self):
+        if self.request.method == "POST":
+            return [IsAdminUser()]
+        return [IsAuthenticated(), IsSelfOrAdmin()]
+
+    def get_export_format(self) -> str:
+        export_format = self.request.query_params.get("output", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"output": [f"Choose one of: {', '.join(EXPORT_FORMATS)}."]}
+            )
+        return export_format
+
+    def get_object(self, pk):
+        user = get_object_or_404(get_user_model().objects.only("id"), pk=pk)
+        self.check_object_permissions(self.request, user)
+        return user
+
+    @extend_schema(
+        parameters=[EXPORT_FORMAT_PARAMETER],
+        responses={(status.HTTP_200_OK, "application/gzip"): bytes},
+    )
+    def get(self, request, pk=None):
+        """Stream the user's data as a gzipped NDJSON or CSV file"""
+        export_format = self.get_export_format()
+        user = self.get_object(pk)
+        response = StreamingHttpResponse(
+            stream_export(user.id, export_format), content_type="application/gzip"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{export_filename(user.id, export_format)}"'
+        )
+        return response
+
+    @extend_schema(
+        request=None,
+        parameters=[EXPORT_FORMAT_PARAMETER],
+        responses={status.HTTP_202_ACCEPTED: {"type": "object"}},
+    )
+    def post(self, request, pk=None):
+        """
+        Write the user's data to private storage in a background task. The
+        download link works for the user and admins until the export expires.
+        """
+        export_format = self.get_export_format()
+        user = self.get_object(pk)
+        name = new_export_name(user.id, export_format)
+        task = export_user_data.delay(user.id, export_format, name)
+        download = reverse(
+            "user:export-download", args=[user.id, sign_download(user.id, name)]
+        )
+        return Response(
+            {"task_id": task.id, "download": request.build_absolute_uri(download)},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ExportDownloadView(APIView):
+    """Download of an export written in the background"""
+
+    permission_classes = (IsAuthenticated, IsSelfOrAdmin)
+    query_budgets = {"get": 1}
+
+    @extend_schema(
+        operation_id="user_export_download",
+        responses={(status.HTTP_200_OK, "application/gzip"): bytes},
+    )
+    def get(self, request, pk=None, token=None):
+        """Download the export, 404 until it is written or once it expired"""
+        user = get_object_or_404(get_user_model().objects.only("id"), pk=pk)
+        self.check_object_permissions(request, user)
+        try:
+            user_id, name = unsign_download(token)
+        except signing.BadSignature:
+            raise Http404
+        storage = export_storage()
+        if user_id != user.id or not storage.exists(name):
+            raise Http404
+        return FileResponse(
+            storage.open(name, "rb"),
+            as_attachment=True,
+            filename=download_filename(name),
+            content_type="application/gzip",
+        )